@@ -0,0 +1,354 @@
+"""
+Durable LangGraph checkpoints in a local SQLite file.
+
+LangGraph saves a checkpoint after every completed node. With them an
+interrupted run (worker crash, LLM timeout) resumes from the last completed
+node instead of starting over, and a retry of a finished run returns its
+result instead of repeating retrieval and tool calls.
+
+Storage is kept compact: channel values are stored once per version, so an
+unchanged conversation history is not rewritten with every checkpoint, and
+large values are zlib-compressed. Writes are buffered and committed in one
+transaction every CHECKPOINT_FLUSH_INTERVAL_SECONDS (or CHECKPOINT_BATCH_SIZE
+rows), so a crash loses at most that window and the run resumes from an
+earlier node.
+"""
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+import config
+
+
+COMPRESSED_SUFFIX = "+z"
+EMPTY = "empty"  # Channel without a value at this version
+
+
+def _like(prefix: str) -> str:
+    """
+    LIKE pattern matching IDs that start with prefix (ESCAPE '\\')
+    """
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    Checkpoint saver backed by a local SQLite file (one connection per thread)
+    """
+
+    def __init__(self, path: str = config.CHECKPOINT_DB_PATH,
+                 flush_interval: float = config.CHECKPOINT_FLUSH_INTERVAL_SECONDS,
+                 batch_size: int = config.CHECKPOINT_BATCH_SIZE,
+                 ttl_seconds: int = config.CHECKPOINT_TTL_SECONDS):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._pending: List[Tuple[str, tuple]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_gc = 0.0
+        self._closed = threading.Event()
+        self.stats = {"checkpoints": 0, "writes": 0, "flushes": 0, "bytes_written": 0}
+
+        connection = self._connection()
+        connection.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+            " parent_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL,"
+            " metadata_type TEXT NOT NULL, metadata BLOB NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL,"
+            " version TEXT NOT NULL, type TEXT NOT NULL, value BLOB,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+            " task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL,"
+            " type TEXT NOT NULL, value BLOB,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+            "CREATE INDEX IF NOT EXISTS idx_checkpoints_created ON checkpoints(created_at);"
+        )
+        connection.commit()
+
+        self._flusher = threading.Thread(target=self._run_flusher, name="checkpoint-flusher", daemon=True)
+        self._flusher.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # Serialization
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        value_type, data = self.serde.dumps_typed(value)
+        if len(data) >= config.CHECKPOINT_COMPRESS_MIN_BYTES:
+            return value_type + COMPRESSED_SUFFIX, zlib.compress(data)
+        return value_type, data
+
+    def _load(self, value_type: str, data: bytes) -> Any:
+        if value_type.endswith(COMPRESSED_SUFFIX):
+            value_type, data = value_type[:-len(COMPRESSED_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((value_type, data))
+
+    # Write buffer
+
+    def _queue(self, rows: List[Tuple[str, tuple]]):
+        with self._pending_lock:
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Commit buffered checkpoints and writes in one transaction
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+
+            connection = self._connection()
+            with connection:
+                for statement, params in rows:
+                    connection.execute(statement, params)
+            self.stats["flushes"] += 1
+            self.stats["bytes_written"] += sum(
+                len(value) for _, params in rows for value in params if isinstance(value, bytes)
+            )
+
+    def _run_flusher(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._maybe_gc()
+            except Exception as e:
+                print(f"⚠️  Checkpoint flush failed: {e}")
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join(timeout=1)
+        self.flush()
+
+    # BaseCheckpointSaver interface
+
+    def put(self, config: dict, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> dict:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        # Values live in blobs, one row per channel version
+        values = checkpoint.get("channel_values", {})
+        rows = []
+        for channel, version in new_versions.items():
+            value_type, data = self._dump(values[channel]) if channel in values else (EMPTY, None)
+            rows.append((
+                "INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, channel, str(version), value_type, data)
+            ))
+
+        checkpoint_type, checkpoint_data = self._dump({**checkpoint, "channel_values": {}})
+        metadata_type, metadata_data = self._dump(metadata)
+        rows.append((
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, checkpoint["id"], configurable.get("checkpoint_id"),
+             checkpoint_type, checkpoint_data, metadata_type, metadata_data, time.time())
+        ))
+        self.stats["checkpoints"] += 1
+        self._queue(rows)
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: dict, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        configurable = config["configurable"]
+        # Special channels (errors, interrupts) replace earlier writes of the task
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, data = self._dump(value)
+            rows.append((
+                f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"],
+                 task_id, WRITES_IDX_MAP.get(channel, idx), channel, value_type, data)
+            ))
+        self.stats["writes"] += len(rows)
+        self._queue(rows)
+
+    def get_tuple(self, config: dict) -> Optional[CheckpointTuple]:
+        self.flush()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        row = self._connection().execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", params).fetchone()
+        return self._tuple(row) if row else None
+
+    def list(self, config: Optional[dict], *, filter: Optional[dict] = None,
+             before: Optional[dict] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        self.flush()
+        query = "SELECT * FROM checkpoints WHERE 1 = 1"
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+
+        returned = 0
+        for row in self._connection().execute(query, params).fetchall():
+            checkpoint_tuple = self._tuple(row)
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield checkpoint_tuple
+            returned += 1
+            if limit is not None and returned >= limit:
+                return
+
+    def _tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint_data, \
+            metadata_type, metadata_data, _ = row
+        connection = self._connection()
+
+        checkpoint = self._load(checkpoint_type, checkpoint_data)
+        channel_values = {}
+        for channel, version in checkpoint.get("channel_versions", {}).items():
+            blob = connection.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if blob and blob[0] != EMPTY:
+                channel_values[channel] = self._load(*blob)
+        checkpoint["channel_values"] = channel_values
+
+        pending_writes = [
+            (task_id, channel, self._load(value_type, value))
+            for task_id, channel, value_type, value in connection.execute(
+                "SELECT task_id, channel, type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id)
+            )
+        ]
+
+        def config_for(target_id):
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": target_id}}
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self._load(metadata_type, metadata_data),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=pending_writes
+        )
+
+    # Maintenance
+
+    def delete_threads(self, prefix: str) -> int:
+        """
+        Delete every thread whose ID starts with prefix (e.g. all runs of a session)
+
+        Returns:
+            Number of checkpoints removed
+        """
+        self.flush()
+        pattern = _like(prefix)
+        connection = self._connection()
+        with connection:
+            removed = connection.execute(
+                "DELETE FROM checkpoints WHERE thread_id LIKE ? ESCAPE '\\'", (pattern,)
+            ).rowcount
+            connection.execute("DELETE FROM blobs WHERE thread_id LIKE ? ESCAPE '\\'", (pattern,))
+            connection.execute("DELETE FROM writes WHERE thread_id LIKE ? ESCAPE '\\'", (pattern,))
+        return removed
+
+    def threads(self, prefix: str = "") -> List[dict]:
+        """
+        Threads with checkpoints, newest first
+        """
+        self.flush()
+        pattern = _like(prefix)
+        rows = self._connection().execute(
+            "SELECT thread_id, COUNT(*), MIN(created_at), MAX(created_at) FROM checkpoints "
+            "WHERE thread_id LIKE ? ESCAPE '\\' GROUP BY thread_id ORDER BY MAX(created_at) DESC",
+            (pattern,)
+        ).fetchall()
+        return [
+            {"thread_id": thread_id, "checkpoints": count, "started_at": started, "updated_at": updated}
+            for thread_id, count, started, updated in rows
+        ]
+
+    def gc(self) -> int:
+        """
+        Remove threads idle for longer than ttl_seconds
+
+        Returns:
+            Number of threads removed
+        """
+        cutoff = time.time() - self.ttl_seconds
+        connection = self._connection()
+        expired = [row[0] for row in connection.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) <= ?", (cutoff,)
+        )]
+        with connection:
+            for thread_id in expired:
+                for table in ("checkpoints", "blobs", "writes"):
+                    connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        return len(expired)
+
+    def _maybe_gc(self):
+        """
+        Collect expired threads at most once per CHECKPOINT_GC_INTERVAL_SECONDS (flusher thread)
+        """
+        now = time.monotonic()
+        if now - self._last_gc < config.CHECKPOINT_GC_INTERVAL_SECONDS:
+            return
+        self._last_gc = now
+        removed = self.gc()
+        if removed:
+            print(f"🧹 Removed checkpoints of {removed} idle run(s)")
+
+    def get_stats(self) -> dict:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.stats, "pending_rows": pending}
+
+
+def create_checkpointer() -> Optional[SQLiteCheckpointer]:
+    """
+    Checkpointer for durable runs, or None if disabled
+    """
+    if not config.CHECKPOINTS:
+        return None
+    return SQLiteCheckpointer()
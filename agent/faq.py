@@ -0,0 +1,275 @@
+"""
+Precomputed answers for frequently asked policy questions.
+
+An offline job answers the curated questions in FAQ_QUESTIONS_PATH through
+the normal retrieval + FINAL_RAG_PROMPT path and stores each answer with
+fingerprints of the chunks it was generated from. PolicyAssistantGraph
+embeds incoming queries and, when the nearest FAQ question is at least
+FAQ_MATCH_THRESHOLD similar, serves the stored answer without running the
+graph. Only the first turn of a conversation is matched, since stored
+answers don't depend on history.
+
+Whenever the vector store swaps in a new index, every question is retrieved
+again: answers whose chunks changed stop being served and are regenerated in
+the background.
+
+Usage:
+    python -m agent.faq            # answer new questions, refresh stale answers
+    python -m agent.faq --force    # regenerate every answer
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+ANSWERS_FORMAT_VERSION = 1
+
+
+def load_questions(path: str = config.FAQ_QUESTIONS_PATH) -> List[str]:
+    """
+    Curated questions, one per line ("#" starts a comment)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+def chunk_fingerprint(doc: Document) -> dict:
+    """
+    Identity and content hash of a chunk an answer was generated from
+    """
+    return {
+        "source": doc.metadata.get("source", "Unknown"),
+        "chunk_id": doc.metadata.get("chunk_id"),
+        "sha1": hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+    }
+
+
+class FAQCache:
+    """
+    Stored FAQ answers plus a nearest-neighbor index over their questions
+    """
+
+    def __init__(self, agent, path: str = config.FAQ_ANSWERS_PATH,
+                 threshold: float = config.FAQ_MATCH_THRESHOLD):
+        """
+        Args:
+            agent: PolicyAssistantGraph used to retrieve and generate answers
+            path: JSON file of stored answers
+            threshold: Minimum cosine similarity to serve a stored answer
+        """
+        self.agent = agent
+        self.path = path
+        self.threshold = threshold
+        self.entries: Dict[str, dict] = {}
+        self._index = None  # Questions whose answers match the serving index
+        self._refresh_lock = threading.Lock()
+        self._refresh_requested = threading.Event()
+        self.stats = {"hits": 0, "misses": 0, "served_questions": 0, "regenerated": 0, "failed": 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read FAQ answers from {self.path}: {e}")
+            return
+        if data.get("version") != ANSWERS_FORMAT_VERSION:
+            print(f"⚠️  Ignoring FAQ answers in an old format: {self.path}")
+            return
+        self.entries = {entry["question"]: entry for entry in data.get("answers", [])}
+        print(f"✓ Loaded {len(self.entries)} FAQ answer(s)")
+
+    def save(self):
+        data = {
+            "version": ANSWERS_FORMAT_VERSION,
+            "answers": list(self.entries.values())
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """
+        Stored answer for the nearest FAQ question, if similar enough
+
+        Returns:
+            The stored entry plus "similarity", or None
+        """
+        index = self._index
+        embeddings = self.agent.vector_store.embeddings
+        if index is None or embeddings is None:
+            return None
+
+        vector = embeddings.embed_query(query)
+        doc, distance = index.similarity_search_with_score_by_vector(vector, k=1)[0]
+        # Embeddings are normalized, so squared L2 distance = 2 - 2 * cosine
+        similarity = 1 - distance / 2
+        entry = self.entries.get(doc.page_content)
+        if entry is None or similarity < self.threshold:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return {**entry, "similarity": round(float(similarity), 4)}
+
+    def sync(self, questions: List[str], force: bool = False) -> int:
+        """
+        Answer new questions and regenerate answers whose source chunks changed
+
+        Args:
+            questions: Questions to check
+            force: Regenerate every answer
+
+        Returns:
+            Number of answers generated
+        """
+        generated = 0
+        for question in questions:
+            docs = self.agent.search_policy_documents(question)
+            chunks = [chunk_fingerprint(doc) for doc in docs]
+            entry = self.entries.get(question)
+            if entry and entry["chunks"] == chunks and not force:
+                continue
+
+            try:
+                answer, docs, sections = self.agent.answer_policy_question(question, docs)
+            except Exception as e:
+                # A stale answer stays stored but unserved; the next refresh retries it
+                print(f"⚠️  Could not answer FAQ \"{question}\": {e}")
+                self.stats["failed"] += 1
+                continue
+
+            self.entries[question] = {
+                "question": question,
+                "answer": answer,
+                "sections": sections,
+                "chunks": chunks,
+                "generated_at": time.time()
+            }
+            generated += 1
+
+        self.stats["regenerated"] += generated
+        if generated:
+            self.save()
+        return generated
+
+    def _current(self, questions: List[str]) -> List[str]:
+        """
+        Questions whose stored answer was generated from the chunks retrieved now
+        """
+        return [
+            question for question in questions
+            if question in self.entries
+            and self.entries[question]["chunks"] == [
+                chunk_fingerprint(doc) for doc in self.agent.search_policy_documents(question)
+            ]
+        ]
+
+    def _build_index(self, questions: List[str]):
+        """
+        Serve the given questions' answers (none if the list is empty)
+        """
+        embeddings = self.agent.vector_store.embeddings
+        if not questions or embeddings is None:
+            self._index = None
+            self.stats["served_questions"] = 0
+            return
+
+        from langchain_community.vectorstores import FAISS
+        vectors = embeddings.embed_documents(questions)
+        self._index = FAISS.from_embeddings(text_embeddings=list(zip(questions, vectors)), embedding=embeddings)
+        self.stats["served_questions"] = len(questions)
+
+    def refresh(self):
+        """
+        Re-check stored answers against the serving index, in the background.
+        Nothing is served until the check finishes; stale answers are then
+        regenerated and served again.
+        """
+        self._index = None
+        self._refresh_requested.set()
+        if self._refresh_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh, name="faq-refresh", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            # Swaps during a refresh request another pass
+            while self._refresh_requested.is_set():
+                self._refresh_requested.clear()
+                questions = list(self.entries)
+                self._build_index(self._current(questions))
+                if self.sync(questions):
+                    self._build_index(self._current(questions))
+                print(f"✓ FAQ answers served: {self.stats['served_questions']}/{len(questions)}")
+        except Exception as e:
+            print(f"❌ FAQ refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+            # A request that arrived after the loop exited
+            if self._refresh_requested.is_set():
+                self.refresh()
+
+    def get_stats(self) -> dict:
+        return {"answers": len(self.entries), "threshold": self.threshold, **self.stats}
+
+
+def create_faq_cache(agent) -> Optional[FAQCache]:
+    """
+    FAQ cache for the agent if enabled; refreshed now and after every index swap
+    """
+    if not config.FAQ_CACHE:
+        return None
+    cache = FAQCache(agent)
+    if cache.entries:
+        cache.refresh()
+    agent.vector_store.add_swap_listener(lambda generation: cache.refresh())
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate stored answers for the curated FAQ questions")
+    parser.add_argument("--questions", default=config.FAQ_QUESTIONS_PATH)
+    parser.add_argument("--output", default=config.FAQ_ANSWERS_PATH)
+    parser.add_argument("--force", action="store_true", help="Regenerate every answer")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    if not questions:
+        print(f"⚠️  No questions in {args.questions}")
+        return
+
+    from agent.graph import PolicyAssistantGraph
+    from rag.vector_store import initialize_vector_store
+
+    agent = PolicyAssistantGraph(initialize_vector_store(), faq_cache=False)
+    cache = FAQCache(agent, path=args.output)
+
+    # Questions removed from the curated list are dropped
+    cache.entries = {question: entry for question, entry in cache.entries.items() if question in questions}
+    generated = cache.sync(questions, force=args.force)
+    cache.save()
+    print(f"✓ {generated} FAQ answer(s) generated, {len(questions) - generated} unchanged → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
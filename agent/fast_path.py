@@ -0,0 +1,232 @@
+"""
+Deterministic fast path for tool selection.
+
+Resolves trivially parseable tool requests ("status of TKT-123456",
+"check my leave balance") with compiled patterns instead of a Groq call.
+Anything it cannot resolve unambiguously is left to TOOL_SELECTION_PROMPT.
+"""
+import re
+import threading
+from typing import List, Optional
+
+from agent.tools import TOOL_MAP
+import config
+
+
+TICKET_ID_PATTERN = re.compile(r"\bTKT-?(\d{6})\b", re.IGNORECASE)
+EMPLOYEE_ID_PATTERN = re.compile(
+    r"\b(?:employee|emp)\s*(?:id|number|no\.?)?\s*[:#]?\s*([A-Z]{0,3}\d{3,})\b"
+    r"|\b([\w.+-]+@[\w-]+\.[\w.]+)\b",
+    re.IGNORECASE
+)
+
+# Splits compound requests into independent clauses
+CLAUSE_SPLIT_PATTERN = re.compile(
+    r"\s*(?:;|,?\s+(?:and|then|also)(?:\s+(?:then|also))?\s+)\s*",
+    re.IGNORECASE
+)
+FILLER_PATTERN = re.compile(
+    r"^(?:please\s+|(?:can|could|would|will)\s+you\s+(?:please\s+)?|i\s+(?:want|need|would\s+like)\s+to\s+)+"
+    r"|[\s?.!,;:]*(?:please|thanks|thank\s+you)?[\s?.!,;:]*$",
+    re.IGNORECASE
+)
+
+CREATE_VERBS = r"(?:create|open|raise|file|submit|log|lodge|make|start|new)"
+ISSUE_PATTERNS = [
+    re.compile(
+        CREATE_VERBS + r"\s+(?:an?\s+|new\s+|my\s+)?(?:hr\s+|support\s+)?(?:ticket|complaint|request|case)"
+        r"\s*(?:for|about|regarding|re|on|:|-)\s*(?P<issue>.+)$",
+        re.IGNORECASE
+    ),
+    re.compile(r"\breport\s+(?P<issue>.+)$", re.IGNORECASE),
+]
+# Issues that only point back at the conversation ("report it"); the LLM resolves them
+VAGUE_ISSUE_PATTERN = re.compile(
+    r"^(?:it|this|that|them|these|those|(?:the|this|that|an?|my)\s+(?:issue|problem|one))$",
+    re.IGNORECASE
+)
+LEAVE_TERMS = r"(?:leaves?|vacation|holidays?|pto|sick|annual|time[\s-]off)"
+
+
+class ToolRule:
+    """
+    Compiled matching rule for one tool
+    """
+
+    def __init__(self, tool: str, include: str, exclude: str = None):
+        self.tool = tool
+        self.include = re.compile(include, re.IGNORECASE)
+        self.exclude = re.compile(exclude, re.IGNORECASE) if exclude else None
+
+    def matches(self, clause: str) -> bool:
+        if not self.include.search(clause):
+            return False
+        return not (self.exclude and self.exclude.search(clause))
+
+
+TOOL_RULES = [
+    ToolRule(
+        "create_hr_ticket",
+        include=r"\b" + CREATE_VERBS + r"\b.*\b(?:ticket|complaint|case)\b|\breport\s+\w+",
+        exclude=r"\bstatus\b|\btrack\b|\bTKT-?\d{6}\b"
+    ),
+    ToolRule(
+        "check_leave_balance",
+        # A balance of anything else (expenses, reimbursements) is not a leave balance
+        include=r"\b" + LEAVE_TERMS + r"\b.*\bbalance\b|\bbalance\b.*\b" + LEAVE_TERMS + r"\b"
+                r"|\bhow\s+many\b.*\b" + LEAVE_TERMS + r"\b.*\b(?:left|remaining|have)\b",
+        exclude=r"\bticket\b|\bcomplaint\b"
+    ),
+    ToolRule(
+        "check_ticket_status",
+        include=r"\bTKT-?\d{6}\b|\b(?:status|track|progress|update)\b.*\btickets?\b|\btickets?\b.*\b(?:status|progress)\b"
+                r"|\bmy\s+(?:recent\s+|open\s+)?tickets\b",
+        exclude=r"\b" + CREATE_VERBS + r"\s+(?:an?\s+|new\s+)?(?:hr\s+)?ticket\b"
+    ),
+]
+
+
+class ToolFastPath:
+    """
+    Rule-based tool call extractor with hit-rate accounting
+    """
+
+    def __init__(self, rules: List[ToolRule] = None):
+        self.rules = rules or TOOL_RULES
+        self.fast_path_hits = 0
+        self.llm_fallbacks = 0
+        self._lock = threading.Lock()
+
+    def extract(self, query: str) -> Optional[List[dict]]:
+        """
+        Resolve a query to tool calls without the LLM
+
+        Args:
+            query: User query
+
+        Returns:
+            List of {"tool", "params"} dicts, or None if the LLM is needed
+        """
+        calls = []
+        for clause in CLAUSE_SPLIT_PATTERN.split(query.strip()):
+            clause = FILLER_PATTERN.sub("", clause).strip()
+            if not clause:
+                continue
+
+            call = self._resolve_clause(clause)
+            if call is None:
+                # One unresolved clause sends the whole request to the LLM
+                calls = None
+                break
+            if call not in calls:
+                calls.append(call)
+
+        # Larger plans need step scheduling, which the LLM planner handles
+        if calls and len(calls) > config.MAX_PARALLEL_TOOLS:
+            calls = None
+
+        with self._lock:
+            if calls:
+                self.fast_path_hits += 1
+            else:
+                self.llm_fallbacks += 1
+
+        return calls or None
+
+    def _resolve_clause(self, clause: str) -> Optional[dict]:
+        """
+        Resolve a single clause to exactly one tool call
+        """
+        matched = [rule.tool for rule in self.rules if rule.matches(clause)]
+        if len(matched) != 1:
+            return None
+
+        tool_name = matched[0]
+        if tool_name == "create_hr_ticket":
+            issue = self._extract_issue(clause)
+            if issue is None:
+                return None
+            params = {"issue": issue}
+        elif tool_name == "check_leave_balance":
+            match = EMPLOYEE_ID_PATTERN.search(clause)
+            employee_id = (match.group(1) or match.group(2)) if match else "current_user"
+            params = {"employee_id": employee_id}
+        else:
+            match = TICKET_ID_PATTERN.search(clause)
+            params = {"ticket_id": f"TKT-{match.group(1)}"} if match else {}
+
+        if not validate_tool_params(tool_name, params):
+            return None
+
+        return {"tool": tool_name, "params": params}
+
+    def _extract_issue(self, clause: str) -> Optional[str]:
+        """
+        Pull the issue description out of a ticket request
+
+        Returns:
+            The issue, or None if the clause doesn't state one ("open a new
+            ticket", "report it")
+        """
+        for pattern in ISSUE_PATTERNS:
+            match = pattern.search(clause)
+            if match:
+                issue = match.group("issue").strip(" .!?,;:")
+                if len(issue) > 2 and not VAGUE_ISSUE_PATTERN.match(issue):
+                    return issue
+        return None
+
+    def get_stats(self) -> dict:
+        """
+        Fast path hit statistics
+
+        Returns:
+            Dictionary with hit/fallback counts and the fast path share
+        """
+        with self._lock:
+            total = self.fast_path_hits + self.llm_fallbacks
+            return {
+                "fast_path_hits": self.fast_path_hits,
+                "llm_fallbacks": self.llm_fallbacks,
+                "fast_path_ratio": self.fast_path_hits / total if total else 0.0
+            }
+
+
+def _schema_types(prop: dict) -> set:
+    """
+    Collect the JSON schema types allowed for a property
+    """
+    if "type" in prop:
+        return {prop["type"]}
+    return {option.get("type") for option in prop.get("anyOf", [])}
+
+
+def validate_tool_params(tool_name: str, params: dict) -> bool:
+    """
+    Validate parameters against the tool's input schema
+
+    Args:
+        tool_name: Name of the tool in TOOL_MAP
+        params: Candidate parameters
+
+    Returns:
+        True if every required parameter is present and all types match
+    """
+    tool = TOOL_MAP.get(tool_name)
+    if tool is None:
+        return False
+
+    schema = tool.get_input_schema().model_json_schema()
+    properties = schema.get("properties", {})
+    json_types = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+    if any(name not in params for name in schema.get("required", [])):
+        return False
+
+    for name, value in params.items():
+        if name not in properties:
+            return False
+        if json_types.get(type(value)) not in _schema_types(properties[name]):
+            return False
+
+    return True
@@ -1,59 +1,75 @@
 """
 LangGraph Agent Implementation
 """
-from typing import Literal
+from typing import Iterator, Literal, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import threading
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.documents import Document
+import hashlib
 import json
+import time
 
-from agent.state import AgentState
+from agent.state import AgentState, apply_update
 from agent.prompts import (
-    SYSTEM_PROMPT, ROUTER_PROMPT, RAG_PROMPT, FINAL_RAG_PROMPT,
+    ROUTER_PROMPT, ROUTER_FUNCTION_PROMPT, RAG_PROMPT, FINAL_RAG_PROMPT,
     TOOL_SELECTION_PROMPT, FINAL_RESPONSE_PROMPT
 )
-from agent.tools import TOOL_MAP
+from agent.tools import TOOL_MAP, ROUTING_FUNCTIONS
+from agent.fast_path import ToolFastPath
+from agent.faq import create_faq_cache
+from agent.checkpoints import create_checkpointer
+from agent.llm import GroqLLM
+from agent.metrics import NodeTimings
+from agent.session_store import SessionStore, create_session_store
+from agent.resilience import LLMUnavailableError
 from rag.vector_store import VectorStoreManager
 import config
 
-# Import Groq
-from groq import Groq
 
+# Retrieval boost per query category (see classify_query)
+MEDICAL_KEYWORDS = [
+    'sick', 'ill', 'illness', 'medical', 'health', 'disease', 'condition',
+    'fever', 'cold', 'flu', 'infection', 'sinus', 'cough', 'injury', 'pain',
+    'surgery', 'hospital', 'doctor', 'treatment', 'medication', 'allergy',
+    'allergies', 'migraine', 'headache', 'fatigue', 'body ache', 'unwell',
+    'covid', 'diabetes', 'asthma', 'physical', 'mental', 'injury', 'wound'
+]
 
-class GroqLLM:
-    """
-    Custom wrapper for Groq LLM compatible with LangChain
-    """
+VACATION_KEYWORDS = [
+    'vacation', 'holiday', 'trip', 'travel', 'leisure', 'time off',
+    'annual leave', 'break', 'getaway', 'tour'
+]
 
-    def __init__(self, api_key: str, model: str = config.GROQ_MODEL):
-        self.client = Groq(api_key=api_key)
-        self.model = model
+ACTION_KEYWORDS = [
+    'ticket', 'report', 'complaint', 'issue', 'problem', 'request',
+    'help', 'support', 'escalate', 'balance', 'check'
+]
 
-    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
-        """
-        Invoke the Groq LLM
+QUERY_TYPE_LABELS = {
+    "medical": "MEDICAL/HEALTH CONDITION",
+    "vacation": "VACATION/ANNUAL LEAVE",
+    "action": "ACTION REQUEST",
+    "general": "GENERAL QUERY"
+}
 
-        Args:
-            prompt: Input prompt
-            temperature: Sampling temperature
 
-        Returns:
-            LLM response
-        """
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model,
-                temperature=temperature,
-                max_tokens=1024
-            )
-            return chat_completion.choices[0].message.content
+def classify_query(query: str) -> Tuple[str, str]:
+    """
+    Detect medical, vacation, or other policy categories
 
-        except Exception as e:
-            print(f"❌ Groq API Error: {e}")
-            return f"Error: {str(e)}"
+    Returns:
+        (query_type, keywords appended to the query to boost retrieval)
+    """
+    query = query.lower()
+    if any(keyword in query for keyword in MEDICAL_KEYWORDS):
+        return "medical", "sick leave medical condition health illness"
+    if any(keyword in query for keyword in VACATION_KEYWORDS):
+        return "vacation", "annual leave vacation time off holiday"
+    if any(keyword in query for keyword in ACTION_KEYWORDS):
+        return "action", ""
+    return "general", ""
 
 
 class PolicyAssistantGraph:
@@ -61,26 +77,56 @@ class PolicyAssistantGraph:
     LangGraph-based Policy Assistant Agent
     """
 
-    def __init__(self, vector_store_manager: VectorStoreManager):
+    def __init__(self, vector_store_manager: VectorStoreManager, session_store: SessionStore = None,
+                 faq_cache: bool = True):
         self.llm = GroqLLM(api_key=config.GROQ_API_KEY)
         self.vector_store = vector_store_manager
+        self.session_store = session_store or create_session_store()
+        self.fast_path = ToolFastPath()
+        self.node_timings = NodeTimings()
+        self.tool_pool = ThreadPoolExecutor(
+            max_workers=config.TOOL_POOL_WORKERS,
+            thread_name_prefix="tool"
+        )
+        self.tool_stats = {"calls": 0, "timeouts": 0, "queue_timeouts": 0, "overrunning": 0}
+        self._tool_lock = threading.Lock()
+        self.speculation_pool = ThreadPoolExecutor(
+            max_workers=config.SPECULATION_WORKERS,
+            thread_name_prefix="speculate"
+        )
+        self.speculation_stats = {"hits": 0, "misses": 0, "skipped": 0, "overlapped_seconds": 0.0, "wasted_seconds": 0.0}
+        self._speculations_in_flight = 0
+        self._speculation_lock = threading.Lock()
         self.graph = self._build_graph()
+        # Runs with a session or thread ID checkpoint after every node and can be resumed
+        self.checkpointer = create_checkpointer()
+        self.durable_graph = self._build_graph(checkpointer=self.checkpointer) if self.checkpointer else None
+        # Last: the FAQ refresh starts searching through this agent right away
+        self.faq = create_faq_cache(self) if faq_cache else None
 
-    def _build_graph(self) -> StateGraph:
+    def _build_graph(self, state_schema: type = AgentState, checkpointer=None) -> StateGraph:
         """
         Build the LangGraph workflow
+
+        Args:
+            state_schema: State definition whose annotations declare the reducers
+            checkpointer: Saver for per-node checkpoints (runs then need a thread ID)
         """
         print("🔨 Building LangGraph workflow...")
 
         # Create graph
-        workflow = StateGraph(AgentState)
-
-        # Add nodes
-        workflow.add_node("classify_query", self.classify_query_node)
-        workflow.add_node("router", self.router_node)
-        workflow.add_node("retrieve", self.retrieve_node)
-        workflow.add_node("tool_executor", self.tool_executor_node)
-        workflow.add_node("generate_response", self.generate_response_node)
+        workflow = StateGraph(state_schema)
+
+        # Add nodes; the input schema is explicit so LangGraph doesn't infer
+        # AgentState from the nodes' type hints when building another schema
+        for name, node in (
+            ("classify_query", self.classify_query_node),
+            ("router", self.router_node),
+            ("retrieve", self.retrieve_node),
+            ("tool_executor", self.tool_executor_node),
+            ("generate_response", self.generate_response_node),
+        ):
+            workflow.add_node(name, self._timed(name, node), input=state_schema)
 
         # Set entry point
         workflow.set_entry_point("classify_query")
@@ -101,90 +147,237 @@ class PolicyAssistantGraph:
 
         # Add edges
         workflow.add_edge("retrieve", "generate_response")
-        workflow.add_edge("tool_executor", "generate_response")
+        workflow.add_conditional_edges(
+            "tool_executor",
+            self.tool_loop_decision,
+            {
+                "continue": "tool_executor",
+                "done": "generate_response"
+            }
+        )
         workflow.add_edge("generate_response", END)
 
-        compiled = workflow.compile()
+        compiled = workflow.compile(checkpointer=checkpointer)
         print("✓ Graph compiled successfully")
 
         return compiled
 
-    def classify_query_node(self, state: AgentState) -> AgentState:
+    def _timed(self, name: str, node):
+        """
+        Wrap a node so its execution time is recorded in node_timings
+        """
+        def timed_node(state: AgentState) -> dict:
+            start = time.perf_counter()
+            try:
+                return node(state)
+            finally:
+                self.node_timings.record(name, time.perf_counter() - start)
+
+        return timed_node
+
+    def classify_query_node(self, state: AgentState) -> dict:
         """
         Classify query to detect medical, vacation, or other policy categories.
         This helps boost retrieval for semantic reasoning.
         """
         print("\n🏷️  [CLASSIFY QUERY NODE] Analyzing query type...")
 
-        query = state["query"].lower()
-
-        # Define keyword categories for semantic detection
-        medical_keywords = [
-            'sick', 'ill', 'illness', 'medical', 'health', 'disease', 'condition',
-            'fever', 'cold', 'flu', 'infection', 'sinus', 'cough', 'injury', 'pain',
-            'surgery', 'hospital', 'doctor', 'treatment', 'medication', 'allergy',
-            'allergies', 'migraine', 'headache', 'fatigue', 'body ache', 'unwell',
-            'covid', 'diabetes', 'asthma', 'physical', 'mental', 'injury', 'wound'
-        ]
-
-        vacation_keywords = [
-            'vacation', 'holiday', 'trip', 'travel', 'leisure', 'time off',
-            'annual leave', 'break', 'getaway', 'tour'
-        ]
-
-        action_keywords = [
-            'ticket', 'report', 'complaint', 'issue', 'problem', 'request',
-            'help', 'support', 'escalate', 'balance', 'check'
-        ]
-
-        query_type = "general"
-        query_boost_keywords = ""
-
-        # Classify the query
-        if any(keyword in query for keyword in medical_keywords):
-            query_type = "medical"
-            query_boost_keywords = "sick leave medical condition health illness"
-            print(f"   ✓ Detected: MEDICAL/HEALTH CONDITION")
-        elif any(keyword in query for keyword in vacation_keywords):
-            query_type = "vacation"
-            query_boost_keywords = "annual leave vacation time off holiday"
-            print(f"   ✓ Detected: VACATION/ANNUAL LEAVE")
-        elif any(keyword in query for keyword in action_keywords):
-            query_type = "action"
-            print(f"   ✓ Detected: ACTION REQUEST")
-        else:
-            print(f"   ✓ Detected: GENERAL QUERY")
+        query_type, query_boost_keywords = classify_query(state["query"])
+        print(f"   ✓ Detected: {QUERY_TYPE_LABELS[query_type]}")
 
         return {
-            **state,
             "query_type": query_type,
             "query_boost_keywords": query_boost_keywords
         }
 
-    def router_node(self, state: AgentState) -> AgentState:
+    def router_node(self, state: AgentState) -> dict:
         """
         Route the query to appropriate handler
         """
         print("\n🔀 [ROUTER NODE] Analyzing query...")
 
         query = state["query"]
-        prompt = ROUTER_PROMPT.format(query=query)
 
-        decision = self.llm.invoke(prompt, temperature=0.1).strip().lower()
+        # Start retrieval now so it overlaps with the router LLM call
+        speculation = self._start_speculation(state) if config.SPECULATIVE_RETRIEVAL else None
 
-        # Validate decision
-        if "retrieve" in decision:
-            decision = "retrieve"
-        elif "tool" in decision:
+        try:
+            routed = self._route(query)
+        except Exception:
+            # Don't leave the retrieval running unaccounted for
+            if speculation is not None:
+                self._resolve_speculation(speculation, None)
+            raise
+
+        if speculation is not None:
+            routed.update(self._resolve_speculation(speculation, routed["next_action"]))
+
+        return routed
+
+    def _route(self, query: str) -> dict:
+        """
+        Routing decision (and tool calls in function calling mode) for a query
+        """
+        routed = None
+        if config.ROUTING_MODE == "function_calling":
+            routed = self._route_with_functions(query)
+            if routed is None:
+                print("   ⚠️  Function calling failed, falling back to ROUTER_PROMPT")
+
+        if routed is None:
+            prompt = ROUTER_PROMPT.format(query=query)
+
+            decision = self.llm.invoke(prompt, temperature=0.1).strip().lower()
+
+            # Validate decision
+            if "retrieve" in decision:
+                decision = "retrieve"
+            elif "tool" in decision:
+                decision = "tool"
+            else:
+                decision = "general"
+
+            print(f"   Decision: {decision.upper()}")
+            routed = {"next_action": decision}
+
+        return routed
+
+    def _start_speculation(self, state: AgentState) -> Optional[Future]:
+        """
+        Submit a speculative retrieval, or None if every speculation worker is busy
+
+        Queued speculations would finish after the router and delay it, so under
+        load retrieval runs in the retrieve node instead.
+        """
+        with self._speculation_lock:
+            if self._speculations_in_flight >= config.SPECULATION_WORKERS:
+                self.speculation_stats["skipped"] += 1
+                return None
+            self._speculations_in_flight += 1
+
+        speculation = self.speculation_pool.submit(self._timed_retrieval, state)
+        speculation.add_done_callback(self._speculation_finished)
+        return speculation
+
+    def _speculation_finished(self, speculation: Future):
+        with self._speculation_lock:
+            self._speculations_in_flight -= 1
+
+    def _timed_retrieval(self, state: AgentState) -> Tuple[dict, float]:
+        """
+        Run retrieval and measure how long it took
+
+        Returns:
+            Tuple of (retrieval state updates, elapsed seconds)
+        """
+        start = time.perf_counter()
+        result = self._retrieve_context(state)
+        return result, time.perf_counter() - start
+
+    def _resolve_speculation(self, speculation: Future, decision: str) -> dict:
+        """
+        Use the speculative retrieval if the router chose "retrieve", discard it otherwise
+
+        Args:
+            speculation: Future returned by _timed_retrieval
+            decision: Router decision, or None if routing failed
+
+        Returns:
+            State updates to merge into the router output
+        """
+        if decision != "retrieve":
+            if speculation.cancel():
+                self._record_speculation(hit=False, elapsed=0.0)
+            else:
+                # Account for the wasted work once the retrieval finishes
+                speculation.add_done_callback(self._record_wasted_speculation)
+            print("   Speculative retrieval discarded")
+            return {}
+
+        try:
+            result, elapsed = speculation.result()
+        except Exception as e:
+            print(f"   ⚠️  Speculative retrieval failed: {e}")
+            return {}
+
+        self._record_speculation(hit=True, elapsed=elapsed)
+        print(f"   ⚡ Speculative retrieval used ({elapsed * 1000:.0f} ms overlapped)")
+        return {**result, "retrieval_complete": True}
+
+    def _record_wasted_speculation(self, speculation: Future):
+        """
+        Done callback for discarded speculative retrievals
+        """
+        elapsed = 0.0
+        if not speculation.cancelled() and speculation.exception() is None:
+            elapsed = speculation.result()[1]
+        self._record_speculation(hit=False, elapsed=elapsed)
+
+    def _record_speculation(self, hit: bool, elapsed: float):
+        """
+        Update speculation metrics
+        """
+        with self._speculation_lock:
+            if hit:
+                self.speculation_stats["hits"] += 1
+                self.speculation_stats["overlapped_seconds"] += elapsed
+            else:
+                self.speculation_stats["misses"] += 1
+                self.speculation_stats["wasted_seconds"] += elapsed
+
+    def get_speculation_stats(self) -> dict:
+        """
+        Speculative retrieval metrics
+
+        Returns:
+            Dictionary with hits, misses, skipped, hit rate, and overlapped/wasted retrieval time
+        """
+        with self._speculation_lock:
+            stats = dict(self.speculation_stats)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+    def _route_with_functions(self, query: str) -> Optional[dict]:
+        """
+        Route and select tools in one Groq call using native function calling
+
+        Args:
+            query: User query
+
+        Returns:
+            State updates (next_action, planned_tool_calls), or None on failure
+        """
+        calls = self.llm.invoke_with_tools(
+            ROUTER_FUNCTION_PROMPT.format(query=query),
+            ROUTING_FUNCTIONS,
+            temperature=0.1
+        )
+        if not calls:
+            return None
+
+        planned_tool_calls = []
+        for name, arguments in calls:
+            if name in TOOL_MAP:
+                call = {"tool": name, "params": self._map_tool_params(name, arguments, query)}
+                if call not in planned_tool_calls:
+                    planned_tool_calls.append(call)
+
+        names = [name for name, _ in calls]
+        if planned_tool_calls:
             decision = "tool"
+        elif "search_policies" in names:
+            decision = "retrieve"
         else:
             decision = "general"
 
-        print(f"   Decision: {decision.upper()}")
+        print(f"   Decision: {decision.upper()} (function calling)")
+        for call in planned_tool_calls:
+            print(f"   Selected tool: {call['tool']}")
 
         return {
-            **state,
-            "next_action": decision
+            "next_action": decision,
+            "planned_tool_calls": planned_tool_calls[:config.MAX_PARALLEL_TOOLS]
         }
 
     def route_decision(self, state: AgentState) -> Literal["retrieve", "tool", "general"]:
@@ -193,28 +386,67 @@ class PolicyAssistantGraph:
         """
         return state["next_action"]
 
-    def retrieve_node(self, state: AgentState) -> AgentState:
+    def retrieve_node(self, state: AgentState) -> dict:
         """
         Retrieve relevant documents from vector store with enhanced semantic search.
         Uses query classification to boost retrieval for policy-related queries.
         """
+        if state.get("retrieval_complete"):
+            print("\n📚 [RETRIEVE NODE] Using speculative retrieval result")
+            return {}
+
         print("\n📚 [RETRIEVE NODE] Searching documents with semantic reasoning...")
 
-        query = state["query"]
+        return self._retrieve_context(state)
+
+    def _retrieve_context(self, state: AgentState) -> dict:
+        """
+        Search the vector store and format the context for the response prompt
+
+        Returns:
+            State updates with context and retrieved_sections
+        """
         query_type = state.get("query_type", "general")
         query_boost_keywords = state.get("query_boost_keywords", "")
-
-        # Build enhanced query
         if query_boost_keywords:
-            enhanced_query = f"{query} {query_boost_keywords}"
             print(f"   Query enhancement: {query_type.upper()}")
-        else:
-            enhanced_query = query
+
+        results = self._search_with_scores(state["query"], query_boost_keywords)
+        if results:
+            print(f"   Scores: {', '.join(f'{score:.3f}' for _, score in results)}")
+        return self._format_context([doc for doc, _ in results])
+
+    def search_policy_documents(self, query: str, query_boost_keywords: str = None) -> List[Document]:
+        """
+        Chunks the retrieve node uses for a query
+
+        Args:
+            query: User query
+            query_boost_keywords: Category keywords (from classify_query if None)
+
+        Returns:
+            List of relevant documents
+        """
+        return [doc for doc, _ in self._search_with_scores(query, query_boost_keywords)]
+
+    def _search_with_scores(self, query: str, query_boost_keywords: str = None) -> List[Tuple[Document, float]]:
+        if query_boost_keywords is None:
+            _, query_boost_keywords = classify_query(query)
+
+        # Build enhanced query
+        enhanced_query = f"{query} {query_boost_keywords}" if query_boost_keywords else query
 
         # Retrieve documents with enhanced query
-        # Use k=5 for better coverage with semantic reasoning
-        docs = self.vector_store.retrieve(enhanced_query, k=5)
+        # Up to k=5 for better coverage with semantic reasoning; adaptive top-k sends fewer on clear matches
+        return self.vector_store.retrieve_with_scores(enhanced_query, k=5)
 
+    def _format_context(self, docs: List[Document]) -> dict:
+        """
+        Context for FINAL_RAG_PROMPT from retrieved chunks
+
+        Returns:
+            State updates with context and retrieved_sections
+        """
         # Combine context with metadata
         context_parts = []
         section_titles = []
@@ -241,128 +473,272 @@ class PolicyAssistantGraph:
             context = "\n\n---\n\n".join(context_parts) if context_parts else "No direct match found, checking policies semantically..."
 
         return {
-            **state,
             "context": context,
             "retrieved_sections": list(set(section_titles))
         }
 
-    def tool_executor_node(self, state: AgentState) -> AgentState:
+    def tool_loop_decision(self, state: AgentState) -> Literal["continue", "done"]:
+        """
+        Conditional edge function for the tool loop
         """
-        Execute appropriate tool
+        return "done" if state.get("tools_done", True) else "continue"
+
+    def tool_executor_node(self, state: AgentState) -> dict:
+        """
+        Plan and execute one step of tool calls.
+        Independent calls in the step run concurrently; the graph loops back
+        here until the planner reports the work is done or MAX_ITERATIONS is hit.
+
+        Returns:
+            This step's tool calls and results (appended by the state reducers)
         """
-        print("\n🔧 [TOOL EXECUTOR NODE] Selecting and executing tool...")
+        iteration = state.get("iteration", 0) + 1
+        print(f"\n🔧 [TOOL EXECUTOR NODE] Step {iteration}: selecting and executing tools...")
 
         query = state["query"]
-        prompt = TOOL_SELECTION_PROMPT.format(query=query)
+        previous_results = state.get("tool_results", [])
+
+        # Tools already selected by the router need no further LLM call
+        router_calls = state.get("planned_tool_calls") or []
+
+        # Try the deterministic fast path before paying for an LLM call
+        fast_calls = None
+        if config.TOOL_FAST_PATH and not previous_results and not router_calls:
+            fast_calls = self.fast_path.extract(query)
+
+        if router_calls and not previous_results:
+            planned_calls, done = list(router_calls), True
+            print(f"   Using {len(router_calls)} call(s) selected by the router")
+        elif fast_calls:
+            planned_calls, done = fast_calls, True
+            print(f"   ⚡ Fast path: resolved {len(fast_calls)} call(s) without LLM "
+                  f"({self.fast_path.get_stats()['fast_path_ratio']:.0%} of requests so far)")
+        else:
+            prompt = TOOL_SELECTION_PROMPT.format(
+                query=query,
+                previous_results="\n\n".join(previous_results) if previous_results else "None"
+            )
+
+            # Get tool plan from LLM
+            response = self.llm.invoke(prompt, temperature=0.1)
+            planned_calls, done = self._parse_tool_plan(response, query)
+
+        # Skip calls that already ran in an earlier step
+        executed = state.get("tool_calls", [])
+        planned_calls = [call for call in planned_calls if call not in executed]
+
+        results = self._execute_tool_calls(planned_calls) if planned_calls else []
+
+        if not planned_calls:
+            done = True
+        if not done and iteration >= config.MAX_ITERATIONS:
+            print(f"   ⚠️  Reached MAX_ITERATIONS ({config.MAX_ITERATIONS}), stopping tool loop")
+            done = True
+
+        if previous_results or results:
+            context = "\n\n".join([*previous_results, *results])
+        else:
+            context = "Could not determine appropriate tool"
+
+        return {
+            "tool_calls": planned_calls,
+            "tool_results": results,
+            "context": context,
+            "iteration": iteration,
+            "tools_done": done
+        }
 
-        # Get tool selection from LLM
-        response = self.llm.invoke(prompt, temperature=0.1)
+    def _parse_tool_plan(self, response: str, query: str) -> Tuple[List[dict], bool]:
+        """
+        Parse the planner response into a list of tool calls
 
+        Args:
+            response: Raw LLM response to TOOL_SELECTION_PROMPT
+            query: Original user query (fallback for missing parameters)
+
+        Returns:
+            Tuple of (tool calls as {"tool", "params"} dicts, done flag)
+        """
         try:
-            # Parse JSON response
-            tool_info = json.loads(response)
-            tool_name = tool_info.get("tool")
-            parameters = tool_info.get("parameters", {})
-
-            print(f"   Tool: {tool_name}")
-            print(f"   Parameters: {parameters}")
-
-            # Execute tool
-            if tool_name in TOOL_MAP:
-                tool_func = TOOL_MAP[tool_name]
-
-                # Map parameters to match tool signatures
-                mapped_params = parameters.copy()
-
-                # Fix parameter names for create_hr_ticket
-                if tool_name == "create_hr_ticket":
-                    # Handle various parameter names that LLM might generate
-                    issue_text = (
-                        mapped_params.get("issue") or
-                        mapped_params.get("subject") or
-                        mapped_params.get("description") or
-                        mapped_params.get("query") or
-                        query  # fallback to original query
-                    )
-                    mapped_params = {"issue": issue_text}
-
-                # Fix parameter names for check_leave_balance
-                elif tool_name == "check_leave_balance":
-                    employee_id = (
-                        mapped_params.get("employee_id") or
-                        mapped_params.get("user_id") or
-                        "current_user"
-                    )
-                    mapped_params = {"employee_id": employee_id}
-
-                # Fix parameter names for check_ticket_status
-                elif tool_name == "check_ticket_status":
-                    ticket_id = mapped_params.get("ticket_id") or mapped_params.get("id")
-                    if ticket_id:
-                        mapped_params = {"ticket_id": ticket_id}
-                    else:
-                        mapped_params = {}
-
-                # Invoke tool with mapped parameters
-                result = tool_func.invoke(input=mapped_params)
-
-                tool_calls = state.get("tool_calls", [])
-                tool_results = state.get("tool_results", [])
-
-                tool_calls.append({"tool": tool_name, "params": mapped_params})
-                tool_results.append(result)
-
-                print(f"   ✓ Tool executed successfully")
-
-                return {
-                    **state,
-                    "tool_calls": tool_calls,
-                    "tool_results": tool_results,
-                    "context": result
-                }
+            plan = json.loads(response)
+
+            # Accept the single-tool format as well as the tool_calls list
+            if isinstance(plan, list):
+                raw_calls, done = plan, True
+            elif "tool_calls" in plan:
+                raw_calls, done = plan.get("tool_calls") or [], bool(plan.get("done", True))
             else:
-                print(f"   ⚠️  Unknown tool: {tool_name}")
-                return {
-                    **state,
-                    "context": "Tool not found"
-                }
+                raw_calls, done = [plan], True
 
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, AttributeError):
             print(f"   ⚠️  Could not parse tool selection")
             # Fallback: try to match tool names in response
-            if "create_hr_ticket" in response.lower():
-                result = TOOL_MAP["create_hr_ticket"].invoke(input={"issue": query})
-                return {
-                    **state,
-                    "tool_calls": [{"tool": "create_hr_ticket", "params": {"issue": query}}],
-                    "tool_results": [result],
-                    "context": result
-                }
-            elif "check_leave_balance" in response.lower():
-                result = TOOL_MAP["check_leave_balance"].invoke(input={"employee_id": "current_user"})
-                return {
-                    **state,
-                    "tool_calls": [{"tool": "check_leave_balance", "params": {"employee_id": "current_user"}}],
-                    "tool_results": [result],
-                    "context": result
-                }
-            elif "check_ticket_status" in response.lower():
-                result = TOOL_MAP["check_ticket_status"].invoke(input={})
-                return {
-                    **state,
-                    "tool_calls": [{"tool": "check_ticket_status", "params": {}}],
-                    "tool_results": [result],
-                    "context": result
-                }
-            else:
-                return {
-                    **state,
-                    "context": "Could not determine appropriate tool"
-                }
+            response_lower = response.lower()
+            raw_calls = [
+                {"tool": name, "parameters": {}}
+                for name in TOOL_MAP if name in response_lower
+            ]
+            done = True
+
+        calls = []
+        for raw_call in raw_calls:
+            if not isinstance(raw_call, dict):
+                continue
+
+            tool_name = raw_call.get("tool")
+            if tool_name not in TOOL_MAP:
+                print(f"   ⚠️  Unknown tool: {tool_name}")
+                continue
 
-    def generate_response_node(self, state: AgentState) -> AgentState:
+            params = self._map_tool_params(tool_name, raw_call.get("parameters") or {}, query)
+            call = {"tool": tool_name, "params": params}
+            if call not in calls:
+                calls.append(call)
+
+        if len(calls) > config.MAX_PARALLEL_TOOLS:
+            print(f"   ⚠️  Deferring {len(calls) - config.MAX_PARALLEL_TOOLS} call(s) to the next step")
+            calls = calls[:config.MAX_PARALLEL_TOOLS]
+            done = False
+
+        return calls, done
+
+    def _map_tool_params(self, tool_name: str, parameters: dict, query: str) -> dict:
+        """
+        Map LLM-generated parameter names to the tool signatures
+
+        Args:
+            tool_name: Name of the selected tool
+            parameters: Parameters as generated by the LLM
+            query: Original user query
+
+        Returns:
+            Parameters matching the tool signature
+        """
+        if not isinstance(parameters, dict):
+            parameters = {}
+
+        # Fix parameter names for create_hr_ticket
+        if tool_name == "create_hr_ticket":
+            # Handle various parameter names that LLM might generate
+            issue_text = (
+                parameters.get("issue") or
+                parameters.get("subject") or
+                parameters.get("description") or
+                parameters.get("query") or
+                query  # fallback to original query
+            )
+            return {"issue": issue_text}
+
+        # Fix parameter names for check_leave_balance
+        if tool_name == "check_leave_balance":
+            employee_id = (
+                parameters.get("employee_id") or
+                parameters.get("user_id") or
+                "current_user"
+            )
+            return {"employee_id": employee_id}
+
+        # Fix parameter names for check_ticket_status
+        if tool_name == "check_ticket_status":
+            ticket_id = parameters.get("ticket_id") or parameters.get("id")
+            return {"ticket_id": ticket_id} if ticket_id else {}
+
+        return dict(parameters)
+
+    def _execute_tool_calls(self, tool_calls: List[dict]) -> List[str]:
+        """
+        Execute independent tool calls concurrently with a per-tool timeout
+
+        The pool is shared by all requests, so each call's timeout starts when
+        a thread picks it up, not when it is queued; a call that can't start
+        within TOOL_QUEUE_TIMEOUT_SECONDS is given up. Threads can't be
+        interrupted: a timed-out tool keeps running until it returns and is
+        counted in tool_stats["overrunning"] meanwhile.
+
+        Args:
+            tool_calls: List of {"tool", "params"} dicts
+
+        Returns:
+            Tool results, in the same order as tool_calls
+        """
+        for call in tool_calls:
+            print(f"   Tool: {call['tool']}  Parameters: {call['params']}")
+
+        submitted = [self._submit_tool(call) for call in tool_calls]
+        queue_deadline = time.monotonic() + config.TOOL_QUEUE_TIMEOUT_SECONDS
+
+        results = []
+        for call, (future, run) in zip(tool_calls, submitted):
+            try:
+                if not run["started"].wait(timeout=max(0.0, queue_deadline - time.monotonic())):
+                    if future.cancel():
+                        with self._tool_lock:
+                            self.tool_stats["queue_timeouts"] += 1
+                        print(f"   ⚠️  {call['tool']} could not start: all tool threads busy")
+                        results.append(f"⚠️ {call['tool']} could not start, too many tool calls in progress")
+                        continue
+                    # Picked up just now
+                    run["started"].wait()
+
+                remaining = run["started_at"] + config.TOOL_TIMEOUT_SECONDS - time.monotonic()
+                result = future.result(timeout=max(0.0, remaining))
+                print(f"   ✓ {call['tool']} executed successfully")
+            except FuturesTimeout:
+                self._track_overrun(future)
+                print(f"   ⚠️  {call['tool']} timed out ({self.tool_stats['overrunning']} tool(s) still running)")
+                result = f"⚠️ {call['tool']} timed out after {config.TOOL_TIMEOUT_SECONDS}s"
+            except Exception as e:
+                print(f"   ⚠️  {call['tool']} failed: {e}")
+                result = f"⚠️ {call['tool']} failed: {str(e)}"
+            results.append(result)
+
+        return results
+
+    def _submit_tool(self, call: dict) -> Tuple[Future, dict]:
+        """
+        Queue a tool call on the shared pool
+
+        Returns:
+            (future, run) where run["started"] is set once a thread picks the call up
+        """
+        run = {"started": threading.Event(), "started_at": None}
+
+        def invoke():
+            run["started_at"] = time.monotonic()
+            run["started"].set()
+            return TOOL_MAP[call["tool"]].invoke(input=call["params"])
+
+        with self._tool_lock:
+            self.tool_stats["calls"] += 1
+        return self.tool_pool.submit(invoke), run
+
+    def _track_overrun(self, future: Future):
+        """
+        Count a timed-out tool as overrunning until it returns
+        """
+        with self._tool_lock:
+            self.tool_stats["timeouts"] += 1
+            self.tool_stats["overrunning"] += 1
+        future.add_done_callback(self._overrun_finished)
+
+    def _overrun_finished(self, future: Future):
+        with self._tool_lock:
+            self.tool_stats["overrunning"] -= 1
+
+    def get_tool_stats(self) -> dict:
+        """
+        Tool call counts: calls, timeouts, calls that never started, and
+        timed-out tools still holding a thread
+        """
+        with self._tool_lock:
+            return dict(self.tool_stats)
+
+    def generate_response_node(self, state: AgentState) -> dict:
         """
         Generate final response with semantic reasoning
+
+        Returns:
+            The response and this turn's two messages (appended to the history by the reducer)
         """
         print("\n💬 [GENERATE RESPONSE NODE] Creating response...")
 
@@ -375,92 +751,390 @@ class PolicyAssistantGraph:
         # Generate appropriate response based on action
         if next_action == "retrieve":
             # For policy questions, use semantic reasoning
-            # Pass context even if limited, let LLM do semantic analysis
-            if context and context != "No relevant information found in policy documents.":
-                prompt = FINAL_RAG_PROMPT.format(
-                    query=query,
-                    context=context,
-                    sections=", ".join(retrieved_sections) if retrieved_sections else "various"
-                )
-            else:
-                # Even with limited context, try semantic reasoning
-                prompt = FINAL_RAG_PROMPT.format(
-                    query=query,
-                    context=context if context else "No specific policy matches found",
-                    sections="policy documents"
-                )
+            prompt = self._rag_prompt(query, context, retrieved_sections)
             response = self.llm.invoke(prompt, temperature=0.2)  # Slightly higher temp for reasoning
         elif next_action == "tool" and tool_results:
             # Tool results are already formatted, use them directly
-            response = tool_results[0] if tool_results else "Tool execution completed."
+            response = "\n\n".join(tool_results)
         else:
             # General response
             response = self.llm.invoke(query, temperature=0.1)
 
         print(f"   ✓ Response generated")
 
-        # Update messages
-        messages = list(state.get("messages", []))
-        messages.append(HumanMessage(content=query))
-        messages.append(AIMessage(content=response))
-
         return {
-            **state,
             "response": response,
-            "messages": messages
+            "messages": [HumanMessage(content=query), AIMessage(content=response)]
         }
 
-    def invoke(self, query: str, messages: list = None) -> dict:
+    def _rag_prompt(self, query: str, context: str, retrieved_sections: list) -> str:
         """
-        Run the agent graph
+        FINAL_RAG_PROMPT for a policy question
+        """
+        # Pass context even if limited, let LLM do semantic analysis
+        if context and context != "No relevant information found in policy documents.":
+            return FINAL_RAG_PROMPT.format(
+                query=query,
+                context=context,
+                sections=", ".join(retrieved_sections) if retrieved_sections else "various"
+            )
+
+        # Even with limited context, try semantic reasoning
+        return FINAL_RAG_PROMPT.format(
+            query=query,
+            context=context if context else "No specific policy matches found",
+            sections="policy documents"
+        )
+
+    def answer_policy_question(self, query: str, docs: List[Document] = None) -> Tuple[str, List[Document], list]:
+        """
+        Answer a policy question through retrieval and FINAL_RAG_PROMPT, without routing
 
         Args:
-            query: User query
-            messages: Conversation history
+            query: Policy question
+            docs: Already retrieved chunks (searched if None)
 
         Returns:
-            Final state with response
+            (response, chunks the answer was generated from, retrieved section titles)
         """
-        query_str = str(query) if not isinstance(query, str) else query
-        print(f"\n{'='*60}")
-        print(f"🤖 AGENT INVOKED: {query_str[:50]}...")
-        print(f"{'='*60}")
+        if docs is None:
+            docs = self.search_policy_documents(query)
+        retrieval = self._format_context(docs)
+        prompt = self._rag_prompt(query, retrieval["context"], retrieval["retrieved_sections"])
+        return self.llm.invoke(prompt, temperature=0.2), docs, retrieval["retrieved_sections"]
 
-        # Initialize state
-        initial_state = {
+    def _initial_state(self, query: str, messages: list = None) -> dict:
+        """
+        Build the initial graph state for a query
+        """
+        return {
             "query": query,
             "messages": messages or [],
             "query_type": "general",
             "query_boost_keywords": "",
             "context": "",
             "retrieved_sections": [],
+            "retrieval_complete": False,
             "next_action": "",
+            "planned_tool_calls": [],
             "tool_calls": [],
             "tool_results": [],
+            "tools_done": False,
             "response": "",
             "iteration": 0
         }
 
-        # Run graph
+    def _error_state(self, initial_state: dict, error: Exception) -> dict:
+        """
+        Final state returned when the graph run fails
+        """
+        query = initial_state["query"]
+
+        if isinstance(error, LLMUnavailableError):
+            print(f"\n❌ LLM unavailable: {error}")
+            response = "The assistant is busy right now. Please try again in a moment."
+            message = response
+        else:
+            print(f"\n❌ Agent Error: {error}")
+            response = f"I apologize, but I encountered an error: {str(error)}"
+            message = f"Error: {str(error)}"
+
+        return {
+            **initial_state,
+            "response": response,
+            "messages": initial_state["messages"] + [
+                HumanMessage(content=query),
+                AIMessage(content=message)
+            ]
+        }
+
+    def _faq_answer(self, initial_state: dict) -> Optional[dict]:
+        """
+        Final state served from a stored FAQ answer, or None to run the graph.
+        Only the first turn of a conversation is looked up: stored answers
+        ignore history, and a follow-up like "what about sick leave?" depends on it.
+        """
+        if not self.faq or initial_state["messages"]:
+            return None
+
+        start = time.perf_counter()
+        try:
+            match = self.faq.lookup(initial_state["query"])
+        except Exception as e:
+            print(f"⚠️  FAQ lookup failed: {e}")
+            match = None
+        finally:
+            self.node_timings.record("faq_lookup", time.perf_counter() - start)
+        if match is None:
+            return None
+
+        print(f"⚡ FAQ answer: \"{match['question']}\" (similarity {match['similarity']})")
+        return {
+            **initial_state,
+            "retrieved_sections": match["sections"],
+            "retrieval_complete": True,
+            "next_action": "faq",
+            "response": match["answer"],
+            "messages": initial_state["messages"] + [
+                HumanMessage(content=initial_state["query"]),
+                AIMessage(content=match["answer"])
+            ]
+        }
+
+    def get_session(self, session_id: str) -> dict:
+        """
+        Load a stored conversation
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Dictionary with "messages" and "tool_calls"
+        """
+        return self.session_store.load(session_id)
+
+    def clear_session(self, session_id: str):
+        """
+        Delete a stored conversation and its run checkpoints
+        """
+        self.session_store.delete(session_id)
+        if self.checkpointer:
+            self.checkpointer.delete_threads(f"{session_id}/")
+
+    def _run_config(self, query: str, messages: list, session_id: str = None, thread_id: str = None) -> Optional[dict]:
+        """
+        Checkpoint config for a durable run, or None to run without checkpoints
+
+        The thread defaults to a hash of the query and the content of the
+        history, so a retry of the same turn finds the same run and any other
+        turn starts a new one. History trimmed to the session caps still changes
+        every turn, so a repeated question never matches an earlier run.
+        """
+        if not self.durable_graph or not (session_id or thread_id):
+            return None
+        if thread_id is None:
+            turn = hashlib.sha1()
+            for message in messages or []:
+                role = "h" if isinstance(message, HumanMessage) else "a"
+                turn.update(f"{role}{len(message.content)}:{message.content}".encode("utf-8"))
+            turn.update(f"q:{query}".encode("utf-8"))
+            thread_id = turn.hexdigest()[:16]
+        return {"configurable": {"thread_id": f"{session_id or '-'}/{thread_id}"}}
+
+    def _resumable(self, run_config: Optional[dict]) -> bool:
+        """
+        Whether a failed durable run left a checkpoint a retry can resume from
+        """
+        if run_config is None:
+            return False
         try:
-            final_state = self.graph.invoke(initial_state)
+            snapshot = self.durable_graph.get_state(run_config)
+        except Exception:
+            return False
+        return bool(snapshot.values and snapshot.next)
+
+    def _resume_input(self, run_config: dict, initial_state: dict) -> Tuple[Optional[dict], Optional[dict]]:
+        """
+        Input for a durable run and the stored result of a finished one
+
+        Returns:
+            (graph input: initial_state, or None to resume from the last checkpoint;
+             final state of a run that already completed, else None)
+        """
+        snapshot = self.durable_graph.get_state(run_config)
+        if not snapshot.values:
+            return initial_state, None
+        if not snapshot.next:
+            print(f"↩️  Run {run_config['configurable']['thread_id']} already completed, returning its result")
+            return None, snapshot.values
+        print(f"↩️  Resuming run {run_config['configurable']['thread_id']} at: {', '.join(snapshot.next)}")
+        return None, None
+
+    def _run_graph(self, initial_state: dict, run_config: Optional[dict]) -> dict:
+        """
+        Final state of a graph run, checkpointed when run_config is set
+        """
+        if run_config is None:
+            return self.graph.invoke(initial_state)
+
+        graph_input, completed = self._resume_input(run_config, initial_state)
+        if completed is not None:
+            return completed
+        return self.durable_graph.invoke(graph_input, run_config)
+
+    def get_run(self, session_id: str, thread_id: str) -> Optional[dict]:
+        """
+        Checkpoints of a durable run, newest first, for inspection
+
+        Returns:
+            {"thread_id", "next", "values", "checkpoints": [...]}, or None if unknown
+        """
+        if not self.durable_graph:
+            return None
+        run_config = {"configurable": {"thread_id": f"{session_id}/{thread_id}"}}
+        history = list(self.durable_graph.get_state_history(run_config))
+        if not history:
+            return None
+        return {
+            "thread_id": thread_id,
+            "next": list(history[0].next),
+            "values": history[0].values,
+            "checkpoints": [
+                {
+                    "checkpoint_id": snapshot.config["configurable"]["checkpoint_id"],
+                    "step": snapshot.metadata.get("step"),
+                    "nodes": list((snapshot.metadata.get("writes") or {}).keys()),
+                    "next": list(snapshot.next),
+                    "created_at": snapshot.created_at
+                }
+                for snapshot in history
+            ]
+        }
+
+    def list_runs(self, session_id: str) -> List[dict]:
+        """
+        Durable runs of a session, newest first
+        """
+        if not self.checkpointer:
+            return []
+        prefix = f"{session_id}/"
+        return [
+            {**run, "thread_id": run["thread_id"][len(prefix):]}
+            for run in self.checkpointer.threads(prefix)
+        ]
+
+    def _save_session(self, session_id: str, session: dict, history: list, final_state: dict):
+        """
+        Persist the conversation after a run
+
+        The write only succeeds if the session is unchanged since it was
+        loaded. If another turn of the same session was saved meanwhile (a
+        second tab, another worker), this turn is appended to the stored
+        conversation instead of overwriting it.
+
+        Args:
+            session_id: Session identifier
+            session: Session as loaded before the run
+            history: Messages the run started from
+            final_state: Final state of the run
+        """
+        messages = final_state.get("messages", [])
+        turn = messages[len(history):]
+        tool_calls = final_state.get("tool_calls", [])
+
+        for _ in range(config.SESSION_SAVE_ATTEMPTS):
+            if self.session_store.save(session_id, messages, session["tool_calls"] + tool_calls,
+                                       expected_version=session["version"]):
+                return
+            session = self.get_session(session_id)
+            messages = session["messages"] + turn
+        print(f"⚠️  Session {session_id} kept changing, this turn was not stored")
+
+    def invoke(self, query: str, messages: list = None, session_id: str = None, thread_id: str = None) -> dict:
+        """
+        Run the agent graph
+
+        Args:
+            query: User query
+            messages: Conversation history (loaded from the session store if omitted)
+            session_id: Session to read history from and write it back to
+            thread_id: Run to create or resume (defaults to one per session turn)
+
+        Returns:
+            Final state with response
+        """
+        query_str = str(query) if not isinstance(query, str) else query
+        print(f"\n{'='*60}")
+        print(f"🤖 AGENT INVOKED: {query_str[:50]}...")
+        print(f"{'='*60}")
+
+        session = self.get_session(session_id) if session_id else None
+        if session is not None and messages is None:
+            messages = session["messages"]
+
+        # Initialize state
+        initial_state = self._initial_state(query, messages)
+
+        # Frequently asked questions are answered from the precomputed store
+        final_state = self._faq_answer(initial_state)
+        run_config = None
+        persist = True
+
+        # Run graph; a checkpointed run resumes after its last completed node
+        try:
+            if final_state is None:
+                run_config = self._run_config(initial_state["query"], initial_state["messages"], session_id, thread_id)
+                final_state = self._run_graph(initial_state, run_config)
 
             print(f"\n{'='*60}")
             print(f"✓ AGENT COMPLETED")
             print(f"{'='*60}\n")
 
-            return final_state
-
         except Exception as e:
-            print(f"\n❌ Agent Error: {e}")
-            return {
-                **initial_state,
-                "response": f"I apologize, but I encountered an error: {str(e)}",
-                "messages": initial_state["messages"] + [
-                    HumanMessage(content=query),
-                    AIMessage(content=f"Error: {str(e)}")
-                ]
-            }
+            final_state = self._error_state(initial_state, e)
+            # Storing the error reply would change the history, and with it the retry's run
+            persist = not self._resumable(run_config)
+
+        if session is not None and persist:
+            self._save_session(session_id, session, initial_state["messages"], final_state)
+
+        return final_state
+
+    def stream(self, query: str, messages: list = None, session_id: str = None,
+               thread_id: str = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Run the agent graph, yielding after each node completes
+
+        Args:
+            query: User query
+            messages: Conversation history (loaded from the session store if omitted)
+            session_id: Session to read history from and write it back to
+            thread_id: Run to create or resume (defaults to one per session turn)
+
+        Yields:
+            (node name, state after that node); the last item is ("final", final state).
+            A stored FAQ answer is a single "faq" step.
+        """
+        print(f"\n🤖 AGENT STREAMING: {query[:50]}...")
+
+        session = self.get_session(session_id) if session_id else None
+        if session is not None and messages is None:
+            messages = session["messages"]
+
+        state = self._initial_state(query, messages)
+        history = state["messages"]
+        faq_state = self._faq_answer(state)
+        persist = True
+        if faq_state is not None:
+            state = faq_state
+            yield "faq", state
+        else:
+            run_config = None
+            try:
+                graph, graph_input, completed = self.graph, state, None
+                run_config = self._run_config(state["query"], state["messages"], session_id, thread_id)
+                if run_config is not None:
+                    graph = self.durable_graph
+                    graph_input, completed = self._resume_input(run_config, state)
+                    if graph_input is None and completed is None:
+                        # Continue from the checkpointed state rather than the initial one
+                        state = graph.get_state(run_config).values
+
+                if completed is not None:
+                    state = completed
+                else:
+                    for update in graph.stream(graph_input, run_config, stream_mode="updates"):
+                        for node, node_update in update.items():
+                            state = apply_update(state, node_update)
+                            yield node, state
+            except Exception as e:
+                state = self._error_state(self._initial_state(query, messages), e)
+                persist = not self._resumable(run_config)
+
+        if session is not None and persist:
+            self._save_session(session_id, session, history, state)
+
+        yield "final", state
 
 
 def create_agent(vector_store_manager: VectorStoreManager) -> PolicyAssistantGraph:
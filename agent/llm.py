@@ -0,0 +1,441 @@
+"""
+Groq LLM client with rate limiting, retries, circuit breaking and request hedging
+"""
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+from groq import Groq
+
+from agent.prompts import SYSTEM_PROMPT
+from agent.resilience import (
+    AdaptiveRateLimiter, CircuitBreaker, HedgeBudget, LatencyTracker,
+    LLMDeadlineExceeded, LLMUnavailableError, backoff_delay
+)
+import config
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _error_details(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Extract the HTTP status code and Retry-After hint from a Groq SDK error
+
+    Returns:
+        Tuple of (status code or None, retry-after seconds or None)
+    """
+    status = getattr(error, "status_code", None)
+    retry_after = None
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            retry_after = float(value)
+        except ValueError:
+            retry_after = None
+
+    return status, retry_after
+
+
+def _is_retryable(error: Exception, status: Optional[int]) -> bool:
+    """
+    Transient errors worth retrying: throttling, server errors, timeouts and connection drops
+    """
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return "timeout" in type(error).__name__.lower() or "connection" in type(error).__name__.lower()
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Rough token estimate (~4 characters per token) plus the expected completion size
+    """
+    return sum(len(text) for text in texts) // 4 + config.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+class _Attempt:
+    """
+    One in-flight completion request (primary or hedge)
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.monotonic()
+        # Set on the first byte, or when the attempt fails before sending one
+        self.first_byte = threading.Event()
+        self.first_byte_latency = None
+        self.cancelled = threading.Event()
+        self.future = None
+        self.stream = None
+        self._lock = threading.Lock()
+
+    def mark_first_byte(self):
+        if not self.first_byte.is_set():
+            self.first_byte_latency = time.monotonic() - self.started
+            self.first_byte.set()
+
+    def fail(self):
+        self.first_byte.set()
+
+    def attach_stream(self, stream) -> bool:
+        """
+        Keep the open stream so cancel() can close it
+
+        Returns:
+            False if the attempt was cancelled while the request was being sent
+            (the stream is closed right away)
+        """
+        with self._lock:
+            self.stream = stream
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            stream.close()
+        return not cancelled
+
+    def cancel(self):
+        """
+        Stop the attempt. Closing the stream also unblocks a read that is
+        still waiting for the first byte, which releases the connection.
+        """
+        with self._lock:
+            self.cancelled.set()
+            stream = self.stream
+        self.future.cancel()
+        if stream is not None:
+            stream.close()
+
+
+class GroqLLM:
+    """
+    Custom wrapper for Groq LLM compatible with LangChain
+    """
+
+    def __init__(self, api_key: str, model: str = config.GROQ_MODEL,
+                 limiter: AdaptiveRateLimiter = None, breaker: CircuitBreaker = None):
+        # Retries are handled here so they share the rate limiter and breaker
+        self.client = Groq(api_key=api_key, base_url=config.GROQ_BASE_URL, max_retries=0)
+        self.hedge_client = (
+            Groq(api_key=api_key, base_url=config.LLM_HEDGE_BASE_URL, max_retries=0)
+            if config.LLM_HEDGE_BASE_URL else self.client
+        )
+        self.model = model
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        # Function calls aren't streamed, so their latency is the whole completion
+        self.tool_latency = LatencyTracker()
+        self.hedge_budget = HedgeBudget()
+        self.request_pool = ThreadPoolExecutor(
+            max_workers=config.LLM_MAX_CONCURRENT_CALLS,
+            thread_name_prefix="llm"
+        )
+        self.retries = 0
+        self.rate_limited_responses = 0
+        self.failed_calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self._metrics_lock = threading.Lock()
+
+    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
+        """
+        Invoke the Groq LLM
+
+        Args:
+            prompt: Input prompt
+            temperature: Sampling temperature
+
+        Returns:
+            LLM response
+
+        Raises:
+            LLMUnavailableError: If the call fails after retries or the circuit is open
+        """
+        chat_completion = self._create(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            model=self.model,
+            temperature=temperature,
+            max_tokens=1024
+        )
+        return chat_completion.choices[0].message.content
+
+    def invoke_with_tools(self, prompt: str, tools: List[dict],
+                          temperature: float = config.TEMPERATURE) -> List[Tuple[str, dict]]:
+        """
+        Invoke the Groq LLM with native function definitions
+
+        Args:
+            prompt: Input prompt
+            tools: Function definitions in OpenAI/Groq format
+            temperature: Sampling temperature
+
+        Returns:
+            List of (function name, arguments) pairs, empty if the reply is unusable
+
+        Raises:
+            LLMUnavailableError: If the call fails after retries or the circuit is open
+        """
+        chat_completion = self._create(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            model=self.model,
+            temperature=temperature,
+            max_tokens=1024,
+            tools=tools,
+            tool_choice="required"
+        )
+
+        try:
+            tool_calls = chat_completion.choices[0].message.tool_calls or []
+            return [
+                (call.function.name, json.loads(call.function.arguments or "{}"))
+                for call in tool_calls
+            ]
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"⚠️  Could not parse function call arguments: {e}")
+            return []
+
+    def _create(self, **kwargs):
+        """
+        Create a chat completion through the rate limiter, retry loop and circuit breaker
+
+        Raises:
+            LLMUnavailableError: If the call cannot be completed
+        """
+        if not self.breaker.allow_request():
+            raise LLMUnavailableError("LLM circuit breaker is open")
+
+        estimated = estimate_tokens(*(message["content"] for message in kwargs["messages"]))
+        deadline = time.monotonic() + config.LLM_CALL_DEADLINE_SECONDS
+
+        for attempt in range(config.LLM_MAX_RETRIES + 1):
+            try:
+                self.limiter.acquire(
+                    estimated,
+                    timeout=min(config.LLM_MAX_QUEUE_SECONDS, max(0.0, deadline - time.monotonic()))
+                )
+            except LLMUnavailableError:
+                self.breaker.release()
+                raise
+
+            try:
+                if config.LLM_HEDGING:
+                    chat_completion = self._hedged_create(kwargs, estimated, deadline)
+                else:
+                    chat_completion = self.client.chat.completions.create(
+                        **kwargs, timeout=max(0.0, deadline - time.monotonic())
+                    )
+
+            except LLMDeadlineExceeded:
+                with self._metrics_lock:
+                    self.failed_calls += 1
+                    self.deadline_exceeded += 1
+                self.breaker.record_failure()
+                print(f"❌ Groq API Error: deadline of {config.LLM_CALL_DEADLINE_SECONDS}s exceeded")
+                raise
+
+            except Exception as e:
+                status, retry_after = _error_details(e)
+                if status == 429:
+                    self.limiter.on_throttled()
+                    with self._metrics_lock:
+                        self.rate_limited_responses += 1
+
+                delay = backoff_delay(attempt, retry_after)
+                retryable = _is_retryable(e, status)
+                out_of_time = time.monotonic() + delay >= deadline
+                if not retryable or attempt == config.LLM_MAX_RETRIES or out_of_time:
+                    with self._metrics_lock:
+                        self.failed_calls += 1
+                    if retryable:
+                        self.breaker.record_failure()
+                    else:
+                        # The provider answered; the request itself was bad
+                        self.breaker.record_success()
+                    print(f"❌ Groq API Error: {e}")
+                    raise LLMUnavailableError(str(e)) from e
+
+                with self._metrics_lock:
+                    self.retries += 1
+                print(f"⚠️  Groq API Error ({status or type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            usage = getattr(chat_completion, "usage", None)
+            self.limiter.reconcile(estimated, getattr(usage, "total_tokens", None))
+            self.limiter.on_success()
+            self.breaker.record_success()
+            return chat_completion
+
+    def _hedged_create(self, kwargs: dict, estimated: int, deadline: float):
+        """
+        Send the request, and a duplicate if the first byte is slower than the hedge delay.
+        The first successful response wins; the other request is cancelled.
+
+        Args:
+            kwargs: Chat completion arguments
+            estimated: Estimated tokens (charged to the rate limiter for the hedge)
+            deadline: Monotonic time by which a response is required
+
+        Returns:
+            Chat completion (or equivalent assembled from the stream)
+
+        Raises:
+            LLMDeadlineExceeded: If no response arrives before the deadline
+        """
+        self.hedge_budget.on_request()
+        latency = self.tool_latency if "tools" in kwargs else self.latency
+        hedge_delay = latency.hedge_delay()
+
+        primary = self._start_attempt("primary", self.client, kwargs, deadline)
+        attempts = [primary]
+
+        # Returns early if the primary fails, so the error is retried without the hedge delay
+        primary.first_byte.wait(timeout=max(0.0, min(hedge_delay, deadline - time.monotonic())))
+        if (not primary.first_byte.is_set() and not primary.future.done()
+                and time.monotonic() < deadline and self.hedge_budget.try_spend()):
+            if self.limiter.try_acquire(estimated):
+                print(f"⏱️  No first byte after {hedge_delay:.2f}s, hedging to {config.LLM_HEDGE_MODEL}")
+                hedge_kwargs = dict(kwargs, model=config.LLM_HEDGE_MODEL)
+                attempts.append(self._start_attempt("hedge", self.hedge_client, hedge_kwargs, deadline))
+                with self._metrics_lock:
+                    self.hedges += 1
+            else:
+                # No quota for the hedge right now; keep the credit for a later one
+                self.hedge_budget.refund()
+
+        pending = {attempt.future: attempt for attempt in attempts}
+        errors = []
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = pending.pop(future)
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+
+                for loser in pending.values():
+                    loser.cancel()
+                self._record_primary_latency(latency, primary)
+                if attempt is not primary:
+                    with self._metrics_lock:
+                        self.hedge_wins += 1
+                return future.result()
+
+        for attempt in pending.values():
+            attempt.cancel()
+        self._record_primary_latency(latency, primary)
+        if errors and not pending:
+            raise errors[0]
+        raise LLMDeadlineExceeded(f"No response within {config.LLM_CALL_DEADLINE_SECONDS}s")
+
+    @staticmethod
+    def _record_primary_latency(latency: LatencyTracker, primary: _Attempt):
+        """
+        Record the primary's time to first byte, whether or not it won.
+
+        The hedge delay is a percentile of the primary's latency. Recording
+        only winners would drop exactly the slow requests that were hedged,
+        and the delay would keep shrinking. A primary that lost before its
+        first byte is recorded at the time it had waited, a lower bound.
+        """
+        if primary.first_byte_latency is not None:
+            latency.record(primary.first_byte_latency)
+        elif not primary.first_byte.is_set():
+            latency.record(time.monotonic() - primary.started)
+
+    def _start_attempt(self, label: str, client: Groq, kwargs: dict, deadline: float) -> _Attempt:
+        """
+        Submit one completion request to the request pool
+        """
+        attempt = _Attempt(label)
+        attempt.future = self.request_pool.submit(self._run_attempt, client, kwargs, attempt, deadline)
+        return attempt
+
+    def _run_attempt(self, client: Groq, kwargs: dict, attempt: _Attempt, deadline: float):
+        """
+        Execute one completion request, streaming plain completions so the
+        first byte can be detected and a cancelled loser can stop reading
+        """
+        try:
+            return self._complete(client, kwargs, attempt, deadline)
+        except BaseException:
+            attempt.fail()
+            raise
+
+    def _complete(self, client: Groq, kwargs: dict, attempt: _Attempt, deadline: float):
+        """
+        The completion request of one attempt
+        """
+        timeout = max(0.001, deadline - time.monotonic())
+
+        # Tool call arguments are only usable once complete, so don't stream them
+        if "tools" in kwargs:
+            chat_completion = client.chat.completions.create(**kwargs, timeout=timeout)
+            attempt.mark_first_byte()
+            return chat_completion
+
+        stream = client.chat.completions.create(**kwargs, stream=True, timeout=timeout)
+        if not attempt.attach_stream(stream):
+            return None
+        parts = []
+        usage = None
+        try:
+            for chunk in stream:
+                attempt.mark_first_byte()
+                if attempt.cancelled.is_set():
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                x_groq = getattr(chunk, "x_groq", None)
+                if getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+        except Exception:
+            # cancel() closed the stream under the read
+            if attempt.cancelled.is_set():
+                return None
+            raise
+        finally:
+            stream.close()
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(parts), tool_calls=None))],
+            usage=usage
+        )
+
+    def get_metrics(self) -> dict:
+        """
+        Throttling, retry and circuit breaker metrics
+
+        Returns:
+            Dictionary of counters from the client, rate limiter and circuit breaker
+        """
+        with self._metrics_lock:
+            metrics = {
+                "retries": self.retries,
+                "rate_limited_responses": self.rate_limited_responses,
+                "failed_calls": self.failed_calls,
+                "deadline_exceeded": self.deadline_exceeded,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_delay_seconds": round(self.latency.hedge_delay(), 3),
+                "tool_hedge_delay_seconds": round(self.tool_latency.hedge_delay(), 3)
+            }
+        metrics.update(self.limiter.get_stats())
+        metrics.update(self.breaker.get_stats())
+        return metrics
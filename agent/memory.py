@@ -0,0 +1,428 @@
+"""
+Memory accounting for a worker process.
+
+Reports resident bytes per component (embedding model, FAISS index,
+docstore, parent texts, compiled graph, cached answers, sessions) next to the
+process RSS, records how they grow over time, and projects the footprint
+for a target corpus and session count from the measured per-chunk and
+per-session costs.
+
+Python objects are sized by walking their references (sys.getsizeof per
+object, each object counted once); functions, classes and modules are not
+followed, so shared code is not charged to a component.
+
+Usage:
+    python -m agent.memory
+    python -m agent.memory --project-chunks 200000 --project-sessions 5000 --objects
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import types
+from collections import Counter, deque
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+# Leaves that hold no references worth following
+ATOMIC_TYPES = (str, bytes, bytearray, int, float, bool, complex, type(None))
+# Shared code and runtime objects; never charged to a component
+SKIPPED_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    types.CodeType, types.FrameType, types.GeneratorType, threading.Thread
+)
+
+# Components whose size grows with the number of indexed chunks
+CHUNK_COMPONENTS = ("faiss_index", "docstore", "parent_store")
+
+
+class ObjectSizer:
+    """
+    Deep object sizes sharing one visited set, so nothing is counted twice
+    """
+
+    def __init__(self, exclude: Iterable = ()):
+        """
+        Args:
+            exclude: Objects (and everything only reachable through them) left out
+        """
+        self._seen = {id(obj) for obj in exclude}
+
+    def exclude(self, *objects):
+        self._seen.update(id(obj) for obj in objects)
+
+    def size(self, root) -> Dict[str, int]:
+        """
+        Bytes and object count reachable from root and not yet counted
+        """
+        total = count = 0
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in self._seen or isinstance(obj, SKIPPED_TYPES):
+                continue
+            self._seen.add(id(obj))
+            total += sys.getsizeof(obj, 0)
+            count += 1
+
+            if isinstance(obj, ATOMIC_TYPES):
+                continue
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+                stack.extend(obj)
+
+            attributes = getattr(obj, "__dict__", None)
+            if isinstance(attributes, dict):
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if name not in ("__dict__", "__weakref__"):
+                        stack.append(getattr(obj, name, None))
+
+        return {"bytes": total, "objects": count}
+
+
+def process_rss(pid="self") -> Optional[int]:
+    """
+    Resident set size of a process in bytes (this one by default)
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if pid != "self":
+            return None
+        # Peak RSS (KiB on Linux) where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _embedding_model(embeddings) -> Optional[dict]:
+    if embeddings is None:
+        return None
+    model = getattr(embeddings, "client", None) or getattr(embeddings, "_client", None)
+    if model is None or not hasattr(model, "parameters"):
+        return None
+    # Tensor storage is native memory that getsizeof cannot see
+    parameters = list(model.parameters())
+    tensors = parameters + list(model.buffers())
+    return {
+        "bytes": sum(tensor.numel() * tensor.element_size() for tensor in tensors),
+        "parameters": sum(parameter.numel() for parameter in parameters),
+        "device": str(parameters[0].device) if parameters else None
+    }
+
+
+def _faiss_index(vector_store, sizer: ObjectSizer) -> dict:
+    index = vector_store.index
+    # Flat indexes store one float32 code per dimension; others report their code size
+    code_size = getattr(index, "code_size", index.d * 4)
+    vectors = index.ntotal * code_size
+    mapping = sizer.size(vector_store.index_to_docstore_id)
+    return {
+        "bytes": vectors + mapping["bytes"],
+        "vectors_bytes": vectors,
+        "id_map_bytes": mapping["bytes"],
+        "vectors": index.ntotal,
+        "dimensions": index.d,
+        "objects": mapping["objects"]
+    }
+
+
+def _docstore(vector_store, sizer: ObjectSizer) -> dict:
+    documents = list(getattr(vector_store.docstore, "_dict", {}).values())
+    text = metadata = objects = 0
+    for doc in documents:
+        sized = sizer.size(doc.page_content)
+        text, objects = text + sized["bytes"], objects + sized["objects"]
+        sized = sizer.size(doc.metadata)
+        metadata, objects = metadata + sized["bytes"], objects + sized["objects"]
+    # Document objects, ids and the docstore's own dict
+    rest = sizer.size(vector_store.docstore)
+    return {
+        "bytes": text + metadata + rest["bytes"],
+        "text_bytes": text,
+        "metadata_bytes": metadata,
+        "chunks": len(documents),
+        "objects": objects + rest["objects"]
+    }
+
+
+def _shards(sharded_store) -> dict:
+    # Shard indexes live in worker processes; their RSS is what they cost
+    shards = [
+        {"shard": shard.shard_id, "pid": shard.process.pid, "chunks": shard.size, "rss_bytes": process_rss(shard.process.pid)}
+        for shard in sharded_store.shards
+    ]
+    return {"bytes": sum(shard["rss_bytes"] or 0 for shard in shards), "shards": shards}
+
+
+def _answer_caches(agent, sizer: ObjectSizer) -> dict:
+    caches = {}
+    if agent.faq is not None:
+        caches["faq_answers"] = sizer.size(agent.faq.entries)
+        if agent.faq._index is not None:
+            caches["faq_index"] = sizer.size(agent.faq._index.docstore)
+            caches["faq_index"]["bytes"] += agent.faq._index.index.ntotal * agent.faq._index.index.d * 4
+
+    from rag.tokens import get_sizer
+    # Only report the token count cache if the tokenizer is already loaded
+    if get_sizer.cache_info().currsize:
+        token_cache = getattr(get_sizer(), "_cache", None)
+        if token_cache is not None:
+            caches["token_counts"] = sizer.size(token_cache)
+
+    return {
+        "bytes": sum(cache["bytes"] for cache in caches.values()),
+        "objects": sum(cache["objects"] for cache in caches.values()),
+        "caches": caches
+    }
+
+
+def _sessions(session_store, sizer: ObjectSizer) -> dict:
+    stats = session_store.get_stats()
+    stats["stored_bytes"] = stats["bytes"]
+    if stats.get("resident"):
+        stats.update(sizer.size(getattr(session_store, "_data", {})))
+    else:
+        stats.update({"bytes": 0, "objects": 0})
+    stats["per_session_bytes"] = stats["bytes"] / stats["sessions"] if stats["sessions"] else 0
+    return stats
+
+
+def measure_components(agent) -> Dict[str, dict]:
+    """
+    Resident size of each component of a PolicyAssistantGraph and its index.
+    Each entry has "bytes" plus component-specific detail.
+    """
+    manager = agent.vector_store
+    vector_store, sharded_store, parent_store = manager.vector_store, manager.sharded_store, manager.parent_store
+    sizer = ObjectSizer(exclude=(agent, manager, agent.llm, agent.session_store, manager.embeddings))
+
+    components = {}
+    model = _embedding_model(manager.embeddings)
+    if model:
+        components["embedding_model"] = model
+    if vector_store is not None:
+        sizer.exclude(vector_store.index, getattr(vector_store, "embedding_function", None))
+        components["faiss_index"] = _faiss_index(vector_store, sizer)
+        components["docstore"] = _docstore(vector_store, sizer)
+    if sharded_store is not None:
+        components["shard_workers"] = _shards(sharded_store)
+    if parent_store is not None:
+        components["parent_store"] = {**sizer.size(parent_store.texts), **parent_store.get_stats()}
+    components["compiled_graph"] = sizer.size(agent.graph)
+    components["answer_caches"] = _answer_caches(agent, sizer)
+    components["sessions"] = _sessions(agent.session_store, sizer)
+    return components
+
+
+def object_counts(top: int = config.MEMORY_TOP_TYPES) -> dict:
+    """
+    Live objects tracked by the garbage collector, by type (strings and numbers are untracked)
+    """
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return {"tracked_objects": sum(counts.values()), "top_types": dict(counts.most_common(top))}
+
+
+def project(report: dict, chunks: int = None, sessions: int = None) -> dict:
+    """
+    Projected RSS for a corpus and session count, from measured per-unit costs
+
+    Args:
+        report: Output of MemoryMonitor.report()
+        chunks: Target number of indexed chunks (default: current)
+        sessions: Target number of live sessions (default: current)
+    """
+    components = report["components"]
+    current_chunks = report["chunks"]
+    current_sessions = components.get("sessions", {}).get("sessions", 0)
+    chunks = current_chunks if chunks is None else chunks
+    sessions = current_sessions if sessions is None else sessions
+
+    chunk_bytes = sum(components[name]["bytes"] for name in CHUNK_COMPONENTS if name in components)
+    per_chunk = chunk_bytes / current_chunks if current_chunks else 0
+    session_bytes = components.get("sessions", {}).get("bytes", 0)
+    per_session = components.get("sessions", {}).get("per_session_bytes", 0)
+    fixed = report["rss_bytes"] - chunk_bytes - session_bytes
+
+    projection = {
+        "chunks": chunks,
+        "sessions": sessions,
+        "fixed_bytes": fixed,
+        "per_chunk_bytes": round(per_chunk, 1),
+        "per_session_bytes": round(per_session, 1),
+        "chunk_bytes": round(per_chunk * chunks),
+        "session_bytes": round(per_session * sessions),
+        "rss_bytes": round(fixed + per_chunk * chunks + per_session * sessions)
+    }
+    if "shard_workers" in components and current_chunks:
+        # Each worker also pays a fixed interpreter cost; scale only the indexed part
+        per_shard_chunk = components["shard_workers"]["bytes"] / current_chunks
+        projection["shard_workers_bytes"] = round(per_shard_chunk * chunks)
+        projection["note"] = "shard_workers_bytes scales worker RSS linearly and overstates small corpora"
+    return projection
+
+
+class MemoryMonitor:
+    """
+    Memory reports for one agent plus a rolling history for growth over time
+    """
+
+    def __init__(self, agent, interval: float = config.MEMORY_SAMPLE_INTERVAL_SECONDS,
+                 history_size: int = config.MEMORY_HISTORY_SIZE):
+        self.agent = agent
+        self.interval = interval
+        self.history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def report(self, objects: bool = False) -> dict:
+        """
+        Current RSS, per-component sizes and growth since the first recorded sample
+
+        Args:
+            objects: Also count live objects by type (walks the whole heap)
+        """
+        with self._lock:
+            components = measure_components(self.agent)
+            report = {
+                "at": time.time(),
+                "pid": os.getpid(),
+                "rss_bytes": process_rss(),
+                "chunks": self.agent.vector_store.count(),
+                "components": components,
+            }
+            report["accounted_bytes"] = sum(
+                component["bytes"] for name, component in components.items() if name != "shard_workers"
+            )
+            self._record(report)
+            report["growth"] = self.growth()
+        if objects:
+            report["objects"] = object_counts()
+        return report
+
+    def _record(self, report: dict):
+        self.history.append({
+            "at": report["at"],
+            "rss_bytes": report["rss_bytes"],
+            "chunks": report["chunks"],
+            "sessions": report["components"]["sessions"]["sessions"],
+            "components": {name: component["bytes"] for name, component in report["components"].items()}
+        })
+
+    def growth(self) -> Optional[dict]:
+        """
+        Change between the oldest and newest samples, in total and per hour
+        """
+        if len(self.history) < 2:
+            return None
+        first, last = self.history[0], self.history[-1]
+        hours = (last["at"] - first["at"]) / 3600 or 1e-9
+        deltas = {"rss_bytes": last["rss_bytes"] - first["rss_bytes"]}
+        for name, size in last["components"].items():
+            deltas[name] = size - first["components"].get(name, 0)
+        return {
+            "samples": len(self.history),
+            "hours": round(hours, 3),
+            "chunks": last["chunks"] - first["chunks"],
+            "sessions": last["sessions"] - first["sessions"],
+            "bytes": deltas,
+            "bytes_per_hour": {name: round(delta / hours) for name, delta in deltas.items()}
+        }
+
+    def start(self) -> "MemoryMonitor":
+        """
+        Record a sample every interval seconds in the background (no-op if interval is 0)
+        """
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.report()
+            except Exception as e:
+                print(f"⚠️  Memory sample failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _mb(size: float) -> str:
+    return f"{size / 1024 / 1024:10.1f} MB"
+
+
+def print_report(report: dict, projection: dict = None):
+    print(f"\n{'='*60}")
+    print(f"🧮 MEMORY (pid {report['pid']}, {report['chunks']} chunks)")
+    print(f"{'='*60}")
+    print(f"{'process RSS':<24}{_mb(report['rss_bytes'])}")
+    for name, component in report["components"].items():
+        detail = ""
+        if "objects" in component:
+            detail = f"  {component['objects']:,} objects"
+        if name == "sessions":
+            detail += f"  {component['sessions']} sessions ({component['backend']})"
+        print(f"{name:<24}{_mb(component['bytes'])}{detail}")
+    print(f"{'unaccounted':<24}{_mb(report['rss_bytes'] - report['accounted_bytes'])}")
+
+    if report.get("growth"):
+        growth = report["growth"]
+        print(f"\nGrowth over {growth['hours']} h ({growth['samples']} samples):")
+        for name, delta in growth["bytes"].items():
+            print(f"   {name:<21}{delta / 1024 / 1024:+10.1f} MB  ({growth['bytes_per_hour'][name] / 1024 / 1024:+.1f} MB/h)")
+
+    if report.get("objects"):
+        print(f"\nTracked objects: {report['objects']['tracked_objects']:,}")
+        for name, count in report["objects"]["top_types"].items():
+            print(f"   {name:<30}{count:>12,}")
+
+    if projection:
+        print(f"\nProjection for {projection['chunks']:,} chunks and {projection['sessions']:,} sessions:")
+        print(f"   {'fixed':<21}{_mb(projection['fixed_bytes'])}")
+        print(f"   {'chunks':<21}{_mb(projection['chunk_bytes'])}  ({projection['per_chunk_bytes']:,.0f} B/chunk)")
+        print(f"   {'sessions':<21}{_mb(projection['session_bytes'])}  ({projection['per_session_bytes']:,.0f} B/session)")
+        print(f"   {'total RSS':<21}{_mb(projection['rss_bytes'])}")
+        if "shard_workers_bytes" in projection:
+            print(f"   {'shard workers':<21}{_mb(projection['shard_workers_bytes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report memory used by each component of the assistant")
+    parser.add_argument("--project-chunks", type=int, help="Project RSS for this many indexed chunks")
+    parser.add_argument("--project-sessions", type=int, help="Project RSS for this many live sessions")
+    parser.add_argument("--objects", action="store_true", help="Count live objects by type")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    from agent.graph import create_agent
+    from rag.vector_store import initialize_vector_store
+
+    agent = create_agent(initialize_vector_store())
+    report = MemoryMonitor(agent).report(objects=args.objects)
+    projection = None
+    if args.project_chunks is not None or args.project_sessions is not None:
+        projection = project(report, args.project_chunks, args.project_sessions)
+
+    if args.json:
+        print(json.dumps({**report, "projection": projection}, indent=2))
+    else:
+        print_report(report, projection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Lightweight latency metrics for the agent graph
+"""
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values (0.0 if empty)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    """
+    Count, mean and tail percentiles of a list of durations in seconds
+    """
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99)
+    }
+
+
+class NodeTimings:
+    """
+    Thread-safe rolling window of execution times per graph node
+    """
+
+    def __init__(self, window: int = 10000):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, node: str, seconds: float):
+        with self._lock:
+            self._samples[node].append(seconds)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Latency summary per node
+
+        Returns:
+            Dictionary mapping node name to count/mean/p50/p90/p99 (seconds)
+        """
+        with self._lock:
+            snapshot = {node: list(samples) for node, samples in self._samples.items()}
+        return {node: summarize(samples) for node, samples in snapshot.items()}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,243 @@
+"""
+On-demand sampling profiler for single agent requests.
+
+A profiled request gets a sampler thread that reads the request thread's
+Python stack every PROFILE_INTERVAL_SECONDS via sys._current_frames(). The
+request itself runs unmodified (no tracing hooks), so overhead is limited to
+the sampler's brief GIL holds and only profiled requests pay it. Samples are
+wall-clock: time spent waiting on the Groq API, the tool pool or locks shows
+up under a synthetic "[blocked]" frame beneath the waiting call.
+
+Work the request hands to other threads (hedged LLM calls, parallel tools,
+speculative retrieval) appears as the request thread's wait for it.
+
+Output is a speedscope file (https://www.speedscope.app) or collapsed stacks
+for flamegraph.pl, named after the request ID, in PROFILE_DIR.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+
+# Modules whose frames mean the thread is waiting rather than computing
+BLOCKING_MODULES = (
+    os.path.join("concurrent", "futures"), "threading.py", "queue.py", "selectors.py",
+    "socket.py", "ssl.py", "subprocess.py"
+)
+BLOCKED_FRAME = ("[blocked]", "", 0)
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+_active = threading.BoundedSemaphore(config.PROFILE_MAX_CONCURRENT)
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno
+
+
+def _is_blocking(filename: str) -> bool:
+    return any(module in filename for module in BLOCKING_MODULES)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler for one thread
+    """
+
+    def __init__(self, thread_id: int, root_frame=None, interval: float = config.PROFILE_INTERVAL_SECONDS,
+                 max_seconds: float = config.PROFILE_MAX_SECONDS):
+        """
+        Args:
+            thread_id: Thread to sample
+            root_frame: Frames above this one (server and pool plumbing) are left out
+            interval: Seconds between samples
+            max_seconds: Sampling stops after this long even if the request has not finished
+        """
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: List[Tuple[Frame, ...]] = []
+        self.weights: List[float] = []
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stack(self) -> Optional[Tuple[Frame, ...]]:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+        stack = []
+        leaf = frame
+        while frame is not None:
+            stack.append(_frame_key(frame))
+            if frame is self.root_frame:
+                break
+            frame = frame.f_back
+        stack.reverse()
+        if _is_blocking(leaf.f_code.co_filename):
+            stack.append(BLOCKED_FRAME)
+        return tuple(stack)
+
+    def _run(self):
+        last = self.started_at
+        deadline = self.started_at + self.max_seconds
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            stack = self._stack()
+            if stack is not None:
+                self.samples.append(stack)
+                self.weights.append(now - last)
+            last = now
+            if now >= deadline:
+                print(f"⚠️  Profile stopped after {self.max_seconds}s")
+                break
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def to_collapsed(self) -> str:
+        """
+        "root;caller;leaf milliseconds" lines, as read by flamegraph.pl and speedscope
+        """
+        totals: Dict[str, float] = {}
+        for stack, weight in zip(self.samples, self.weights):
+            key = ";".join(
+                name if not filename else f"{name} ({os.path.basename(filename)}:{line})"
+                for name, filename, line in stack
+            )
+            totals[key] = totals.get(key, 0.0) + weight
+        return "".join(f"{key} {max(1, round(seconds * 1000))}\n" for key, seconds in totals.items())
+
+    def to_speedscope(self, name: str) -> dict:
+        """
+        Sampled profile in the speedscope file format, weighted in seconds
+        """
+        frames: List[dict] = []
+        index: Dict[Frame, int] = {}
+        samples = []
+        for stack in self.samples:
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    function, filename, line = frame
+                    frames.append({"name": function, "file": filename, "line": line} if filename else {"name": function})
+                sample.append(index[frame])
+            samples.append(sample)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "agent.profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": samples,
+                "weights": self.weights
+            }]
+        }
+
+
+def should_profile(header: Optional[str] = None) -> bool:
+    """
+    Whether to profile a request: a matching X-Profile header or the random sampling ratio.
+    Header requests are refused unless PROFILE_TOKEN is set.
+    """
+    if header and config.PROFILE_TOKEN and header == config.PROFILE_TOKEN:
+        return True
+    return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+
+def _prune(directory: str):
+    """
+    Keep only the newest PROFILE_MAX_FILES profiles
+    """
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if not name.endswith(".tmp")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[config.PROFILE_MAX_FILES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def write_profile(profiler: SamplingProfiler, request_id: str, fmt: str = config.PROFILE_FORMAT,
+                  directory: str = config.PROFILE_DIR) -> str:
+    """
+    Write a finished profile and return its path
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Request IDs can come from clients
+    safe_id = "".join(c for c in request_id if c.isalnum() or c in "-_")[:64] or "request"
+    if fmt == "collapsed":
+        path = os.path.join(directory, f"{safe_id}.collapsed.txt")
+        data = profiler.to_collapsed()
+    else:
+        path = os.path.join(directory, f"{safe_id}.speedscope.json")
+        data = json.dumps(profiler.to_speedscope(f"request {request_id}"), separators=(",", ":"))
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _prune(directory)
+    return path
+
+
+@contextmanager
+def profile_request(request_id: str, enabled: bool = True):
+    """
+    Profile the calling thread for the duration of the block
+
+    Args:
+        request_id: Names the output file
+        enabled: Run the block unprofiled when False
+
+    Yields:
+        A dict whose "path" is set to the written profile once the block exits
+        (None when not profiled: disabled, or PROFILE_MAX_CONCURRENT profiles running)
+    """
+    result = {"path": None}
+    if not enabled or not _active.acquire(blocking=False):
+        yield result
+        return
+
+    try:
+        # sys._getframe(2) is the caller's frame; contextmanager adds one of its own
+        profiler = SamplingProfiler(threading.get_ident(), root_frame=sys._getframe(2))
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            try:
+                result["path"] = write_profile(profiler, request_id)
+                print(f"🔬 Profiled request {request_id}: {len(profiler.samples)} samples over "
+                      f"{profiler.duration:.2f}s → {result['path']}")
+            except OSError as e:
+                print(f"⚠️  Could not write profile for {request_id}: {e}")
+    finally:
+        _active.release()
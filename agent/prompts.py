@@ -53,6 +53,16 @@ Important: Medical conditions, health issues, illnesses → ALWAYS choose "retri
 
 Choose ONE action: retrieve, tool, or general"""
 
+ROUTER_FUNCTION_PROMPT = """Decide how to handle the employee's request by calling functions.
+
+Query: {query}
+
+- Call search_policies for questions about company policies, procedures, leave, benefits,
+  medical conditions or health issues (these relate to sick leave policy).
+- Call the HR tools (create_hr_ticket, check_leave_balance, check_ticket_status) for action requests.
+  Call several tools at once if the request needs more than one action.
+- Call general_chat only for greetings or chitchat not related to work."""
+
 RAG_PROMPT = """You are an HR policy assistant. Answer the employee's question using ONLY the provided policy context.
 
 Context from policy documents:
@@ -74,10 +84,13 @@ RESPONSE INSTRUCTIONS:
 
 Answer:"""
 
-TOOL_SELECTION_PROMPT = """Select the appropriate tool for this request.
+TOOL_SELECTION_PROMPT = """Select the tool(s) needed to complete this request.
 
 Query: {query}
 
+Results from previous steps:
+{previous_results}
+
 Available tools:
 1. create_hr_ticket
    - Use for: Creating HR tickets, reporting issues, complaints
@@ -91,9 +104,14 @@ Available tools:
    - Use for: Checking the status of existing tickets
    - Parameters: {{"ticket_id": "TKT-XXXXXX"}} (optional, omit if not provided)
 
-Return the tool name and parameters in this exact JSON format:
-{{"tool": "tool_name", "parameters": {{"param_name": "value"}}}}
+A request may need several tools. Example: "check my balance and open a ticket for my laptop"
+needs check_leave_balance AND create_hr_ticket. List every independent tool call for this step.
+Do not repeat a call that already has a result above.
+
+Return the tool calls in this exact JSON format:
+{{"tool_calls": [{{"tool": "tool_name", "parameters": {{"param_name": "value"}}}}], "done": true}}
 
+Set "done" to false only if another step is needed after these calls return.
 If ticket_id is not mentioned for check_ticket_status, use empty parameters: {{"parameters": {{}}}}
 
 JSON:"""
@@ -0,0 +1,316 @@
+"""
+Client-side rate limiting, retry backoff and circuit breaking for LLM calls
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import config
+
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when an LLM call cannot be completed (quota, retries exhausted, circuit open)
+    """
+
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """
+    Raised when an LLM call runs past its hard deadline
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` tokens are available (0 if available now)
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter sized to the Groq quota.
+
+    The refill rate backs off multiplicatively when the provider returns 429
+    and recovers additively on success (AIMD), so sustained load settles just
+    under the real quota instead of oscillating into throttling.
+    """
+
+    def __init__(self,
+                 requests_per_minute: int = config.GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = config.GROQ_TOKENS_PER_MINUTE,
+                 min_rate_fraction: float = 0.1):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_fraction = min_rate_fraction
+        self.rate_fraction = 1.0
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.throttled = 0
+        self.throttle_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int, timeout: float = config.LLM_MAX_QUEUE_SECONDS) -> float:
+        """
+        Block until capacity is available for one request of `tokens` tokens
+
+        Args:
+            tokens: Estimated tokens for the request
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            LLMUnavailableError: If capacity is not available within timeout
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        counted = False
+
+        while True:
+            with self._lock:
+                wait = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(tokens))
+                if wait == 0.0:
+                    self.request_bucket.consume(1)
+                    self.token_bucket.consume(tokens)
+                    waited = time.monotonic() - start
+                    self.throttle_wait_seconds += waited
+                    return waited
+                if not counted:
+                    self.throttled += 1
+                    counted = True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMUnavailableError(f"Rate limit queue timeout after {timeout:.0f}s")
+            time.sleep(min(wait, remaining))
+
+    def try_acquire(self, tokens: int) -> bool:
+        """
+        Take capacity for one request only if it is available right now
+        """
+        with self._lock:
+            if self.request_bucket.wait_time(1) or self.token_bucket.wait_time(tokens):
+                return False
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(tokens)
+            return True
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Correct the token bucket once the real usage is known
+        """
+        if actual_tokens is None:
+            return
+        with self._lock:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.token_bucket.refund(difference)
+            else:
+                self.token_bucket.consume(-difference)
+
+    def on_throttled(self):
+        """
+        Provider returned 429: halve the refill rate
+        """
+        with self._lock:
+            self._set_rate_fraction(self.rate_fraction * 0.5)
+
+    def on_success(self):
+        """
+        Successful call: recover the refill rate gradually
+        """
+        with self._lock:
+            if self.rate_fraction < 1.0:
+                self._set_rate_fraction(self.rate_fraction + 0.05)
+
+    def _set_rate_fraction(self, fraction: float):
+        self.rate_fraction = max(self.min_rate_fraction, min(1.0, fraction))
+        self.request_bucket.refill_per_second = self.requests_per_minute / 60.0 * self.rate_fraction
+        self.token_bucket.refill_per_second = self.tokens_per_minute / 60.0 * self.rate_fraction
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "throttled_requests": self.throttled,
+                "throttle_wait_seconds": round(self.throttle_wait_seconds, 3),
+                "rate_fraction": round(self.rate_fraction, 3)
+            }
+
+
+class CircuitBreaker:
+    """
+    Stops calling the provider after repeated failures, then probes with a single trial call
+    """
+
+    def __init__(self,
+                 failure_threshold: int = config.CIRCUIT_BREAKER_FAILURES,
+                 cooldown_seconds: float = config.CIRCUIT_BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+                self._trial_in_flight = False
+
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """
+        Give back a half-open trial slot without recording an outcome
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"⚠️  Circuit breaker opened after {self.failures} failure(s)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "circuit_state": self.state,
+                "consecutive_failures": self.failures,
+                "circuit_rejections": self.rejected
+            }
+
+
+class LatencyTracker:
+    """
+    Rolling window of first-byte latencies used to pick the hedge delay
+    """
+
+    def __init__(self,
+                 percentile: float = config.LLM_HEDGE_PERCENTILE,
+                 initial_delay: float = config.LLM_HEDGE_INITIAL_DELAY_SECONDS,
+                 min_delay: float = config.LLM_HEDGE_MIN_DELAY_SECONDS,
+                 window: int = 200,
+                 min_samples: int = 20):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """
+        Seconds to wait for the first byte before hedging
+        """
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+
+class HedgeBudget:
+    """
+    Caps hedged requests to a share of traffic.
+    Every call earns `max_rate` credits (up to `burst`); a hedge spends one.
+    """
+
+    def __init__(self, max_rate: float = config.LLM_HEDGE_MAX_RATE, burst: float = 5.0):
+        self.max_rate = max_rate
+        self.burst = burst
+        self.credits = 1.0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self.credits = min(self.burst, self.credits + self.max_rate)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.credits >= 1.0:
+                self.credits -= 1.0
+                return True
+            return False
+
+    def refund(self):
+        """
+        Give back a credit for a hedge that was not sent
+        """
+        with self._lock:
+            self.credits = min(self.burst, self.credits + 1.0)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = config.LLM_BACKOFF_BASE_SECONDS,
+                  cap: float = config.LLM_BACKOFF_MAX_SECONDS) -> float:
+    """
+    Full-jitter exponential backoff that never undercuts the server's Retry-After
+
+    Args:
+        attempt: Zero-based retry attempt
+        retry_after: Retry-After hint from the provider in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
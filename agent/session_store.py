@@ -0,0 +1,334 @@
+"""
+Externalized conversation state.
+
+Sessions hold the compact, compressed conversation history and tool calls
+for one user, keyed by session ID, so any worker can serve any user. The
+default backend is a SQLite file; MemorySessionStore implements the same
+interface with Redis-style key/TTL semantics and stands in for a shared cache.
+
+Every write bumps a per-session version. Saves can be conditional on the
+version the caller loaded (compare-and-set), so two turns of one session
+finishing at the same time cannot silently overwrite each other.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+
+
+def serialize_session(messages: List, tool_calls: List) -> bytes:
+    """
+    Encode a session as compressed compact JSON
+
+    Args:
+        messages: Conversation history (LangChain messages)
+        tool_calls: Tool calls made in the session
+
+    Returns:
+        zlib-compressed bytes
+    """
+    payload = {
+        "m": [["h" if isinstance(message, HumanMessage) else "a", message.content] for message in messages],
+        "t": tool_calls
+    }
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def deserialize_session(data: bytes) -> dict:
+    """
+    Decode bytes produced by serialize_session
+
+    Returns:
+        Dictionary with "messages" and "tool_calls"
+    """
+    payload = json.loads(zlib.decompress(data).decode("utf-8"))
+    return {
+        "messages": [
+            HumanMessage(content=content) if role == "h" else AIMessage(content=content)
+            for role, content in payload["m"]
+        ],
+        "tool_calls": payload["t"]
+    }
+
+
+def empty_session() -> dict:
+    return {"messages": [], "tool_calls": [], "version": 0}
+
+
+class SessionStore(ABC):
+    """
+    Base class for session backends.
+
+    Subclasses implement the raw byte operations (_get, _set, delete, gc)
+    and call _maybe_gc from _set; size capping, serialization and the GC
+    schedule live here.
+    """
+
+    def __init__(self,
+                 ttl_seconds: int = config.SESSION_TTL_SECONDS,
+                 max_turns: int = config.SESSION_MAX_TURNS,
+                 max_bytes: int = config.SESSION_MAX_BYTES,
+                 max_tool_calls: int = config.SESSION_MAX_TOOL_CALLS,
+                 gc_interval_seconds: float = config.SESSION_GC_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_tool_calls = max_tool_calls
+        self.gc_interval_seconds = gc_interval_seconds
+        self._last_gc = 0.0
+        self._gc_lock = threading.Lock()
+
+    def load(self, session_id: str) -> dict:
+        """
+        Load a session (empty if missing or expired)
+
+        Returns:
+            Dictionary with "messages", "tool_calls" and "version" (0 if new)
+        """
+        entry = self._get(session_id)
+        if entry is None:
+            return empty_session()
+        data, version = entry
+        return {**deserialize_session(data), "version": version}
+
+    def save(self, session_id: str, messages: List, tool_calls: List,
+             expected_version: Optional[int] = None) -> bool:
+        """
+        Store a session, trimming the oldest turns to the size caps
+
+        Args:
+            session_id: Session identifier
+            messages: Conversation history
+            tool_calls: Tool calls made in the session
+            expected_version: Only store if the session is still at this
+                version (as returned by load); None stores unconditionally
+
+        Returns:
+            False if the session changed since expected_version
+        """
+        messages = list(messages)[-2 * self.max_turns:]
+        tool_calls = list(tool_calls)[-self.max_tool_calls:]
+
+        data = serialize_session(messages, tool_calls)
+        while len(data) > self.max_bytes and messages:
+            messages = messages[2:]
+            data = serialize_session(messages, tool_calls)
+
+        return self._set(session_id, data, time.time() + self.ttl_seconds, expected_version)
+
+    @abstractmethod
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        """
+        Stored bytes and version of a live session, or None
+        """
+
+    @abstractmethod
+    def _set(self, session_id: str, data: bytes, expires_at: float,
+             expected_version: Optional[int] = None) -> bool:
+        """
+        Store bytes and bump the version, atomically checking expected_version
+        (0: no live session) unless it is None
+
+        Returns:
+            Whether the session was stored
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        pass
+
+    @abstractmethod
+    def gc(self) -> int:
+        """
+        Remove expired sessions
+
+        Returns:
+            Number of sessions removed
+        """
+
+    def _maybe_gc(self):
+        """
+        Collect expired sessions at most once per gc_interval_seconds
+        """
+        now = time.monotonic()
+        with self._gc_lock:
+            if now - self._last_gc < self.gc_interval_seconds:
+                return
+            self._last_gc = now
+
+        removed = self.gc()
+        if removed:
+            print(f"🧹 Removed {removed} expired session(s)")
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """
+        Live session count and total stored (compressed) bytes
+        """
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a local SQLite file (one connection per thread)
+    """
+
+    def __init__(self, path: str = config.SESSION_DB_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+        if "version" not in columns:
+            # Session files written before versioning
+            connection.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        row = self._connection().execute(
+            "SELECT data, version FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _set(self, session_id: str, data: bytes, expires_at: float,
+             expected_version: Optional[int] = None) -> bool:
+        # Each statement is atomic, also across processes sharing the file
+        connection = self._connection()
+        upsert = (
+            "INSERT INTO sessions (session_id, data, expires_at, version) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, "
+            "expires_at = excluded.expires_at, version = sessions.version + 1"
+        )
+        if expected_version is None:
+            cursor = connection.execute(upsert, (session_id, sqlite3.Binary(data), expires_at))
+        elif expected_version == 0:
+            # A new session, or one whose expired row is still in the table
+            cursor = connection.execute(
+                upsert + " WHERE sessions.expires_at <= ?",
+                (session_id, sqlite3.Binary(data), expires_at, time.time())
+            )
+        else:
+            cursor = connection.execute(
+                "UPDATE sessions SET data = ?, expires_at = ?, version = version + 1 "
+                "WHERE session_id = ? AND version = ? AND expires_at > ?",
+                (sqlite3.Binary(data), expires_at, session_id, expected_version, time.time())
+            )
+        stored = cursor.rowcount == 1
+        connection.commit()
+        if stored:
+            self._maybe_gc()
+        return stored
+
+    def delete(self, session_id: str):
+        connection = self._connection()
+        connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        connection.commit()
+
+    def gc(self) -> int:
+        connection = self._connection()
+        removed = connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        connection.commit()
+        return removed
+
+    def get_stats(self) -> dict:
+        sessions, stored = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions WHERE expires_at > ?",
+            (time.time(),)
+        ).fetchone()
+        file_bytes = sum(
+            os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path)
+        )
+        # Sessions live on disk; only SQLite's page cache is resident
+        return {"backend": "sqlite", "sessions": sessions, "bytes": stored, "file_bytes": file_bytes, "resident": False}
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process stand-in for a Redis-like cache (GET / SETEX / DEL semantics)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            data, expires_at, version = entry
+            if expires_at <= time.time():
+                return None
+            return data, version
+
+    def _set(self, session_id: str, data: bytes, expires_at: float,
+             expected_version: Optional[int] = None) -> bool:
+        with self._lock:
+            entry = self._data.get(session_id)
+            version = entry[2] if entry else 0
+            live_version = version if entry and entry[1] > time.time() else 0
+            if expected_version is not None and expected_version != live_version:
+                return False
+            # Versions keep counting across expiry, so a stale load can't match a new session
+            self._data[session_id] = (data, expires_at, version + 1)
+        self._maybe_gc()
+        return True
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def gc(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stored = sum(len(data) for data, _, _ in self._data.values())
+            return {"backend": "memory", "sessions": len(self._data), "bytes": stored, "resident": True}
+
+
+def create_session_store(backend: str = config.SESSION_STORE) -> SessionStore:
+    """
+    Factory for the configured session backend
+
+    Args:
+        backend: "sqlite" or "memory"
+
+    Returns:
+        SessionStore instance
+    """
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session store backend: {backend}")
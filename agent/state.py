@@ -1,7 +1,12 @@
 """
 LangGraph State Definition
+
+Nodes return only the keys they change. Keys annotated with a reducer
+accumulate: a node returns just the new items (the turn's two messages, the
+tool calls and results of one step) and LangGraph appends them. Every other
+key is replaced by the returned value.
 """
-from typing import TypedDict, Annotated, Sequence
+from typing import TypedDict, Annotated, Sequence, get_type_hints
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -10,7 +15,7 @@ class AgentState(TypedDict):
     """
     State object for the agent graph
     """
-    # Conversation messages
+    # Conversation messages (nodes return only the messages they add)
     messages: Annotated[Sequence[BaseMessage], operator.add]
 
     # User query
@@ -23,13 +28,16 @@ class AgentState(TypedDict):
     # Retrieved context from documents
     context: str
     retrieved_sections: list
+    retrieval_complete: bool
 
     # Decision from router
     next_action: str
 
-    # Tool calls and results
-    tool_calls: list
-    tool_results: list
+    # Tool calls and results (each tool step returns only its own)
+    planned_tool_calls: list
+    tool_calls: Annotated[list, operator.add]
+    tool_results: Annotated[list, operator.add]
+    tools_done: bool
 
     # Final response
     response: str
@@ -37,3 +45,28 @@ class AgentState(TypedDict):
     # Iteration counter
     iteration: int
 
+
+# Reducer per accumulating key, as LangGraph reads them from the annotations
+REDUCERS = {
+    key: hint.__metadata__[0]
+    for key, hint in get_type_hints(AgentState, include_extras=True).items()
+    if hasattr(hint, "__metadata__")
+}
+
+
+def apply_update(state: dict, update: dict) -> dict:
+    """
+    New state with a node's update merged the way LangGraph merges it
+
+    Args:
+        state: State before the node (not modified)
+        update: Keys returned by the node
+
+    Returns:
+        Shallow copy of state with reducer keys combined and the rest replaced
+    """
+    merged = dict(state)
+    for key, value in (update or {}).items():
+        reducer = REDUCERS.get(key)
+        merged[key] = reducer(merged[key], value) if reducer and key in merged else value
+    return merged
@@ -2,6 +2,7 @@
 Tools for the agent
 """
 from langchain_core.tools import tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 import random
 import string
 from datetime import datetime
@@ -123,3 +124,27 @@ TOOL_MAP = {
     "check_ticket_status": check_ticket_status
 }
 
+# Native function definitions for the tools (OpenAI/Groq format)
+TOOL_FUNCTIONS = [convert_to_openai_tool(t) for t in ALL_TOOLS]
+
+# Pseudo-functions that let a single function-calling request signal
+# retrieval or general chat instead of a tool
+ROUTING_FUNCTIONS = TOOL_FUNCTIONS + [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_policies",
+            "description": "Search company policy documents to answer questions about policies, "
+                           "leave, benefits, procedures or medical/health related absence.",
+            "parameters": {"type": "object", "properties": {}, "required": []}
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "general_chat",
+            "description": "Reply directly to greetings or chitchat not related to work.",
+            "parameters": {"type": "object", "properties": {}, "required": []}
+        }
+    }
+]
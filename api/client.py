@@ -0,0 +1,94 @@
+"""
+Thin HTTP client for the agent API, used by the Streamlit UI when AGENT_API_URL is set
+"""
+import json
+import urllib.request
+from typing import List
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+def _to_history(messages: List) -> List[dict]:
+    return [
+        {"role": "user" if isinstance(message, HumanMessage) else "assistant", "content": message.content}
+        for message in messages
+    ]
+
+
+def _from_history(history: List[dict]) -> List:
+    return [
+        HumanMessage(content=message["content"]) if message["role"] == "user"
+        else AIMessage(content=message["content"])
+        for message in history
+    ]
+
+
+class AgentAPIClient:
+    """
+    Drop-in replacement for PolicyAssistantGraph.invoke backed by the HTTP API
+    """
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: dict = None, method: str = None) -> dict:
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method=method or ("POST" if data is not None else "GET")
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def invoke(self, query: str, messages: List = None, session_id: str = None, thread_id: str = None) -> dict:
+        """
+        Run the agent remotely
+
+        Args:
+            query: User query
+            messages: Conversation history (LangChain messages)
+            session_id: Use the server-side session history instead of messages
+            thread_id: Run to create or resume on the server
+
+        Returns:
+            Dictionary with response, messages, tool_calls and retrieved_sections
+        """
+        result = self._request("/chat", {
+            "query": query,
+            "history": _to_history(messages or []),
+            "session_id": session_id,
+            "thread_id": thread_id
+        })
+
+        return {
+            "response": result["response"],
+            "next_action": result["route"],
+            "tool_calls": result["tool_calls"],
+            "retrieved_sections": result["retrieved_sections"],
+            "messages": _from_history(result["history"])
+        }
+
+    def get_session(self, session_id: str) -> dict:
+        """
+        Load a stored conversation from the server
+
+        Returns:
+            Dictionary with "messages" and "tool_calls"
+        """
+        result = self._request(f"/sessions/{session_id}")
+        return {"messages": _from_history(result["history"]), "tool_calls": result["tool_calls"]}
+
+    def clear_session(self, session_id: str):
+        self._request(f"/sessions/{session_id}", method="DELETE")
+
+    def reload_index(self) -> dict:
+        """
+        Ask the server to rebuild its vector store in the background
+        """
+        return self._request("/index/reload", {})
+
+    def health(self) -> dict:
+        return self._request("/health")
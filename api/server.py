@@ -0,0 +1,368 @@
+"""
+Async HTTP API for the Enterprise Policy Assistant.
+
+Each worker process holds one VectorStoreManager and one PolicyAssistantGraph.
+Graph runs are synchronous, so they execute on a bounded thread pool while
+the event loop keeps serving; requests beyond API_MAX_CONCURRENCY wait up to
+API_QUEUE_TIMEOUT_SECONDS for a slot and then get 503.
+
+Run:
+    uvicorn api.server:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+import asyncio
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel, Field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from agent.graph import create_agent
+from agent.memory import MemoryMonitor, project
+from agent.profiler import profile_request, should_profile
+from rag.vector_store import initialize_vector_store
+from rag.watcher import start_docs_watcher
+
+
+class ChatMessage(BaseModel):
+    role: str = Field(description="'user' or 'assistant'")
+    content: str
+
+
+class ChatRequest(BaseModel):
+    query: str
+    history: List[ChatMessage] = []
+    session_id: Optional[str] = Field(default=None, description="Server-side history, used unless history is sent")
+    thread_id: Optional[str] = Field(default=None, description="Run to resume; retries of a turn reuse it by default")
+
+
+class ChatResponse(BaseModel):
+    response: str
+    route: str
+    retrieved_sections: list = []
+    tool_calls: list = []
+    history: List[ChatMessage]
+
+
+class RetrieveRequest(BaseModel):
+    query: str
+    k: int = Field(default=5, ge=1, le=50)
+    adaptive: Optional[bool] = None  # Cut below k by score distribution (server default if omitted)
+
+
+def to_messages(history: List[ChatMessage]) -> list:
+    """
+    Convert API chat history into LangChain messages
+    """
+    return [
+        HumanMessage(content=message.content) if message.role == "user" else AIMessage(content=message.content)
+        for message in history
+    ]
+
+
+def from_messages(messages: list) -> List[ChatMessage]:
+    """
+    Convert LangChain messages into API chat history
+    """
+    return [
+        ChatMessage(role="user" if isinstance(message, HumanMessage) else "assistant", content=message.content)
+        for message in messages
+    ]
+
+
+def request_messages(body: ChatRequest) -> Optional[list]:
+    """
+    History sent with the request, or None to use the stored session
+    """
+    if body.session_id and not body.history:
+        return None
+    return to_messages(body.history)
+
+
+def to_chat_response(state: dict) -> ChatResponse:
+    return ChatResponse(
+        response=state.get("response", ""),
+        route=state.get("next_action", ""),
+        retrieved_sections=state.get("retrieved_sections", []),
+        tool_calls=state.get("tool_calls", []),
+        history=from_messages(state.get("messages", []))
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the vector store and compile the graph once per worker
+    """
+    vector_store = await asyncio.to_thread(initialize_vector_store)
+    app.state.vector_store = vector_store
+    app.state.docs_watcher = start_docs_watcher(vector_store)
+    app.state.agent = create_agent(vector_store)
+    app.state.memory = MemoryMonitor(app.state.agent).start()
+    app.state.slots = asyncio.Semaphore(config.API_MAX_CONCURRENCY)
+    app.state.executor = ThreadPoolExecutor(
+        max_workers=config.API_MAX_CONCURRENCY,
+        thread_name_prefix="agent"
+    )
+    app.state.in_flight = 0
+    print(f"✓ API worker ready (pid {os.getpid()}, concurrency {config.API_MAX_CONCURRENCY})")
+
+    yield
+
+    if app.state.docs_watcher:
+        app.state.docs_watcher.stop()
+    app.state.memory.stop()
+    if app.state.agent.checkpointer:
+        app.state.agent.checkpointer.close()
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title=config.PAGE_TITLE, lifespan=lifespan)
+
+
+async def acquire_slot(request: Request):
+    """
+    Wait for a concurrency slot or fail with 503
+    """
+    try:
+        await asyncio.wait_for(request.app.state.slots.acquire(), timeout=config.API_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+    request.app.state.in_flight += 1
+
+
+def release_slot(request: Request):
+    request.app.state.in_flight -= 1
+    request.app.state.slots.release()
+
+
+async def run_blocking(request: Request, func, *args):
+    """
+    Run a blocking call on the worker's agent thread pool
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app.state.executor, func, *args)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that calls on_close however the response ends.
+    Unlike the body generator's finally, this also runs when the client
+    disconnects before the body starts.
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+def request_id(request: Request) -> str:
+    """
+    Caller-supplied X-Request-ID, or a new one
+    """
+    return request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+
+def run_profiled(rid: str, profile: bool, func, *args):
+    """
+    Call func, sampling its stack when profile is set
+
+    Returns:
+        (result, profile path or None)
+    """
+    with profile_request(rid, enabled=profile) as result:
+        value = func(*args)
+    return value, result["path"]
+
+
+@app.get("/health")
+async def health(request: Request):
+    vector_store = request.app.state.vector_store
+    return {
+        "status": "ok" if vector_store.is_ready() else "degraded",
+        "chunks": vector_store.count(),
+        "index": vector_store.reload_status,
+        "faq": request.app.state.agent.faq.get_stats() if request.app.state.agent.faq else None,
+        "tools": request.app.state.agent.get_tool_stats(),
+        "checkpoints": request.app.state.agent.checkpointer.get_stats() if request.app.state.agent.checkpointer else None,
+        "model": config.GROQ_MODEL,
+        "in_flight": request.app.state.in_flight,
+        "max_concurrency": config.API_MAX_CONCURRENCY,
+        "pid": os.getpid()
+    }
+
+
+@app.get("/memory")
+async def memory(request: Request, objects: bool = False,
+                 project_chunks: Optional[int] = None, project_sessions: Optional[int] = None):
+    """
+    Resident bytes per component, growth over time and, if asked, a projection
+    for a target corpus and session count
+    """
+    report = await asyncio.to_thread(request.app.state.memory.report, objects)
+    if project_chunks is not None or project_sessions is not None:
+        report["projection"] = project(report, project_chunks, project_sessions)
+    return report
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(body: ChatRequest, request: Request, response: Response):
+    rid = request_id(request)
+    profile = should_profile(request.headers.get("X-Profile"))
+    await acquire_slot(request)
+    try:
+        state, profile_path = await run_blocking(
+            request, run_profiled, rid, profile,
+            request.app.state.agent.invoke, body.query, request_messages(body), body.session_id, body.thread_id
+        )
+    finally:
+        release_slot(request)
+
+    response.headers["X-Request-ID"] = rid
+    if profile_path:
+        response.headers["X-Profile-File"] = os.path.basename(profile_path)
+    return to_chat_response(state)
+
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatRequest, request: Request):
+    """
+    Server-sent events: one "node" event per completed graph node, then "response".
+    The "done" event names the profile file when the request was profiled.
+    """
+    rid = request_id(request)
+    profile = should_profile(request.headers.get("X-Profile"))
+    profiled = {"path": None}
+    run = {"producer": None}
+    await acquire_slot(request)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+
+    def produce():
+        try:
+            agent = request.app.state.agent
+            with profile_request(rid, enabled=profile) as result:
+                for node, state in agent.stream(body.query, request_messages(body), body.session_id, body.thread_id):
+                    loop.call_soon_threadsafe(queue.put_nowait, (node, state))
+            profiled["path"] = result["path"]
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    async def events():
+        producer = run["producer"] = loop.run_in_executor(request.app.state.executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                node, state = item
+                if node == "final":
+                    payload = to_chat_response(state).model_dump()
+                    yield f"event: response\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    payload = {"node": node, "route": state.get("next_action", "")}
+                    yield f"event: node\ndata: {json.dumps(payload)}\n\n"
+            await producer
+            done = {"profile": os.path.basename(profiled["path"])} if profiled["path"] else {}
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+        finally:
+            await producer
+
+    def release():
+        # The slot is held until the graph run ends, even if the client has gone
+        producer = run["producer"]
+        if producer is None or producer.done():
+            release_slot(request)
+        else:
+            producer.add_done_callback(lambda _: release_slot(request))
+
+    return SlotStreamingResponse(events(), release, media_type="text/event-stream", headers={"X-Request-ID": rid})
+
+
+@app.post("/retrieve")
+async def retrieve(body: RetrieveRequest, request: Request):
+    await acquire_slot(request)
+    try:
+        results = await run_blocking(
+            request, request.app.state.vector_store.retrieve_with_scores, body.query, body.k, body.adaptive
+        )
+    finally:
+        release_slot(request)
+
+    return {
+        "query": body.query,
+        "chunks": [
+            {
+                "content": doc.page_content,
+                "section_title": doc.metadata.get("section_title", ""),
+                "doc_name": doc.metadata.get("doc_name", ""),
+                "chunk_id": doc.metadata.get("chunk_id"),
+                "sources": doc.metadata.get("sources", [doc.metadata.get("source", "")]),
+                "score": round(score, 4)
+            }
+            for doc, score in results
+        ]
+    }
+
+
+@app.post("/index/reload", status_code=202)
+async def reload_index(request: Request):
+    """
+    Rebuild the index in the background; the current one keeps serving until the swap
+    """
+    vector_store = request.app.state.vector_store
+    started = vector_store.reload() is not None
+    return {"started": started, "index": vector_store.reload_status}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str, request: Request):
+    session = await run_blocking(request, request.app.state.agent.get_session, session_id)
+    return {
+        "session_id": session_id,
+        "history": [message.model_dump() for message in from_messages(session["messages"])],
+        "tool_calls": session["tool_calls"]
+    }
+
+
+@app.get("/sessions/{session_id}/runs")
+async def list_runs(session_id: str, request: Request):
+    """
+    Checkpointed graph runs of a session, newest first
+    """
+    runs = await run_blocking(request, request.app.state.agent.list_runs, session_id)
+    return {"session_id": session_id, "runs": runs}
+
+
+@app.get("/sessions/{session_id}/runs/{thread_id}")
+async def get_run(session_id: str, thread_id: str, request: Request):
+    """
+    State after each completed node of one run
+    """
+    run = await run_blocking(request, request.app.state.agent.get_run, session_id, thread_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, request: Request):
+    await run_blocking(request, request.app.state.agent.clear_session, session_id)
+    return {"session_id": session_id, "deleted": True}
@@ -5,6 +5,9 @@ import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
 import sys
 import os
+import re
+import uuid
+from functools import lru_cache
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +15,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import config
 from agent.graph import create_agent
 from rag.vector_store import initialize_vector_store
+from rag.watcher import start_docs_watcher
+from api.client import AgentAPIClient
 
 
 # Page configuration
@@ -59,8 +64,16 @@ def load_agent():
     Load and cache the agent and vector store
     """
     with st.spinner("🔧 Initializing AI Agent..."):
+        # Thin client mode: the API server owns the index and graph
+        if config.AGENT_API_URL:
+            agent = AgentAPIClient(config.AGENT_API_URL)
+            agent.health()
+            st.success("✓ Connected to Agent API")
+            return agent, None
+
         # Initialize vector store
         vector_store = initialize_vector_store()
+        start_docs_watcher(vector_store)
 
         # Create agent
         agent = create_agent(vector_store)
@@ -71,29 +84,139 @@ def load_agent():
 
 def initialize_session_state():
     """
-    Initialize Streamlit session state
+    Initialize Streamlit session state.
+    The conversation is in the session store; here are only the session ID,
+    a version that changes whenever this tab writes to the session, and how
+    many turns of history are shown.
+    """
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "session_version" not in st.session_state:
+        st.session_state.session_version = 0
+    if "history_turns" not in st.session_state:
+        st.session_state.history_turns = config.HISTORY_WINDOW_TURNS
+
+
+def session_changed():
+    """
+    Mark the stored session as changed, so the next run loads it again
+    """
+    st.session_state.session_version += 1
+
+
+def load_session(agent) -> dict:
+    """
+    The session, loaded from the store only after this tab changed it
+
+    Streamlit reruns the whole script on every interaction. Without this each
+    rerun would deserialize the history again (or fetch it over HTTP in thin
+    client mode).
+    """
+    version = st.session_state.session_version
+    cached = st.session_state.get("session_cache")
+    if cached is None or cached[0] != version:
+        cached = (version, agent.get_session(st.session_state.session_id))
+        st.session_state.session_cache = cached
+    return cached[1]
+
+
+# Code fences are left as they are; elsewhere "$" would start LaTeX
+_CODE_FENCE = re.compile(r"(```.*?```)", re.DOTALL)
+_SINGLE_NEWLINE = re.compile(r"(?<!\n)\n(?!\n)")
+
+
+@lru_cache(maxsize=config.MARKDOWN_CACHE_SIZE)
+def prepare_markdown(content: str) -> str:
+    """
+    Message text as Markdown for st.markdown, computed once per message
+
+    Dollar amounts are escaped so they are not rendered as math, and single
+    line breaks (tool results are one field per line) are kept.
+
+    Args:
+        content: Message text
+
+    Returns:
+        Markdown string
+    """
+    parts = _CODE_FENCE.split(content)
+    for i in range(0, len(parts), 2):
+        parts[i] = _SINGLE_NEWLINE.sub("  \n", parts[i].replace("$", "\\$"))
+    return "".join(parts)
+
+
+def display_message(message):
+    """
+    Display one chat message
+    """
+    if isinstance(message, HumanMessage):
+        role, avatar = "user", "👤"
+    elif isinstance(message, AIMessage):
+        role, avatar = "assistant", "🤖"
+    else:
+        return
+    with st.chat_message(role, avatar=avatar):
+        st.markdown(prepare_markdown(message.content))
+
+
+@st.fragment
+def display_chat_history(session):
+    """
+    Display the most recent turns of the conversation
+
+    Only the last history_turns turns are rendered, so reruns cost the same
+    however long the session is. Older turns are added a page at a time;
+    as a fragment, showing them reruns only the history.
     """
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    messages = session["messages"]
+    shown = st.session_state.history_turns * 2
+    hidden = max(len(messages) - shown, 0)
 
-    if "tool_calls" not in st.session_state:
-        st.session_state.tool_calls = []
+    if hidden:
+        if st.button(f"⬆️ Show earlier messages ({hidden // 2} more turns)", use_container_width=True):
+            st.session_state.history_turns += config.HISTORY_PAGE_TURNS
+            st.rerun(scope="fragment")
 
+    for message in messages[hidden:]:
+        display_message(message)
 
-def display_chat_history():
+
+def sidebar_stats(vector_store, session) -> dict:
     """
-    Display conversation history
+    Sidebar statistics, recomputed only when the session or index changed
+
+    Args:
+        vector_store: Local vector store, or None in thin client mode
+        session: Loaded session
+
+    Returns:
+        Dictionary with chunk count, rebuild state, message count and the
+        last five tool calls
     """
-    for message in st.session_state.messages:
-        if isinstance(message, HumanMessage):
-            with st.chat_message("user", avatar="👤"):
-                st.markdown(message.content)
-        elif isinstance(message, AIMessage):
-            with st.chat_message("assistant", avatar="🤖"):
-                st.markdown(message.content)
+    index_status = None
+    if vector_store and vector_store.is_ready():
+        status = vector_store.reload_status
+        index_status = (vector_store.generation, status["state"], status["last_error"])
+
+    key = (st.session_state.session_version, index_status)
+    cached = st.session_state.get("sidebar_stats")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    tool_calls = session["tool_calls"]
+    stats = {
+        "chunks": vector_store.count() if index_status else None,
+        "rebuilding": bool(index_status) and index_status[1] != "idle",
+        "last_error": index_status[2] if index_status else None,
+        "messages": len(session["messages"]),
+        "tool_call_count": len(tool_calls),
+        "recent_tool_calls": list(reversed(tool_calls[-5:]))
+    }
+    st.session_state.sidebar_stats = (key, stats)
+    return stats
 
 
-def display_sidebar(vector_store):
+def display_sidebar(agent, vector_store, session):
     """
     Display sidebar with information and controls
     """
@@ -114,19 +237,23 @@ def display_sidebar(vector_store):
 
         # Stats
         st.markdown("#### 📊 Statistics")
-        if vector_store.vector_store:
-            doc_count = vector_store.vector_store.index.ntotal
-            st.info(f"📄 Indexed Documents: {doc_count} chunks")
+        stats = sidebar_stats(vector_store, session)
+        if stats["chunks"] is not None:
+            st.info(f"📄 Indexed Documents: {stats['chunks']} chunks")
+            if stats["rebuilding"]:
+                st.info("🔄 Rebuilding vector store...")
+            elif stats["last_error"]:
+                st.warning(f"Last rebuild failed: {stats['last_error']}")
 
-        st.info(f"💬 Messages: {len(st.session_state.messages)}")
+        st.info(f"💬 Messages: {stats['messages']}")
 
         st.markdown("---")
 
         # Tool calls
-        if st.session_state.tool_calls:
+        if stats["recent_tool_calls"]:
             st.markdown("#### 🔧 Recent Tool Calls")
-            for i, tool_call in enumerate(reversed(st.session_state.tool_calls[-5:])):
-                with st.expander(f"Call {len(st.session_state.tool_calls) - i}"):
+            for i, tool_call in enumerate(stats["recent_tool_calls"]):
+                with st.expander(f"Call {stats['tool_call_count'] - i}"):
                     st.json(tool_call)
 
         st.markdown("---")
@@ -135,14 +262,21 @@ def display_sidebar(vector_store):
         st.markdown("#### ⚙️ Controls")
 
         if st.button("🗑️ Clear Chat History", use_container_width=True):
-            st.session_state.messages = []
-            st.session_state.tool_calls = []
+            agent.clear_session(st.session_state.session_id)
+            session_changed()
+            st.session_state.history_turns = config.HISTORY_WINDOW_TURNS
             st.rerun()
 
         if st.button("🔄 Rebuild Vector Store", use_container_width=True):
-            with st.spinner("Rebuilding vector store..."):
-                st.cache_resource.clear()
-                st.rerun()
+            # Built in the background and swapped in; the current index keeps serving
+            if vector_store:
+                started = vector_store.reload() is not None
+            else:
+                started = agent.reload_index()["started"]
+            if started:
+                st.info("Rebuilding vector store in the background...")
+            else:
+                st.warning("A rebuild is already in progress")
 
         st.markdown("---")
 
@@ -184,11 +318,13 @@ def main():
     st.markdown('<div class="main-header">🏢 Enterprise Policy Assistant</div>',
                 unsafe_allow_html=True)
 
+    session = load_session(agent)
+
     # Sidebar
-    display_sidebar(vector_store)
+    display_sidebar(agent, vector_store, session)
 
     # Welcome message
-    if not st.session_state.messages:
+    if not session["messages"]:
         st.markdown("""
         <div class="info-box">
             <h4>👋 Welcome to the Enterprise Policy Assistant!</h4>
@@ -204,42 +340,37 @@ def main():
         """, unsafe_allow_html=True)
 
     # Display chat history
-    display_chat_history()
+    display_chat_history(session)
 
     # Chat input
     if prompt := st.chat_input("Ask about policies, create tickets, or check leave balance..."):
         # Display user message
         with st.chat_message("user", avatar="👤"):
-            st.markdown(prompt)
+            st.markdown(prepare_markdown(prompt))
 
         # Get response from agent
         with st.chat_message("assistant", avatar="🤖"):
             with st.spinner("🤔 Thinking..."):
                 try:
-                    # Invoke agent
+                    # Invoke agent; history is read from and written to the session store
                     result = agent.invoke(
                         query=prompt,
-                        messages=st.session_state.messages
+                        session_id=st.session_state.session_id
                     )
 
                     # Extract response
                     response = result.get("response", "I apologize, I couldn't process that request.")
 
                     # Display response
-                    st.markdown(response)
-
-                    # Update session state
-                    st.session_state.messages = result.get("messages", st.session_state.messages)
-
-                    # Store tool calls
-                    if result.get("tool_calls"):
-                        st.session_state.tool_calls.extend(result["tool_calls"])
+                    st.markdown(prepare_markdown(response))
 
                 except Exception as e:
                     error_msg = f"❌ Error: {str(e)}"
                     st.error(error_msg)
-                    st.session_state.messages.append(HumanMessage(content=prompt))
-                    st.session_state.messages.append(AIMessage(content=error_msg))
+
+                finally:
+                    # The turn may have been stored even if the call failed
+                    session_changed()
 
 
 if __name__ == "__main__":
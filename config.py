@@ -10,23 +10,156 @@ load_dotenv()
 # Groq Configuration
 GROQ_API_KEY = os.getenv("grok_api_key") or os.getenv("GROQ_API_KEY")
 GROQ_MODEL = "llama-3.1-8b-instant"  # Fast and efficient Llama model
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # Override to target a local OpenAI-compatible stub
 
 # RAG Configuration
 DOCS_FOLDER = "docs"
 CHUNK_SIZE = 800  # Optimized for policy sections with headers
 CHUNK_OVERLAP = 150  # Ensures context continuity
+CHUNK_SIZE_UNIT = "tokens"  # "tokens" (embedding tokenizer) or "chars" (CHUNK_SIZE / CHUNK_OVERLAP)
+CHUNK_SIZE_TOKENS = 254  # Fills EMBEDDING_MAX_TOKENS after [CLS] and [SEP]
+CHUNK_OVERLAP_TOKENS = 40
+TOKEN_CACHE_SIZE = 100_000  # Cached paragraph token counts
+DEDUP_CHUNKS = True  # Index one canonical copy of near-duplicate chunks
+DEDUP_THRESHOLD = 0.85  # Jaccard similarity of word shingles at which chunks count as duplicates
+DEDUP_NUM_PERM = 128  # MinHash signature length
+DEDUP_BANDS = 16  # LSH bands of DEDUP_NUM_PERM // DEDUP_BANDS rows; candidates from ~0.7 similarity
 VECTOR_STORE_PATH = "vector_store"
+PDF_CACHE = True  # Reuse parsed PDF text for files whose bytes have not changed
+PDF_CACHE_DIR = os.path.join(".cache", "pdf_text")
+VECTOR_STORE_DRAIN_TIMEOUT_SECONDS = 30  # Wait for searches on a replaced index before freeing it
+
+# Docs Watcher Configuration
+WATCH_DOCS = os.getenv("WATCH_DOCS", "true").lower() in ("1", "true")  # Re-index docs/ changes automatically
+DOCS_WATCH_DEBOUNCE_SECONDS = 2.0  # Quiet period after the last change before re-indexing
+DOCS_WATCH_POLL_SECONDS = 5.0  # Scan interval when inotify is unavailable
+
+# Adaptive Top-k Configuration
+ADAPTIVE_TOP_K = os.getenv("ADAPTIVE_TOP_K", "false").lower() in ("1", "true")  # Opt-in: k becomes an upper bound
+ADAPTIVE_K_STRATEGY = "gap"  # "gap", "relative" or "mass"
+ADAPTIVE_K_MIN = 1  # Chunks always sent to the LLM
+ADAPTIVE_K_GAP = 0.08  # "gap": cut where cosine similarity drops at least this much between neighbours
+ADAPTIVE_K_RELATIVE = 0.85  # "relative": keep chunks scoring at least this fraction of the best
+ADAPTIVE_K_MASS = 0.8  # "mass": keep chunks until this share of the softmax mass is covered
+ADAPTIVE_K_TEMPERATURE = 0.05  # "mass": softmax temperature over cosine similarities
+
+# Parent Retrieval Configuration
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "chunk")  # "chunk", or "parent": index small passages, return their sections
+CHILD_CHUNK_SIZE_TOKENS = 64  # Indexed passage size in parent mode
+PARENT_CHUNK_SIZE_TOKENS = 512  # Longer sections are split into several parents
+PARENT_EXPANSION_BUDGET_TOKENS = 1500  # Total parent text returned per retrieval
+CHILD_CHUNK_SIZE = 250  # Character sizes, used when CHUNK_SIZE_UNIT is "chars"
+PARENT_CHUNK_SIZE = 2000
+PARENT_EXPANSION_BUDGET = 6000
+PARENT_CHILD_FANOUT = 3  # Children searched per requested parent
+
+# FAQ Answer Cache Configuration
+FAQ_CACHE = True  # Serve precomputed answers (python -m agent.faq) to frequently asked questions
+FAQ_QUESTIONS_PATH = "faq_questions.txt"  # Curated questions, one per line
+FAQ_ANSWERS_PATH = "faq_answers.json"
+FAQ_MATCH_THRESHOLD = 0.92  # Cosine similarity to the nearest FAQ question required to serve its answer
+
+# Sharded Index Configuration
+VECTOR_STORE_SHARDS = int(os.getenv("VECTOR_STORE_SHARDS", "0"))  # 0 keeps a single in-process index
+SHARD_STRATEGY = "document"  # "document", "department" or "hash"
+SHARD_SEARCH_DEADLINE_SECONDS = 0.5  # Shards slower than this are left out of the merged results
+SHARDED_STORE_PATH = "vector_store_shards"
+
+# Groq Rate Limiting Configuration (size to the account quota)
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+LLM_EXPECTED_COMPLETION_TOKENS = 256  # Completion size assumed before usage is known
+LLM_MAX_RETRIES = 4
+LLM_BACKOFF_BASE_SECONDS = 0.5
+LLM_BACKOFF_MAX_SECONDS = 20
+LLM_MAX_QUEUE_SECONDS = 30  # Longest a call waits for rate limit capacity
+CIRCUIT_BREAKER_FAILURES = 5  # Consecutive failed calls before the circuit opens
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 30
+
+# Hedged Requests Configuration
+LLM_CALL_DEADLINE_SECONDS = 45  # Hard deadline per LLM call, including queueing, retries and hedges
+LLM_HEDGING = True  # Send a duplicate request when the first byte is unusually slow
+LLM_HEDGE_PERCENTILE = 95  # Hedge once first-byte latency exceeds this percentile of recent calls
+LLM_HEDGE_INITIAL_DELAY_SECONDS = 2.0  # Hedge delay until enough latency samples are collected
+LLM_HEDGE_MIN_DELAY_SECONDS = 0.25
+LLM_HEDGE_MAX_RATE = 0.05  # Hedges allowed as a share of LLM calls
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL") or GROQ_MODEL  # Model for the duplicate request
+LLM_HEDGE_BASE_URL = os.getenv("LLM_HEDGE_BASE_URL") or None  # Endpoint for the duplicate request
+LLM_MAX_CONCURRENT_CALLS = 32  # Worker threads for in-flight (and hedged) LLM requests
 
 # Embeddings Configuration
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_MAX_TOKENS = 256  # Model max_seq_length; longer input is truncated
 
 # Agent Configuration
 MAX_ITERATIONS = 5
 TEMPERATURE = 0.1
 
+# Tool Execution Configuration
+MAX_PARALLEL_TOOLS = 4  # Independent tool calls executed concurrently per step
+TOOL_TIMEOUT_SECONDS = 10  # Deadline for each tool call, from when it starts running
+TOOL_QUEUE_TIMEOUT_SECONDS = 10  # Wait for a free tool thread before giving up on a call
+# Tool threads shared by all requests in the process; a timed-out tool keeps its thread until it returns
+TOOL_POOL_WORKERS = int(os.getenv("TOOL_POOL_WORKERS", os.getenv("API_MAX_CONCURRENCY", "16")))
+TOOL_FAST_PATH = True  # Resolve trivially parseable tool requests without the LLM
+
+# Routing Configuration
+# "two_step": ROUTER_PROMPT, then TOOL_SELECTION_PROMPT for tool requests
+# "function_calling": one Groq call with native function definitions routes and selects tools
+ROUTING_MODE = "two_step"
+SPECULATIVE_RETRIEVAL = True  # Run retrieval concurrently with the router LLM call
+# Speculative retrievals in flight per process; one per concurrent graph run by default.
+# When all are busy the router skips speculating rather than queueing behind them.
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", os.getenv("API_MAX_CONCURRENCY", "16")))
+
+# API Server Configuration
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "2"))  # Worker processes, each with its own index and graph
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))  # Concurrent graph runs per worker
+API_QUEUE_TIMEOUT_SECONDS = 10  # Wait for a free slot before answering 503
+AGENT_API_URL = os.getenv("AGENT_API_URL") or None  # When set, the Streamlit UI calls the API instead
+
+# Request Profiling Configuration
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None  # "X-Profile: <token>" profiles a request; unset disables the header
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Share of requests profiled at random
+PROFILE_INTERVAL_SECONDS = 0.005  # Time between stack samples
+PROFILE_MAX_SECONDS = 120  # Sampling stops after this long
+PROFILE_MAX_CONCURRENT = 2  # Further profile requests run unprofiled
+PROFILE_FORMAT = "speedscope"  # "speedscope" or "collapsed" (flamegraph.pl)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = 200  # Oldest profiles are deleted beyond this
+
+# Checkpoint Configuration (resumable graph runs)
+CHECKPOINTS = os.getenv("CHECKPOINTS", "true").lower() == "true"  # Checkpoint runs that have a session or thread ID
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db")
+CHECKPOINT_FLUSH_INTERVAL_SECONDS = 0.1  # Buffered checkpoint writes are committed together this often
+CHECKPOINT_BATCH_SIZE = 64  # ...or once this many rows are buffered
+CHECKPOINT_COMPRESS_MIN_BYTES = 512  # Larger serialized values are zlib-compressed
+CHECKPOINT_TTL_SECONDS = 24 * 3600  # Runs idle this long are deleted
+CHECKPOINT_GC_INTERVAL_SECONDS = 300
+
+# Memory Accounting Configuration
+MEMORY_SAMPLE_INTERVAL_SECONDS = 300  # Component sizes recorded for growth reports (0 disables)
+MEMORY_HISTORY_SIZE = 288  # Samples kept (a day at the default interval)
+MEMORY_TOP_TYPES = 20  # Most common object types listed with object counts
+
+# Session Store Configuration
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")  # "sqlite" or "memory"
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_TTL_SECONDS = 7 * 24 * 3600  # Idle sessions expire after a week
+SESSION_MAX_TURNS = 50  # Oldest turns are dropped beyond this
+SESSION_MAX_BYTES = 64 * 1024  # Compressed size cap per session
+SESSION_MAX_TOOL_CALLS = 20
+SESSION_GC_INTERVAL_SECONDS = 300
+SESSION_SAVE_ATTEMPTS = 5  # Tries to append a turn when other turns of the session are saved concurrently
+
 # Streamlit Configuration
 PAGE_TITLE = "Enterprise Policy Assistant"
 PAGE_ICON = "🏢"
+HISTORY_WINDOW_TURNS = 10  # Most recent turns rendered in the chat
+HISTORY_PAGE_TURNS = 10  # Older turns added per "show earlier messages" click
+MARKDOWN_CACHE_SIZE = 512  # Prepared messages kept for reruns
 
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found in environment variables")
@@ -0,0 +1,315 @@
+"""
+Local OpenAI/Groq-compatible chat completions stub for load testing.
+
+Serves POST .../chat/completions (streaming and non-streaming, including
+function calls) with configurable first-byte latency, token rate and
+injected errors, so PolicyAssistantGraph can be driven without Groq quota.
+
+Run standalone:
+    python -m loadtest.fake_groq --port 8089 --latency-median 0.4 --token-rate 400
+Then point the app at it with GROQ_BASE_URL=http://127.0.0.1:8089
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FILLER_WORDS = (
+    "Under the company policy employees are entitled to the stated leave days subject to "
+    "manager approval and HR validation as described in the relevant policy section"
+).split()
+
+TOOL_KEYWORDS = {
+    "check_ticket_status": ("status", "track", "tkt-"),
+    "check_leave_balance": ("balance", "days left", "remaining"),
+    "create_hr_ticket": ("ticket", "report", "complaint", "broken", "issue"),
+}
+POLICY_KEYWORDS = ("policy", "leave", "sick", "remote", "expense", "password", "vacation", "allowed", "can i")
+
+
+class FakeGroqProfile:
+    """
+    Latency, throughput and error behaviour of the stub
+    """
+
+    def __init__(self,
+                 latency_median: float = 0.4,
+                 latency_sigma: float = 0.5,
+                 latency_max: float = 10.0,
+                 token_rate: float = 400.0,
+                 completion_tokens: int = 150,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 seed: int = None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_max = latency_max
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_byte_latency(self) -> float:
+        """
+        Log-normal first-byte latency around the configured median
+        """
+        with self._lock:
+            sample = self._random.lognormvariate(0.0, self.latency_sigma) if self.latency_sigma else 1.0
+        return min(self.latency_max, self.latency_median * sample)
+
+    def injected_error(self):
+        """
+        Returns (status, retry-after) for an injected error, or None
+        """
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return 429, "1"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, None
+        return None
+
+
+def _last_user_message(messages: list) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _query_of(prompt: str) -> str:
+    match = re.search(r"^Query:\s*(.+)$", prompt, re.MULTILINE)
+    return (match.group(1) if match else prompt).lower()
+
+
+def _pick_tools(query: str) -> list:
+    tools = [name for name, words in TOOL_KEYWORDS.items() if any(word in query for word in words)]
+    if "check_ticket_status" in tools and "create_hr_ticket" in tools:
+        tools.remove("create_hr_ticket")
+    return tools
+
+
+def _tool_arguments(tool: str, query: str) -> dict:
+    if tool == "create_hr_ticket":
+        return {"issue": query}
+    if tool == "check_leave_balance":
+        return {"employee_id": "current_user"}
+    match = re.search(r"tkt-\d{6}", query)
+    return {"ticket_id": match.group(0).upper()} if match else {}
+
+
+def build_reply(request: dict, completion_tokens: int):
+    """
+    Produce a plausible reply for the agent's prompts
+
+    Returns:
+        Tuple of (content text or None, list of tool calls)
+    """
+    prompt = _last_user_message(request.get("messages", []))
+    query = _query_of(prompt)
+
+    # Native function calling (single-call routing)
+    if request.get("tools"):
+        names = _pick_tools(query) or (["search_policies"] if any(w in query for w in POLICY_KEYWORDS)
+                                       else ["general_chat"])
+        return None, [(name, _tool_arguments(name, query) if name in TOOL_KEYWORDS else {}) for name in names]
+
+    # Router prompt
+    if "retrieve, tool, or general" in prompt:
+        if _pick_tools(query):
+            return "tool", []
+        if any(word in query for word in POLICY_KEYWORDS):
+            return "retrieve", []
+        return "general", []
+
+    # Tool selection prompt
+    if '"tool_calls"' in prompt and "JSON:" in prompt:
+        calls = [{"tool": name, "parameters": _tool_arguments(name, query)} for name in _pick_tools(query)]
+        return json.dumps({"tool_calls": calls, "done": True}), []
+
+    words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(completion_tokens)]
+    return " ".join(words), []
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """
+    Request handler; the profile is attached to the server instance
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._send_json(200, {"status": "ok"})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        profile = self.server.profile
+
+        time.sleep(profile.first_byte_latency())
+
+        error = profile.injected_error()
+        if error:
+            status, retry_after = error
+            headers = {"retry-after": retry_after} if retry_after else {}
+            self._send_json(status, {"error": {"message": "Injected error", "type": "fake_groq"}}, headers)
+            return
+
+        content, tool_calls = build_reply(request, profile.completion_tokens)
+        prompt_tokens = sum(len(m.get("content") or "") for m in request.get("messages", [])) // 4
+        completion_tokens = len((content or "").split()) + 10 * len(tool_calls)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        if request.get("stream"):
+            self._stream(request, content or "", usage, profile.token_rate)
+        else:
+            # Non-streaming replies arrive only after the whole completion is generated
+            time.sleep(completion_tokens / profile.token_rate if profile.token_rate else 0)
+            self._send_json(200, self._completion(request, content, tool_calls, usage))
+
+    def _completion(self, request: dict, content, tool_calls: list, usage: dict) -> dict:
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)}
+                }
+                for name, arguments in tool_calls
+            ]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop"
+            }],
+            "usage": usage
+        }
+
+    def _stream(self, request: dict, content: str, usage: dict, token_rate: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = content.split(" ")
+        try:
+            for index, word in enumerate(words):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if index == 0 else " " + word},
+                        "finish_reason": None
+                    }]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                if token_rate:
+                    time.sleep(1.0 / token_rate)
+
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": completion_id, "usage": usage}
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream (e.g. a losing hedged request)
+            pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_fake_groq(profile: FakeGroqProfile = None, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the stub on a background thread
+
+    Args:
+        profile: Latency/error profile (defaults to FakeGroqProfile())
+        host: Bind address
+        port: Port (0 picks a free port)
+
+    Returns:
+        Running server; its base URL is http://host:server.server_port
+    """
+    server = ThreadingHTTPServer((host, port), FakeGroqHandler)
+    server.daemon_threads = True
+    server.profile = profile or FakeGroqProfile()
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Groq chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-median", type=float, default=0.4, help="Median first-byte latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal sigma of first-byte latency")
+    parser.add_argument("--token-rate", type=float, default=400.0, help="Generated tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests failing with 429")
+    args = parser.parse_args()
+
+    profile = FakeGroqProfile(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        token_rate=args.token_rate,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate
+    )
+    server = ThreadingHTTPServer((args.host, args.port), FakeGroqHandler)
+    server.daemon_threads = True
+    server.profile = profile
+    print(f"🧪 Fake Groq server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""
+Record-and-replay regression benchmark for PolicyAssistantGraph.
+
+Record mode runs a query suite against the live Groq API and captures every
+LLM request and response, retrieval result and tool output. Replay mode
+re-runs the graph offline against that recording: LLM calls and tool outputs
+are served from it, retrieval runs live against the local index (or from the
+recording with --replay-retrieval), route and retrieved-section expectations
+are asserted, and per-node timings are compared with a baseline report from
+another commit.
+
+Usage:
+    python -m loadtest.replay record --output recording.json
+    python -m loadtest.replay replay --recording recording.json --report before.json
+    (change retrieval or chunking)
+    python -m loadtest.replay replay --recording recording.json --baseline before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Replays never reach Groq, but config refuses to load without a key
+os.environ.setdefault("GROQ_API_KEY", "replay")
+os.environ.setdefault("CHECKPOINTS", "false")
+
+from langchain_core.documents import Document
+
+import config
+from agent.metrics import summarize
+
+
+RECORDING_FORMAT_VERSION = 1
+ERROR_MARKER = "encountered an error"
+DEFAULT_SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suite.json")
+
+
+class ReplayMiss(Exception):
+    """
+    A call the recording has no response for
+    """
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _llm_key(method: str, prompt: str, temperature: float, tools: Optional[List[dict]]) -> str:
+    tool_names = [tool["function"]["name"] for tool in tools or []]
+    return json.dumps([method, prompt, temperature, tool_names])
+
+
+class Tape:
+    """
+    Calls captured for the query being run, shared by the recording proxies
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start(None)
+
+    def start(self, query: Optional[str]):
+        with self._lock:
+            self.query = query
+            self.llm_calls: List[dict] = []
+            self.retrievals: List[dict] = []
+            self.tool_calls: List[dict] = []
+
+    def add(self, kind: str, entry: dict):
+        with self._lock:
+            getattr(self, kind).append(entry)
+
+
+class RecordingLLM:
+    """
+    GroqLLM proxy that captures prompts and responses
+    """
+
+    def __init__(self, llm, tape: Tape):
+        self._llm = llm
+        self._tape = tape
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
+        start = time.perf_counter()
+        response = self._llm.invoke(prompt, temperature=temperature)
+        self._tape.add("llm_calls", {
+            "method": "invoke", "prompt": prompt, "temperature": temperature, "tools": None,
+            "response": response, "seconds": round(time.perf_counter() - start, 4)
+        })
+        return response
+
+    def invoke_with_tools(self, prompt: str, tools: List[dict], temperature: float = config.TEMPERATURE):
+        start = time.perf_counter()
+        calls = self._llm.invoke_with_tools(prompt, tools, temperature=temperature)
+        self._tape.add("llm_calls", {
+            "method": "invoke_with_tools", "prompt": prompt, "temperature": temperature, "tools": tools,
+            "response": [list(call) for call in calls], "seconds": round(time.perf_counter() - start, 4)
+        })
+        return calls
+
+
+class ReplayLLM:
+    """
+    Serves recorded LLM responses.
+
+    A call is matched on its exact prompt first. Retrieval or chunking changes
+    alter RAG prompts, so a call whose prompt changed falls back to the
+    recorded call of the same method at the same position in the query.
+    """
+
+    def __init__(self, llm, recording: dict):
+        self._llm = llm
+        self._exact: Dict[str, object] = {}
+        self._ordered: Dict[Tuple[str, str], List[object]] = defaultdict(list)
+        for entry in recording["queries"]:
+            for call in entry["llm_calls"]:
+                response = call["response"]
+                self._exact[_llm_key(call["method"], call["prompt"], call["temperature"], call["tools"])] = response
+                self._ordered[(entry["query"], call["method"])].append(response)
+        self._positions: Dict[str, int] = defaultdict(int)
+        self.query = None
+        self.stats = {"exact": 0, "fallback": 0, "missing": 0}
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def start(self, query: str):
+        self.query = query
+        self._positions.clear()
+
+    def _lookup(self, method: str, prompt: str, temperature: float, tools: Optional[List[dict]]):
+        position = self._positions[method]
+        self._positions[method] += 1
+
+        key = _llm_key(method, prompt, temperature, tools)
+        if key in self._exact:
+            self.stats["exact"] += 1
+            return self._exact[key]
+
+        recorded = self._ordered.get((self.query, method), [])
+        if position < len(recorded):
+            self.stats["fallback"] += 1
+            return recorded[position]
+
+        self.stats["missing"] += 1
+        raise ReplayMiss(f"No recorded {method} response for: {prompt[:80]!r}")
+
+    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
+        return self._lookup("invoke", prompt, temperature, None)
+
+    def invoke_with_tools(self, prompt: str, tools: List[dict], temperature: float = config.TEMPERATURE):
+        return [tuple(call) for call in self._lookup("invoke_with_tools", prompt, temperature, tools)]
+
+
+class RetrievalProxy:
+    """
+    VectorStoreManager proxy that records retrievals, or serves recorded ones
+    """
+
+    def __init__(self, manager, tape: Tape, recording: dict = None):
+        self._manager = manager
+        self._tape = tape
+        self._recorded = {}
+        if recording:
+            for entry in recording["queries"]:
+                for retrieval in entry["retrievals"]:
+                    self._recorded[(retrieval["query"], retrieval["k"])] = retrieval["results"]
+
+    def __getattr__(self, name):
+        return getattr(self._manager, name)
+
+    def retrieve_with_scores(self, query: str, k: int = 5, adaptive: bool = None) -> List[Tuple[Document, float]]:
+        if self._recorded:
+            if (query, k) not in self._recorded:
+                raise ReplayMiss(f"No recorded retrieval for: {query[:80]!r}")
+            return [
+                (Document(page_content=result["content"], metadata=result["metadata"]), result["score"])
+                for result in self._recorded[(query, k)]
+            ]
+
+        results = self._manager.retrieve_with_scores(query, k, adaptive)
+        self._tape.add("retrievals", {
+            "query": query,
+            "k": k,
+            "results": [
+                {"content": doc.page_content, "metadata": doc.metadata, "score": round(score, 6)}
+                for doc, score in results
+            ]
+        })
+        return results
+
+    def retrieve(self, query: str, k: int = 5, adaptive: bool = None) -> List[Document]:
+        return [doc for doc, _ in self.retrieve_with_scores(query, k, adaptive)]
+
+
+class ToolProxy:
+    """
+    LangChain tool proxy that records outputs, or serves recorded ones
+    (tools return random ticket IDs and balances)
+    """
+
+    def __init__(self, tool, tape: Tape, recorded: Dict[str, List[dict]] = None):
+        self._tool = tool
+        self._tape = tape
+        self._recorded = recorded
+
+    def __getattr__(self, name):
+        return getattr(self._tool, name)
+
+    def invoke(self, input, **kwargs):
+        if self._recorded is not None:
+            calls = self._recorded.get(self._tape.query, [])
+            for call in calls:
+                if call["tool"] == self._tool.name and call["input"] == input and not call.get("used"):
+                    call["used"] = True
+                    return call["output"]
+            # Tools are local mocks; run them when the plan changed
+            return self._tool.invoke(input, **kwargs)
+
+        output = self._tool.invoke(input, **kwargs)
+        self._tape.add("tool_calls", {"tool": self._tool.name, "input": input, "output": output})
+        return output
+
+
+@contextlib.contextmanager
+def _patched_tools(tape: Tape, recorded: Dict[str, List[dict]] = None):
+    from agent import tools
+
+    originals = dict(tools.TOOL_MAP)
+    for name, tool in originals.items():
+        tools.TOOL_MAP[name] = ToolProxy(tool, tape, recorded)
+    try:
+        yield
+    finally:
+        tools.TOOL_MAP.update(originals)
+
+
+def load_suite(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build_agent():
+    from agent.graph import PolicyAssistantGraph
+    from agent.session_store import create_session_store
+    from rag.vector_store import initialize_vector_store
+
+    # FAQ answers would skip the graph being measured
+    return PolicyAssistantGraph(initialize_vector_store(), create_session_store("memory"), faq_cache=False)
+
+
+def _run_query(agent, query: str, verbose: bool) -> Tuple[dict, float]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if not verbose else contextlib.nullcontext():
+        state = agent.invoke(query, messages=[])
+    return state, time.perf_counter() - start
+
+
+def record(args) -> dict:
+    """
+    Run the suite live and capture every external interaction
+    """
+    suite = load_suite(args.suite)
+    agent = _build_agent()
+    tape = Tape()
+    agent.llm = RecordingLLM(agent.llm, tape)
+    agent.vector_store = RetrievalProxy(agent.vector_store, tape)
+
+    queries = []
+    with _patched_tools(tape):
+        for case in suite:
+            tape.start(case["query"])
+            state, seconds = _run_query(agent, case["query"], args.verbose)
+            queries.append({
+                "query": case["query"],
+                "route": state.get("next_action", ""),
+                "retrieved_sections": state.get("retrieved_sections", []),
+                "response": state.get("response", ""),
+                "seconds": round(seconds, 4),
+                "llm_calls": tape.llm_calls,
+                "retrievals": tape.retrievals,
+                "tool_calls": tape.tool_calls
+            })
+            print(f"   ● {case['query'][:60]:<60} {queries[-1]['route']:<9} {seconds * 1000:8.1f} ms")
+
+    recording = {
+        "version": RECORDING_FORMAT_VERSION,
+        "commit": git_commit(),
+        "recorded_at": time.time(),
+        "model": config.GROQ_MODEL,
+        "queries": queries
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(recording, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Recorded {len(queries)} queries → {args.output}")
+    return recording
+
+
+def check_expectations(case: dict, recorded: Optional[dict], state: dict) -> List[str]:
+    """
+    Failed expectations for one replayed query.
+    The route defaults to the recorded one; sections are only checked when the suite lists them.
+    """
+    expect = case.get("expect", {})
+    failures = []
+
+    route = state.get("next_action", "")
+    expected_route = expect.get("route") or (recorded or {}).get("route")
+    if expected_route and route != expected_route:
+        failures.append(f"route {route!r}, expected {expected_route!r}")
+
+    sections = state.get("retrieved_sections", [])
+    missing = [section for section in expect.get("sections", []) if section not in sections]
+    if missing:
+        failures.append(f"sections {missing} not retrieved (got {sections})")
+
+    if ERROR_MARKER in state.get("response", ""):
+        failures.append(f"error response: {state['response'][:120]!r}")
+    return failures
+
+
+def replay(args) -> dict:
+    """
+    Re-run the suite offline against a recording
+    """
+    with open(args.recording, encoding="utf-8") as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_FORMAT_VERSION:
+        raise ValueError(f"Unsupported recording format: {recording.get('version')}")
+
+    suite = load_suite(args.suite)
+    recorded_by_query = {entry["query"]: entry for entry in recording["queries"]}
+    recorded_tools = {entry["query"]: entry["tool_calls"] for entry in recording["queries"]}
+
+    agent = _build_agent()
+    tape = Tape()
+    replay_llm = ReplayLLM(agent.llm, recording)
+    agent.llm = replay_llm
+    if args.replay_retrieval:
+        agent.vector_store = RetrievalProxy(agent.vector_store, tape, recording)
+
+    latencies = []
+    results = []
+    with _patched_tools(tape, recorded_tools):
+        # Warm up embeddings and caches so the first query is not an outlier
+        for case in suite[:1]:
+            tape.start(case["query"])
+            replay_llm.start(case["query"])
+            _run_query(agent, case["query"], verbose=False)
+        agent.node_timings.reset()
+
+        for _ in range(args.repeat):
+            for call_list in recorded_tools.values():
+                for call in call_list:
+                    call.pop("used", None)
+            results = []
+            for case in suite:
+                tape.start(case["query"])
+                replay_llm.start(case["query"])
+                state, seconds = _run_query(agent, case["query"], args.verbose)
+                latencies.append(seconds)
+                failures = check_expectations(case, recorded_by_query.get(case["query"]), state)
+                results.append({
+                    "query": case["query"],
+                    "route": state.get("next_action", ""),
+                    "retrieved_sections": state.get("retrieved_sections", []),
+                    "seconds": round(seconds, 4),
+                    "failures": failures
+                })
+
+    failed = [result for result in results if result["failures"]]
+    return {
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "recording": args.recording,
+        "recording_commit": recording.get("commit"),
+        "queries": len(results),
+        "repeat": args.repeat,
+        "passed": len(results) - len(failed),
+        "failed": failed,
+        "results": results,
+        "llm": dict(replay_llm.stats),
+        "latency": summarize(latencies),
+        "nodes": agent.node_timings.summary()
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    """
+    Expectation results and per-node timings, with deltas against a baseline report
+    """
+    def ms(seconds):
+        return f"{seconds * 1000:9.2f}"
+
+    print(f"\n{'='*60}")
+    print(f"🔁 REPLAY REPORT ({report['commit'] or 'unknown commit'})")
+    print(f"{'='*60}")
+    print(f"Queries: {report['queries']} x {report['repeat']}   Passed: {report['passed']}   "
+          f"Failed: {len(report['failed'])}")
+    llm = report["llm"]
+    print(f"LLM responses: {llm['exact']} exact, {llm['fallback']} by position (prompt changed), "
+          f"{llm['missing']} missing")
+
+    for result in report["failed"]:
+        print(f"   ❌ {result['query'][:60]}")
+        for failure in result["failures"]:
+            print(f"      {failure}")
+
+    rows = [("end-to-end", report["latency"])] + [(f"node:{name}", stats) for name, stats in report["nodes"].items()]
+    baseline_rows = {}
+    if baseline:
+        baseline_rows = {"end-to-end": baseline["latency"]}
+        baseline_rows.update({f"node:{name}": stats for name, stats in baseline["nodes"].items()})
+        print(f"\nBaseline: {baseline.get('commit') or 'unknown commit'}")
+
+    print(f"\n{'scope':<24}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}"
+          + (f"{'base ms':>10}{'delta':>9}" if baseline else ""))
+    for name, stats in rows:
+        line = f"{name:<24}{stats['count']:>7}{ms(stats['mean'])}{ms(stats['p50'])}{ms(stats['p90'])}"
+        base = baseline_rows.get(name)
+        if base:
+            delta = (stats["mean"] - base["mean"]) / base["mean"] if base["mean"] else 0.0
+            line += f"{ms(base['mean'])}{delta:>+9.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay PolicyAssistantGraph runs")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Run the suite against Groq and record it")
+    record_parser.add_argument("--suite", default=DEFAULT_SUITE)
+    record_parser.add_argument("--output", default="recording.json")
+    record_parser.add_argument("--verbose", action="store_true", help="Keep the agent's node logging")
+
+    replay_parser = subparsers.add_parser("replay", help="Re-run the suite offline against a recording")
+    replay_parser.add_argument("--suite", default=DEFAULT_SUITE)
+    replay_parser.add_argument("--recording", default="recording.json")
+    replay_parser.add_argument("--repeat", type=int, default=3, help="Suite passes to time")
+    replay_parser.add_argument("--replay-retrieval", action="store_true",
+                               help="Serve recorded retrieval results instead of searching the local index")
+    replay_parser.add_argument("--baseline", help="Replay report from another commit to compare timings with")
+    replay_parser.add_argument("--report", help="Write the replay report to this file")
+    replay_parser.add_argument("--verbose", action="store_true", help="Keep the agent's node logging")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args)
+        return
+
+    report = replay(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Report written to: {args.report}")
+
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Microbenchmark for graph state handling.
+
+Runs PolicyAssistantGraph with a stub LLM and vector store, so only state
+handling is measured, over conversations of growing length. Two node
+contracts are compared:
+
+    full   every node returns {**state, ...} with whole lists, the old contract
+    delta  every node returns only the keys it changes (current nodes)
+
+and per request reports the peak traced allocation, the bytes of dicts and
+list buffers returned by nodes (what the full contract copies), graph time,
+and the message count after the turn (the full contract duplicates the
+history through the messages reducer).
+
+Usage:
+    python -m loadtest.state_bench --turns 0,20,200 --requests 50
+"""
+import argparse
+import contextlib
+import io
+import operator
+import os
+import sys
+import time
+import tracemalloc
+from typing import Annotated, Sequence, TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing reaches Groq, but config refuses to load without a key
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("CHECKPOINTS", "false")
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+import config
+from agent.graph import PolicyAssistantGraph
+from agent.prompts import ROUTER_PROMPT
+from agent.metrics import summarize
+from agent.session_store import create_session_store
+from agent.state import AgentState
+
+
+QUERIES = [
+    ("How many days of annual leave do I get?", "retrieve"),
+    ("Check my leave balance for employee id EMP1234", "tool"),
+    ("Hello!", "general"),
+]
+
+CHUNK_TEXT = "Employees are entitled to 24 days of paid annual leave per calendar year. " * 12
+
+
+class FullCopyState(TypedDict):
+    """
+    AgentState as it was declared for the full-copy contract (only messages had a reducer)
+    """
+    messages: Annotated[Sequence[BaseMessage], operator.add]
+    query: str
+    query_type: str
+    query_boost_keywords: str
+    context: str
+    retrieved_sections: list
+    retrieval_complete: bool
+    next_action: str
+    planned_tool_calls: list
+    tool_calls: list
+    tool_results: list
+    tools_done: bool
+    response: str
+    iteration: int
+
+
+class StubLLM:
+    """
+    Answers the router with the query's route and everything else with a fixed reply
+    """
+
+    def __init__(self):
+        self.route = "general"
+
+    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
+        return self.route if prompt.startswith(ROUTER_PROMPT[:40]) else "Stub answer. " * 20
+
+    def invoke_with_tools(self, prompt, tools, temperature: float = config.TEMPERATURE):
+        return []
+
+
+class StubVectorStore:
+    """
+    Fixed retrieval results, standing in for VectorStoreManager
+    """
+    embeddings = None
+
+    def __init__(self, k: int = 5):
+        self.results = [
+            (Document(page_content=CHUNK_TEXT, metadata={"section_title": f"{i}. Annual Leave", "chunk_id": i}), 0.8)
+            for i in range(k)
+        ]
+
+    def retrieve_with_scores(self, query: str, k: int = 5, adaptive: bool = None):
+        return self.results[:k]
+
+    def add_swap_listener(self, callback):
+        pass
+
+
+class Probe:
+    """
+    Bytes of the dicts and list buffers nodes return
+    """
+
+    def __init__(self):
+        self.copied = 0
+
+    def measure(self, update: dict):
+        if update:
+            self.copied += sys.getsizeof(update) + sum(
+                sys.getsizeof(value) for value in update.values() if isinstance(value, (list, dict))
+            )
+
+
+class DeltaGraph(PolicyAssistantGraph):
+    """
+    The agent with stubbed I/O and a probe on every node's return value
+    """
+
+    def __init__(self, probe: Probe):
+        self.probe = probe
+        super().__init__(StubVectorStore(), create_session_store("memory"), faq_cache=False)
+        self.llm = StubLLM()
+
+    def _timed(self, name, node):
+        timed_node = super()._timed(name, node)
+
+        def probed_node(state):
+            update = timed_node(state)
+            self.probe.measure(update)
+            return update
+
+        return probed_node
+
+
+class FullCopyGraph(DeltaGraph):
+    """
+    The same nodes under the old contract: every node returns the whole state
+    """
+
+    def _build_graph(self, state_schema: type = AgentState, checkpointer=None):
+        return super()._build_graph(FullCopyState, checkpointer)
+
+    # Routing functions typed with this graph's schema, not AgentState
+    def route_decision(self, state: FullCopyState) -> str:
+        return super().route_decision(state)
+
+    def tool_loop_decision(self, state: FullCopyState) -> str:
+        return super().tool_loop_decision(state)
+
+    def _timed(self, name, node):
+        def full_state_node(state):
+            return _as_full_state(state, node(state))
+
+        return super()._timed(name, full_state_node)
+
+
+def _as_full_state(state: dict, update: dict) -> dict:
+    """
+    What an old-style node returned for a delta update
+    """
+    full = {**state, **update}
+    for key in ("messages", "tool_calls", "tool_results"):
+        if key in update:
+            full[key] = [*state.get(key, []), *update[key]]
+    return full
+
+
+def history(turns: int) -> list:
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"Question {turn} about the leave policy and its carry forward rules?"))
+        messages.append(AIMessage(content="Answer. " * 60))
+    return messages
+
+
+def run(agent: DeltaGraph, turns: int, requests: int) -> dict:
+    messages = history(turns)
+    peaks, copied, seconds, message_counts = [], [], [], []
+    for i in range(requests):
+        query, route = QUERIES[i % len(QUERIES)]
+        agent.llm.route = route
+        agent.probe.copied = 0
+        state = agent._initial_state(query, messages)
+
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            final = agent.graph.invoke(state)
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        copied.append(agent.probe.copied)
+        message_counts.append(len(final["messages"]))
+
+    return {
+        "turns": turns,
+        "peak_alloc_kb": sum(peaks) / len(peaks) / 1024,
+        "copied_kb": sum(copied) / len(copied) / 1024,
+        "graph_ms": summarize(seconds)["p50"] * 1000,
+        "messages_after": max(message_counts),
+        "messages_expected": len(messages) + 2
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-state and delta-only node contracts")
+    parser.add_argument("--turns", default="0,20,200", help="Conversation lengths (turns of history)")
+    parser.add_argument("--requests", type=int, default=60, help="Requests per conversation length")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agents = {"full": FullCopyGraph(Probe()), "delta": DeltaGraph(Probe())}
+
+    tracemalloc.start()
+    print(f"{'contract':<10}{'turns':>7}{'peak KB':>10}{'copied KB':>11}{'p50 ms':>9}{'messages':>14}")
+    for turns in (int(value) for value in args.turns.split(",")):
+        for name, agent in agents.items():
+            result = run(agent, turns, args.requests)
+            messages = f"{result['messages_after']}/{result['messages_expected']}"
+            print(f"{name:<10}{turns:>7}{result['peak_alloc_kb']:>10.1f}{result['copied_kb']:>11.1f}"
+                  f"{result['graph_ms']:>9.2f}{messages:>14}")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
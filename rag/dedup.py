@@ -0,0 +1,187 @@
+"""
+Near-duplicate chunk elimination with MinHash and LSH banding.
+
+Policy files overlap (sample_company_policies.txt restates most of the
+per-topic files), so the same paragraph would otherwise be indexed, and
+retrieved, several times. Each chunk is reduced to a MinHash signature of its
+word shingles; signatures are cut into bands and only chunks sharing a band
+bucket are compared, so the pass stays close to linear in the number of
+chunks. Candidate pairs are confirmed with the exact Jaccard similarity of
+their shingle sets. One canonical chunk is kept per group, with provenance
+back to every source that contained it.
+"""
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+import config
+
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3  # Words per shingle
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Metadata added to canonical chunks
+PROVENANCE_KEYS = ("sources", "duplicates")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """
+    Hashed word n-grams of a chunk, after lowercasing and dropping punctuation
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    MinHash signatures from a fixed family of universal hash permutations
+    """
+
+    def __init__(self, num_perm: int = config.DEDUP_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        if not shingle_set:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * value + b) % _PRIME) & _MAX_HASH for value in shingle_set)
+            for a, b in self.permutations
+        )
+
+
+def near_duplicate_groups(texts: List[str],
+                          threshold: float = config.DEDUP_THRESHOLD,
+                          num_perm: int = config.DEDUP_NUM_PERM,
+                          bands: int = config.DEDUP_BANDS) -> List[List[int]]:
+    """
+    Groups of texts whose shingle sets are at least threshold similar
+
+    Args:
+        texts: Chunk texts
+        threshold: Minimum Jaccard similarity for two chunks to count as duplicates
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must divide evenly)
+
+    Returns:
+        Lists of indices into texts, one per group of two or more, in index order
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    rows = num_perm // bands
+
+    hasher = MinHasher(num_perm)
+    shingle_sets = [shingles(text) for text in texts]
+    signatures = [hasher.signature(shingle_set) for shingle_set in shingle_sets]
+
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for index, signature in enumerate(signatures):
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+
+    # Union-find over confirmed pairs
+    parent = list(range(len(texts)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for position, first in enumerate(members):
+            for second in members[position + 1:]:
+                if (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                if find(first) != find(second) and jaccard(shingle_sets[first], shingle_sets[second]) >= threshold:
+                    parent[find(second)] = find(first)
+
+    groups = defaultdict(list)
+    for index in range(len(texts)):
+        groups[find(index)].append(index)
+    return sorted((group for group in groups.values() if len(group) > 1), key=lambda group: group[0])
+
+
+def _provenance(doc: Document) -> dict:
+    metadata = doc.metadata
+    return {
+        "source": metadata.get("source", "Unknown"),
+        "chunk_id": metadata.get("chunk_id"),
+        "section_title": metadata.get("section_title", ""),
+        "start_byte": metadata.get("start_byte"),
+        "end_byte": metadata.get("end_byte"),
+    }
+
+
+def deduplicate_chunks(chunks: List[Document],
+                       vectors: Optional[List[List[float]]] = None,
+                       threshold: float = config.DEDUP_THRESHOLD) -> Tuple[List[Document], Optional[List[List[float]]]]:
+    """
+    Keep one canonical chunk per group of near-duplicates
+
+    The longest chunk of a group is kept (the earliest on ties). It is
+    returned as a copy whose metadata lists every source file in "sources"
+    and the dropped chunks in "duplicates"; input chunks are not modified.
+
+    Args:
+        chunks: Chunk Documents from split_documents
+        vectors: Embedding for each chunk, filtered alongside chunks if given
+        threshold: Minimum Jaccard similarity for two chunks to count as duplicates
+
+    Returns:
+        Tuple of (kept chunks, their vectors or None), in input order
+    """
+    if not config.DEDUP_CHUNKS or len(chunks) < 2:
+        return chunks, vectors
+
+    groups = near_duplicate_groups([chunk.page_content for chunk in chunks], threshold=threshold)
+    if not groups:
+        return chunks, vectors
+
+    canonical: Dict[int, Document] = {}
+    dropped = set()
+    for group in groups:
+        keep = max(group, key=lambda index: (len(chunks[index].page_content), -index))
+        others = [index for index in group if index != keep]
+        sources = dict.fromkeys(chunks[index].metadata.get("source", "Unknown") for index in group)
+        canonical[keep] = Document(
+            page_content=chunks[keep].page_content,
+            metadata={
+                **chunks[keep].metadata,
+                "sources": list(sources),
+                "duplicates": [_provenance(chunks[index]) for index in others]
+            }
+        )
+        dropped.update(others)
+
+    kept = [index for index in range(len(chunks)) if index not in dropped]
+    print(f"🧹 Removed {len(dropped)} near-duplicate chunk(s): {len(chunks)} → {len(kept)}")
+
+    kept_chunks = [canonical.get(index, chunks[index]) for index in kept]
+    kept_vectors = [vectors[index] for index in kept] if vectors is not None else None
+    return kept_chunks, kept_vectors
@@ -3,10 +3,11 @@ Document loader for PDF files
 """
 import os
 from typing import List
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 import config
+from rag.pdf_cache import load_pdf
+from rag.splitter import PolicySplitter
+from rag.tokens import token_report
 
 
 def load_documents(folder_path: str = config.DOCS_FOLDER) -> List[Document]:
@@ -27,16 +28,9 @@ def load_documents(folder_path: str = config.DOCS_FOLDER) -> List[Document]:
         print(f"⚠️  Created empty folder: {folder_path}")
         return []
 
-    # Get all files in the folder (excluding subdirectories like semantic_reasoning/)
-    all_items = os.listdir(folder_path)
-
-    # Filter for actual policy documents only (TXT and PDF files at root level of docs/)
-    pdf_files = [f for f in all_items if f.endswith('.pdf') and os.path.isfile(os.path.join(folder_path, f))]
-    txt_files = [f for f in all_items if f.endswith('.txt') and os.path.isfile(os.path.join(folder_path, f))]
-
-    # Exclude documentation and meta files
-    exclude_files = {'semantic_reasoning', '__pycache__', '.gitkeep'}
-    txt_files = [f for f in txt_files if not any(excl in f for excl in exclude_files)]
+    files = list_document_files(folder_path)
+    pdf_files = [os.path.basename(f) for f in files if f.endswith('.pdf')]
+    txt_files = [os.path.basename(f) for f in files if f.endswith('.txt')]
 
     if not pdf_files and not txt_files:
         print("⚠️  No document files found in the docs folder")
@@ -59,21 +53,18 @@ def load_documents(folder_path: str = config.DOCS_FOLDER) -> List[Document]:
     documents = []
 
     try:
-        # Load PDF files
+        # Load PDF files (parsed text is cached by content hash)
         if pdf_files:
             print(f"\n📄 Loading {len(pdf_files)} PDF file(s)...")
-            pdf_loader = DirectoryLoader(
-                folder_path,
-                glob="*.pdf",  # Only root level PDFs, not subdirectories
-                loader_cls=PyPDFLoader,
-                show_progress=True
-            )
-            try:
-                pdf_docs = pdf_loader.load()
-                documents.extend(pdf_docs)
-                print(f"   ✓ Loaded {len(pdf_docs)} PDF pages")
-            except Exception as e:
-                print(f"   ⚠️  Error loading PDFs: {e}")
+            pdf_page_count = 0
+            for pdf_file in pdf_files:
+                try:
+                    pdf_docs = load_pdf(os.path.join(folder_path, pdf_file))
+                    documents.extend(pdf_docs)
+                    pdf_page_count += len(pdf_docs)
+                except Exception as e:
+                    print(f"   ⚠️  Error loading {pdf_file}: {e}")
+            print(f"   ✓ Loaded {pdf_page_count} PDF pages")
 
         # Load TXT files
         if txt_files:
@@ -104,109 +95,85 @@ def load_documents(folder_path: str = config.DOCS_FOLDER) -> List[Document]:
         return []
 
 
+def list_document_files(folder_path: str = config.DOCS_FOLDER) -> List[str]:
+    """
+    Policy files that belong in the index (TXT and PDF at the root of docs/)
+
+    Args:
+        folder_path: Path to the folder containing document files
+
+    Returns:
+        Sorted list of file paths
+    """
+    if not os.path.exists(folder_path):
+        return []
+
+    # Subdirectories like semantic_reasoning/ are skipped
+    files = [
+        f for f in os.listdir(folder_path)
+        if f.endswith(('.pdf', '.txt')) and os.path.isfile(os.path.join(folder_path, f))
+    ]
+
+    # Exclude documentation and meta files
+    exclude_files = {'semantic_reasoning', '__pycache__', '.gitkeep'}
+    files = [f for f in files if not (f.endswith('.txt') and any(excl in f for excl in exclude_files))]
+
+    return sorted(os.path.join(folder_path, f) for f in files)
+
+
+def load_file(file_path: str) -> List[Document]:
+    """
+    Load a single PDF or TXT policy file
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        List of Document objects (one per PDF page, one per TXT file)
+    """
+    if file_path.endswith('.pdf'):
+        return load_pdf(file_path)
+
+    from langchain_community.document_loaders import TextLoader
+    return TextLoader(file_path, encoding='utf-8').load()
+
+
 def split_documents(documents: List[Document]) -> List[Document]:
     """
-    Split documents into chunks with enhanced metadata
+    Split documents into section-aligned chunks with enhanced metadata
 
     Args:
         documents: List of Document objects
 
     Returns:
         List of chunked Document objects with metadata
+        (chunk_id, section_title, section_path, start_byte, end_byte, doc_name, relevance_boost)
     """
     if not documents:
         return []
 
     print(f"✂️  Splitting documents into chunks...")
 
-    # Use headers to split first - preserves policy sections
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=config.CHUNK_SIZE,
-        chunk_overlap=config.CHUNK_OVERLAP,
-        length_function=len,
-        separators=[
-            "\n====",  # Section separator
-            "\n---",   # Subsection separator
-            "\n\n",    # Paragraph break
-            "\n",      # Line break
-            ". ",      # Sentence
-            " ",       # Word
-            ""         # Character
-        ],
-        keep_separator=True  # Keep separators with content
-    )
-
-    chunks = text_splitter.split_documents(documents)
-
-    # Enhance metadata for better retrieval
-    enhanced_chunks = []
-    current_section = ""
-    doc_section_map = {}  # Track section titles per document
-
-    for i, chunk in enumerate(chunks):
-        # Get document name from source
-        doc_name = chunk.metadata.get('source', 'Unknown').split('/')[-1]
-
-        # Extract section title from content
-        content_lines = chunk.page_content.strip().split('\n')
-        section_title = ""
-
-        # Check if first line looks like a section header
-        if content_lines:
-            first_line = content_lines[0].strip()
-            # More flexible header detection - look for any numbered/formatted lines
-            header_keywords = [
-                'Policy', 'POLICY', 'Leave', 'Leave Policy', 'Code of Conduct',
-                'IT Security', 'Security', 'Access', 'Password', 'Authentication',
-                'Multi-Factor', 'MFA', 'Incident', 'Prohibited', 'Actions',
-                'Expense', 'Reimbursement', 'Remote', 'Work', 'Health', 'Safety',
-                'Development', 'Review', 'Conduct', 'Equipment', 'Core Hours'
-            ]
-
-            # Check multiple conditions for section headers
-            is_header = (
-                (first_line and len(first_line) > 2) and (
-                    (first_line[0].isdigit() and '. ' in first_line) or  # "1. Title"
-                    first_line.isupper() or  # ALL CAPS
-                    first_line.endswith(':') or  # Title:
-                    any(keyword in first_line for keyword in header_keywords) or  # Has policy keywords
-                    ('it_security' in doc_name and any(kw in first_line for kw in ['Password', 'Authentication', 'Access', 'Incident', 'Prohibited']))
-                )
-            )
-
-            if is_header:
-                section_title = first_line.rstrip(':').strip()
-                current_section = section_title
-                doc_section_map[doc_name] = section_title
-
-        # Use previously detected section if not found in this chunk
-        if not section_title and current_section:
-            section_title = current_section
-        elif not section_title and doc_name in doc_section_map:
-            section_title = doc_section_map[doc_name]
-
-        # Add enhanced metadata
-        chunk.metadata['chunk_id'] = i
-        chunk.metadata['section_title'] = section_title
-        chunk.metadata['doc_name'] = doc_name
-        chunk.metadata['relevance_boost'] = 1.0  # Default relevance weight
-
-        # Boost relevance for key policy sections
-        if section_title:
-            section_lower = section_title.lower()
-            if any(keyword in section_lower for keyword in ['sick', 'leave', 'medical', 'health', 'illness']):
-                chunk.metadata['relevance_boost'] = 1.3
-            elif any(keyword in section_lower for keyword in ['annual', 'vacation', 'holiday', 'time off']):
-                chunk.metadata['relevance_boost'] = 1.2
-            elif any(keyword in section_lower for keyword in ['security', 'password', 'authentication', 'it', 'access']):
-                chunk.metadata['relevance_boost'] = 1.15
-
-        enhanced_chunks.append(chunk)
+    # One pass per document over its ==== / --- / numbered section structure
+    if config.RETRIEVAL_MODE == "parent":
+        # Small indexed passages inside section-sized parents (see rag.parents)
+        splitter = PolicySplitter.for_parent_retrieval()
+    else:
+        splitter = PolicySplitter()
+    enhanced_chunks = splitter.split_documents(documents)
 
     print(f"✓ Created {len(enhanced_chunks)} chunks with enhanced metadata")
     sections_found = set(c.metadata.get('section_title', 'N/A') for c in enhanced_chunks if c.metadata.get('section_title'))
     print(f"  Sections indexed: {', '.join(list(sections_found)[:10])}")
 
+    report = token_report([c.page_content for c in enhanced_chunks])
+    if report:
+        print(f"  Tokens per chunk: mean {report['mean_tokens']}, max {report['max_tokens']} "
+              f"(limit {report['limit']}, fill {report['fill_ratio']:.0%})")
+        if report['over_limit']:
+            print(f"  ⚠️  {report['over_limit']} chunk(s) exceed the embedding limit; "
+                  f"{report['truncated_tokens']} token(s) will be truncated")
+
     return enhanced_chunks
 
 
@@ -0,0 +1,183 @@
+"""
+Parent-document (small-to-big) retrieval.
+
+In "parent" retrieval mode the index holds small child passages, which match
+queries precisely, and retrieval returns the sections they came from. Each
+child records its parent as character offsets into its source text
+(parent_start / parent_end), so the parent store only keeps each document's
+text once; parents are sliced out on demand. Expansion stops at the
+PARENT_EXPANSION_BUDGET for the unit chunks were sized in, so context stays
+bounded without lowering k.
+"""
+import json
+import os
+import tempfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+import config
+from rag.tokens import get_sizer
+
+
+PARENT_STORE_FILE = "parents.json.z"
+
+# Child-only fields that do not describe the returned parent
+CHILD_KEYS = ("chunk_id", "start_byte", "end_byte", "token_count", "parent_start", "parent_end", "parent_size")
+
+
+def _part(metadata: dict) -> str:
+    """
+    Key of one loaded document within its source file (the page for PDFs)
+    """
+    page = metadata.get("page")
+    return "" if page is None else str(page)
+
+
+class ParentStore:
+    """
+    Source texts addressed by (source, page); parents are offsets into them
+    """
+
+    def __init__(self, texts: Optional[Dict[str, Dict[str, str]]] = None, unit: str = "tokens"):
+        """
+        Args:
+            texts: {source: {page: text}} ("" for files without pages)
+            unit: Unit of the parent_size recorded on children
+        """
+        self.texts: Dict[str, Dict[str, str]] = texts or {}
+        self.unit = unit
+
+    @staticmethod
+    def texts_for(documents: List[Document]) -> Dict[str, Dict[str, str]]:
+        """
+        {source: {page: text}} for loaded documents, as split_documents receives them
+        """
+        texts = {}
+        for document in documents:
+            source = document.metadata.get("source", "Unknown")
+            texts.setdefault(source, {})[_part(document.metadata)] = document.page_content
+        return texts
+
+    @property
+    def budget(self) -> int:
+        if self.unit == "tokens":
+            return config.PARENT_EXPANSION_BUDGET_TOKENS
+        return config.PARENT_EXPANSION_BUDGET
+
+    def parent_text(self, metadata: dict) -> Optional[str]:
+        text = self.texts.get(metadata.get("source", "Unknown"), {}).get(_part(metadata))
+        if text is None or metadata.get("parent_start") is None:
+            return None
+        return text[metadata["parent_start"]:metadata["parent_end"]]
+
+    def expand(self, children: List[Document], k: int, budget: int = None) -> List[Document]:
+        """
+        Replace ranked children with their deduplicated parents
+
+        Args:
+            children: Child chunks, best match first
+            k: Maximum number of parents
+            budget: Maximum total parent size in the store's unit (the first parent always fits)
+
+        Returns:
+            Parent Documents in the rank of their best child; children without a
+            stored parent are passed through unchanged
+        """
+        return [parent for parent, _ in self.expand_with_scores([(child, 0.0) for child in children], k, budget)]
+
+    def expand_with_scores(self, children: List[Tuple[Document, float]], k: int,
+                           budget: int = None) -> List[Tuple[Document, float]]:
+        """
+        expand() for (child, score) pairs; each parent gets its best child's score
+        """
+        budget = self.budget if budget is None else budget
+        parents = []
+        positions = {}
+        used = 0
+
+        for child, score in children:
+            metadata = child.metadata
+            text = self.parent_text(metadata)
+            if text is None:
+                # Indexed without a parent (e.g. before parent mode was enabled)
+                parent_key, text, size = id(child), child.page_content, 0
+            else:
+                parent_key = (metadata["source"], _part(metadata), metadata["parent_start"], metadata["parent_end"])
+                size = metadata.get("parent_size") or 0
+
+            if parent_key in positions:
+                parents[positions[parent_key]][0].metadata["matched_children"] += 1
+                continue
+            if len(parents) >= k or (parents and used + size > budget):
+                continue
+
+            used += size
+            positions[parent_key] = len(parents)
+            parents.append((Document(
+                page_content=text,
+                metadata={
+                    **{key: value for key, value in metadata.items() if key not in CHILD_KEYS},
+                    "parent_size": size,
+                    "matched_children": 1
+                }
+            ), score))
+
+        return parents
+
+    def save(self, path: str):
+        """
+        Write the store as zlib-compressed JSON into the index directory
+        """
+        os.makedirs(path, exist_ok=True)
+        payload = {"unit": self.unit, "texts": self.texts}
+        data = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        fd, tmp_path = tempfile.mkstemp(dir=path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(path, PARENT_STORE_FILE))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ParentStore"]:
+        """
+        Store saved next to an index, or None if the index was built without
+        parents or parent retrieval is off
+        """
+        store_file = os.path.join(path, PARENT_STORE_FILE)
+        if config.RETRIEVAL_MODE != "parent" or not os.path.exists(store_file):
+            return None
+        with open(store_file, "rb") as f:
+            payload = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        return cls(payload["texts"], payload["unit"])
+
+    def get_stats(self) -> dict:
+        return {
+            "unit": self.unit,
+            "sources": len(self.texts),
+            "characters": sum(len(text) for parts in self.texts.values() for text in parts.values())
+        }
+
+
+def save_parent_store(parent_store: Optional[ParentStore], path: str):
+    """
+    Save parent_store into an index directory, or remove a store left there
+    by an earlier parent-mode build so it can't be loaded against this index
+    """
+    if parent_store:
+        parent_store.save(path)
+        return
+
+    store_file = os.path.join(path, PARENT_STORE_FILE)
+    if os.path.exists(store_file):
+        os.remove(store_file)
+        print(f"🧹 Removed stale parent store: {store_file}")
+
+
+def build_parent_store(documents: List[Document]) -> Optional[ParentStore]:
+    """
+    Parent store for the documents being split, or None outside parent mode
+    """
+    if config.RETRIEVAL_MODE != "parent":
+        return None
+    return ParentStore(ParentStore.texts_for(documents), unit=get_sizer().unit)
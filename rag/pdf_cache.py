@@ -0,0 +1,134 @@
+"""
+Content-addressed cache of parsed PDF text.
+
+PDF text extraction dominates load_documents. Parsed pages are stored as
+zlib-compressed JSON under PDF_CACHE_DIR, keyed by the SHA-256 of the file
+bytes plus the parser version, so unchanged PDFs are never parsed twice, even
+after a rename. Bumping CACHE_FORMAT_VERSION (or upgrading pypdf) invalidates every
+entry.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from functools import lru_cache
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+import config
+
+
+# Bump when the way pages are extracted or stored changes
+CACHE_FORMAT_VERSION = 1
+
+
+def parser_version() -> str:
+    try:
+        from importlib.metadata import version
+        pypdf_version = version("pypdf")
+    except Exception:
+        pypdf_version = "unknown"
+    return f"PyPDFLoader/pypdf-{pypdf_version}/v{CACHE_FORMAT_VERSION}"
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's bytes, read in blocks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """
+    On-disk cache of PyPDFLoader output
+    """
+
+    def __init__(self, cache_dir: str = config.PDF_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.version = parser_version()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _entry_path(self, content_hash: str) -> str:
+        key = hashlib.sha256(f"{content_hash}:{self.version}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.z")
+
+    def get(self, content_hash: str, source: str) -> Optional[List[Document]]:
+        path = self._entry_path(content_hash)
+        try:
+            with open(path, "rb") as f:
+                pages = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"⚠️  Ignoring unreadable PDF cache entry {path}: {e}")
+            return None
+
+        # Source is not part of the key: the same bytes may live under another name
+        return [
+            Document(page_content=content, metadata={**metadata, "source": source})
+            for content, metadata in pages
+        ]
+
+    def put(self, content_hash: str, documents: List[Document]):
+        pages = [
+            [doc.page_content, {k: v for k, v in doc.metadata.items() if k != "source"}]
+            for doc in documents
+        ]
+        data = zlib.compress(json.dumps(pages, separators=(",", ":")).encode("utf-8"))
+
+        path = self._entry_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent builds never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Could not write PDF cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load(self, path: str) -> List[Document]:
+        """
+        Pages of a PDF, parsed only if this exact content has not been seen
+
+        Args:
+            path: PDF file path
+
+        Returns:
+            List of Document objects, one per page
+        """
+        content_hash = file_hash(path)
+        documents = self.get(content_hash, path)
+        if documents is not None:
+            self.stats["hits"] += 1
+            return documents
+
+        self.stats["misses"] += 1
+        from langchain_community.document_loaders import PyPDFLoader
+        documents = PyPDFLoader(path).load()
+        self.put(content_hash, documents)
+        return documents
+
+
+@lru_cache(maxsize=1)
+def get_pdf_cache() -> PDFTextCache:
+    return PDFTextCache()
+
+
+def load_pdf(path: str) -> List[Document]:
+    """
+    Load a PDF through the shared cache (or directly when PDF_CACHE is off)
+    """
+    if not config.PDF_CACHE:
+        from langchain_community.document_loaders import PyPDFLoader
+        return PyPDFLoader(path).load()
+
+    return get_pdf_cache().load(path)
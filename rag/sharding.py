@@ -0,0 +1,387 @@
+"""
+Sharded FAISS index with scatter-gather search.
+
+Chunks are partitioned into N shards by document, department or hash. Each
+shard is served by its own worker process that holds only that shard's index
+and talks to the coordinator over a private pipe; the coordinator embeds the
+query once, fans the vector out to every shard, and merges the per-shard
+top-k within a deadline. Slow or failed shards are left out of the result
+instead of failing the query, and dead workers are restarted.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing.connection import wait
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import config
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+class _VectorOnlyEmbeddings(Embeddings):
+    """
+    Placeholder for shard workers, which only ever search by vector
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError("Shard workers receive query vectors, not text")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError("Shard workers receive query vectors, not text")
+
+
+def shard_for(document: Document, num_shards: int, strategy: str = config.SHARD_STRATEGY) -> int:
+    """
+    Stable shard assignment for a chunk
+
+    Args:
+        document: Chunk with metadata
+        num_shards: Number of shards
+        strategy: "document", "department" or "hash"
+
+    Returns:
+        Shard index in [0, num_shards)
+    """
+    if strategy == "document":
+        key = document.metadata.get("doc_name") or document.metadata.get("source", "")
+    elif strategy == "department":
+        key = document.metadata.get("department") or document.metadata.get("doc_name", "")
+    elif strategy == "hash":
+        key = f"{document.metadata.get('source', '')}:{document.metadata.get('chunk_id', '')}:{document.page_content}"
+    else:
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:8], 16) % num_shards
+
+
+def build_shards(documents: List[Document], embeddings: Embeddings, path: str,
+                 num_shards: int = config.VECTOR_STORE_SHARDS,
+                 strategy: str = config.SHARD_STRATEGY,
+                 vectors: Optional[List[List[float]]] = None) -> List[str]:
+    """
+    Embed chunks once and write one FAISS index per shard
+
+    The shards and manifest are written in place. VectorStoreManager builds
+    into a staging directory and moves it over SHARDED_STORE_PATH, so the
+    served directory is never half written.
+
+    Args:
+        documents: Chunks to index
+        embeddings: Embedding model
+        path: Directory for the shard indexes (a new, empty one)
+        num_shards: Number of shards
+        strategy: Partitioning strategy
+        vectors: Precomputed embeddings for documents (embedded here if None)
+
+    Returns:
+        Paths of the non-empty shards
+    """
+    print(f"🔨 Building {num_shards} shard(s) by {strategy} from {len(documents)} chunks...")
+
+    if vectors is None:
+        vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+
+    groups = defaultdict(list)
+    for doc, vector in zip(documents, vectors):
+        groups[shard_for(doc, num_shards, strategy)].append((doc, vector))
+
+    os.makedirs(path, exist_ok=True)
+    shard_names = []
+    for shard_id in sorted(groups):
+        members = groups[shard_id]
+        store = FAISS.from_embeddings(
+            text_embeddings=[(doc.page_content, vector) for doc, vector in members],
+            embedding=embeddings,
+            metadatas=[doc.metadata for doc, _ in members]
+        )
+        shard_name = f"shard_{shard_id}"
+        store.save_local(os.path.join(path, shard_name))
+        shard_names.append(shard_name)
+        print(f"   ✓ Shard {shard_id}: {len(members)} chunks")
+
+    # Relative to the manifest, so the directory can be moved into place
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump({"num_shards": num_shards, "strategy": strategy, "shards": shard_names}, f, indent=2)
+
+    return [os.path.join(path, name) for name in shard_names]
+
+
+def load_shard_paths(path: str = config.SHARDED_STORE_PATH) -> List[str]:
+    """
+    Shard paths from a manifest written by build_shards (empty if missing)
+    """
+    manifest = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest):
+        return []
+    with open(manifest) as f:
+        # Older manifests list paths including the directory
+        return [os.path.join(path, os.path.basename(entry)) for entry in json.load(f)["shards"]]
+
+
+def _shard_worker(shard_id: int, path: str, connection):
+    """
+    Worker process: load one shard and answer vector searches until told to stop
+    """
+    try:
+        store = FAISS.load_local(path, _VectorOnlyEmbeddings(), allow_dangerous_deserialization=True)
+    except Exception as e:
+        connection.send(("error", None, f"load failed: {e}"))
+        return
+
+    connection.send(("ready", store.index.ntotal, None))
+
+    while True:
+        try:
+            item = connection.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+
+        request_id, vector, k = item
+        try:
+            results = store.similarity_search_with_score_by_vector(vector, k=k)
+            payload = [(doc.page_content, doc.metadata, float(score)) for doc, score in results]
+            connection.send((request_id, payload, None))
+        except Exception as e:
+            connection.send((request_id, None, str(e)))
+
+
+class ProcessShard:
+    """
+    Handle to one shard served by a local worker process.
+
+    A remote shard node would implement the same submit/is_alive/restart/stop
+    contract over the network; the coordinator does not care which it talks to.
+    """
+
+    def __init__(self, shard_id: int, path: str, context):
+        self.shard_id = shard_id
+        self.path = path
+        self.context = context
+        self.size = 0
+        self.ready = False
+        self.failed = False
+        self._send_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_shard_worker,
+            args=(self.shard_id, self.path, child_connection),
+            name=f"shard-{self.shard_id}",
+            daemon=True
+        )
+        self.process.start()
+        # Drop our copy so a dead worker shows up as EOF on self.connection
+        child_connection.close()
+
+    def submit(self, request_id: int, vector: List[float], k: int) -> bool:
+        try:
+            with self._send_lock:
+                self.connection.send((request_id, vector, k))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def restart(self):
+        print(f"⚠️  Shard {self.shard_id} worker died, restarting")
+        self.ready = False
+        self.connection.close()
+        self._start()
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                with self._send_lock:
+                    self.connection.send(None)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+
+class _Gather:
+    """
+    Per-query collection point for shard responses
+    """
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.results = {}
+        self.errors = {}
+        self.done = threading.Event()
+
+    def add(self, shard_id: int, payload, error):
+        if error is not None:
+            self.errors[shard_id] = error
+        else:
+            self.results[shard_id] = payload
+        if len(self.results) + len(self.errors) >= self.expected:
+            self.done.set()
+
+
+class ShardedVectorStore:
+    """
+    Scatter-gather coordinator over shard worker processes
+    """
+
+    def __init__(self, embeddings: Embeddings, shard_paths: List[str],
+                 deadline_seconds: float = config.SHARD_SEARCH_DEADLINE_SECONDS,
+                 startup_timeout: float = 120.0):
+        self.embeddings = embeddings
+        self.deadline_seconds = deadline_seconds
+
+        # spawn: never fork a process that already holds the embedding model's threads
+        context = mp.get_context("spawn")
+        self.shards = [ProcessShard(shard_id, path, context) for shard_id, path in enumerate(shard_paths)]
+
+        self._pending: Dict[int, _Gather] = {}
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._all_ready = threading.Event()
+        self._closed = threading.Event()
+        self.stats = {"searches": 0, "partial_results": 0, "shard_timeouts": 0, "shard_errors": 0, "restarts": 0}
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="shard-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+        print(f"⏳ Starting {len(self.shards)} shard worker(s)...")
+        if not self._all_ready.wait(timeout=startup_timeout):
+            print("⚠️  Not all shard workers reported ready")
+        print(f"✓ Sharded vector store ready: {self.count()} chunks in {len(self.shards)} shard(s)")
+
+    def _dispatch(self):
+        """
+        Route shard responses to the waiting queries
+        """
+        while not self._closed.is_set():
+            # Re-read connections every pass: restarts replace them
+            connections = {shard.connection: shard for shard in self.shards if not shard.connection.closed}
+            try:
+                ready = wait(list(connections), timeout=0.2)
+            except OSError:
+                # A restart closed one of them since the list was built
+                continue
+
+            for connection in ready:
+                shard = connections[connection]
+                try:
+                    request_id, payload, error = connection.recv()
+                except (EOFError, OSError):
+                    # Worker died; search_with_scores restarts it on the next query
+                    shard.ready = False
+                    connection.close()
+                    continue
+
+                if request_id in ("ready", "error"):
+                    if request_id == "ready":
+                        shard.ready, shard.size = True, payload
+                    else:
+                        shard.failed = True
+                        print(f"❌ Shard {shard.shard_id}: {error}")
+                    if all(s.ready or s.failed for s in self.shards):
+                        self._all_ready.set()
+                    continue
+
+                with self._lock:
+                    gather = self._pending.get(request_id)
+                if gather is not None:
+                    gather.add(shard.shard_id, payload, error)
+
+    def count(self) -> int:
+        return sum(shard.size for shard in self.shards)
+
+    def search_with_scores(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """
+        Search all shards and merge the per-shard top-k
+
+        Args:
+            query: Search query
+            k: Number of results
+
+        Returns:
+            List of (document, distance) pairs, best first
+        """
+        vector = self.embeddings.embed_query(query)
+
+        live = []
+        with self._lock:
+            for shard in self.shards:
+                if shard.failed:
+                    continue
+                if not shard.is_alive():
+                    shard.restart()
+                    self.stats["restarts"] += 1
+                elif shard.ready:
+                    live.append(shard)
+
+        request_id = next(self._request_ids)
+        gather = _Gather(expected=len(live))
+        with self._lock:
+            self._pending[request_id] = gather
+
+        for shard in live:
+            if not shard.submit(request_id, vector, k):
+                gather.add(shard.shard_id, None, "send failed")
+
+        if live:
+            gather.done.wait(timeout=self.deadline_seconds)
+
+        with self._lock:
+            self._pending.pop(request_id, None)
+            results = dict(gather.results)
+            errors = dict(gather.errors)
+            timed_out = [shard.shard_id for shard in live if shard.shard_id not in results and shard.shard_id not in errors]
+            self.stats["searches"] += 1
+            self.stats["shard_timeouts"] += len(timed_out)
+            self.stats["shard_errors"] += len(errors)
+            partial = len(results) < len(self.shards)
+            if partial:
+                self.stats["partial_results"] += 1
+
+        if partial:
+            print(f"⚠️  Partial results: {len(results)}/{len(self.shards)} shard(s) answered")
+
+        candidates = [
+            (score, Document(page_content=content, metadata=metadata))
+            for payload in results.values()
+            for content, metadata, score in payload
+        ]
+        # FAISS returns L2 distances: smaller is better
+        best = heapq.nsmallest(k, candidates, key=lambda item: item[0])
+        return [(doc, score) for score, doc in best]
+
+    def search(self, query: str, k: int = 5) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "shards": len(self.shards),
+                "ready_shards": sum(1 for shard in self.shards if shard.ready)
+            }
+
+    def close(self):
+        self._closed.set()
+        self._dispatcher.join(timeout=1)
+        for shard in self.shards:
+            shard.stop()
@@ -0,0 +1,372 @@
+"""
+Structure-aware splitter for policy documents.
+
+Policy files are a title line followed by sections, marked either by banner
+lines ("====" around a title, "---" before a subsection) or by numbered
+headers ("1. Annual Leave", "2.1 Carry Forward"). PolicySplitter walks each
+document once, line by line, tracking the section path as it goes, and packs
+whole paragraphs into chunks that never cross a section boundary. Every chunk
+records its exact section path, start/end byte offsets into the source text
+and a document-local ID.
+
+With a parent_size, sections are first packed into parent spans of up to
+parent_size and chunks (the indexed children) are packed within them; each
+child records its parent's character offsets for rag.parents.
+
+Benchmark:
+    python -m rag.splitter --repeat 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from rag.tokens import chunk_size_limits, get_sizer, parent_size_limits
+
+
+BANNER_PATTERN = re.compile(r"^\s*(={3,}|-{3,})\s*$")
+NUMBERED_HEADER_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)*)\.?\s+(\S.{0,78})$")
+
+# Section keywords that raise a chunk's relevance_boost
+BOOST_RULES = [
+    (('sick', 'leave', 'medical', 'health', 'illness'), 1.3),
+    (('annual', 'vacation', 'holiday', 'time off'), 1.2),
+    (('security', 'password', 'authentication', 'it', 'access'), 1.15),
+]
+
+
+def relevance_boost(section_title: str) -> float:
+    """
+    Retrieval weight for a chunk based on its section title
+    """
+    section_lower = section_title.lower()
+    for keywords, boost in BOOST_RULES:
+        if any(keyword in section_lower for keyword in keywords):
+            return boost
+    return 1.0
+
+
+def _header_level(line: str) -> Optional[int]:
+    """
+    Section depth of a numbered header line ("1. X" -> 1, "2.1 X" -> 2), else None
+    """
+    match = NUMBERED_HEADER_PATTERN.match(line)
+    if not match:
+        return None
+    title = match.group(2).rstrip()
+    # Numbered sentences ("1. Submit the form to HR.") are list items, not headers
+    if title.endswith(('.', ',', ';')):
+        return None
+    return match.group(1).count(".") + 1
+
+
+class PolicySplitter:
+    """
+    Single-pass splitter that follows the section structure of policy files
+    """
+
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None, sizer=None, parent_size: int = None):
+        """
+        Args:
+            chunk_size: Maximum chunk size in the sizer's unit (config default for the unit if None)
+            chunk_overlap: Trailing paragraphs up to this size are repeated in the next chunk
+            sizer: CharSizer or TokenSizer (the configured one if None)
+            parent_size: Maximum parent span size; None disables parent spans
+        """
+        self.sizer = sizer or get_sizer()
+        default_size, default_overlap = chunk_size_limits(self.sizer)
+        self.chunk_size = chunk_size or default_size
+        self.chunk_overlap = default_overlap if chunk_overlap is None else chunk_overlap
+        self.parent_size = parent_size
+
+    @classmethod
+    def for_parent_retrieval(cls, sizer=None) -> "PolicySplitter":
+        """
+        Splitter producing small children within config-sized parents
+        """
+        sizer = sizer or get_sizer()
+        child_size, parent_size = parent_size_limits(sizer)
+        return cls(chunk_size=child_size, chunk_overlap=0, sizer=sizer, parent_size=parent_size)
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents into section-aligned chunks
+
+        Args:
+            documents: Loaded documents (one per TXT file or PDF page)
+
+        Returns:
+            List of chunk Documents with section and offset metadata
+        """
+        chunks = []
+        local_ids = {}
+        for document in documents:
+            source = document.metadata.get('source', 'Unknown')
+            # PDF pages share a source; keep IDs unique within the file
+            first_id = local_ids.get(source, 0)
+            document_chunks = self.split_text(document.page_content, document.metadata, first_id)
+            local_ids[source] = first_id + len(document_chunks)
+            chunks.extend(document_chunks)
+        return chunks
+
+    def split_text(self, text: str, metadata: dict = None, first_id: int = 0) -> List[Document]:
+        """
+        Split one document's text
+
+        Args:
+            text: Document text
+            metadata: Metadata copied onto every chunk
+            first_id: First document-local chunk ID
+
+        Returns:
+            List of chunk Documents
+        """
+        metadata = metadata or {}
+        doc_name = metadata.get('source', 'Unknown').split('/')[-1]
+        byte_offsets = None if text.isascii() else list(accumulate((len(ch.encode('utf-8')) for ch in text), initial=0))
+
+        def to_bytes(position: int) -> int:
+            return position if byte_offsets is None else byte_offsets[position]
+
+        chunks = []
+
+        def emit(path: List[str], start: int, end: int, size: int, parent: Tuple[int, int, int] = None):
+            section_title = path[-1] if path else ""
+            extra = {'token_count': size} if self.sizer.unit == "tokens" else {}
+            if parent:
+                extra.update(parent_start=parent[0], parent_end=parent[1], parent_size=parent[2])
+            chunks.append(Document(
+                page_content=text[start:end],
+                metadata={
+                    **metadata,
+                    **extra,
+                    'chunk_id': first_id + len(chunks),
+                    'doc_name': doc_name,
+                    'section_title': section_title,
+                    'section_path': list(path),
+                    'start_byte': to_bytes(start),
+                    'end_byte': to_bytes(end),
+                    'relevance_boost': relevance_boost(section_title),
+                }
+            ))
+
+        for path, blocks in self._sections(text):
+            # A preamble holding only the document title adds nothing: it is on every section path
+            if len(path) == 1 and len(blocks) == 1 and text[blocks[0][0]:blocks[0][1]].strip() == path[0]:
+                continue
+            if not self.parent_size:
+                for start, end, size in self._pack(text, blocks):
+                    emit(path, start, end, size)
+                continue
+
+            for parent in self._pack(text, blocks, self.parent_size, 0):
+                parent_start, parent_end = parent[0], parent[1]
+                # Paragraphs broken across parents are clipped to the parent span
+                child_blocks = [
+                    (max(start, parent_start), min(end, parent_end))
+                    for start, end in blocks if start < parent_end and end > parent_start
+                ]
+                for start, end, size in self._pack(text, child_blocks):
+                    emit(path, start, end, size, parent)
+
+        return chunks
+
+    def _sections(self, text: str):
+        """
+        One pass over the lines, yielding (section path, paragraph spans) per section.
+        Spans are (start, end) character offsets into text.
+        """
+        path: List[str] = []
+        blocks: List[Tuple[int, int]] = []
+        block_start = block_end = None
+        announced = None  # banner character seen just before a possible title line
+        in_banner_title = False  # title consumed after "====", the next banner closes it
+        position = 0
+
+        for line in text.splitlines(keepends=True):
+            line_start, position = position, position + len(line)
+            stripped = line.strip()
+
+            if not stripped:
+                if block_start is not None:
+                    blocks.append((block_start, block_end))
+                    block_start = None
+                continue
+
+            banner = BANNER_PATTERN.match(line)
+            if banner:
+                if block_start is not None:
+                    blocks.append((block_start, block_end))
+                    block_start = None
+                announced = None if in_banner_title else banner.group(1)[0]
+                in_banner_title = False
+                continue
+
+            level = None
+            if not path:
+                # First line of the document is its title and the root of every section path
+                path = [stripped]
+            elif announced and len(stripped) <= 80 and not stripped.endswith('.'):
+                level = 1 if announced == "=" else 2
+                in_banner_title = announced == "="
+            else:
+                level = _header_level(stripped)
+                in_banner_title = False
+            announced = None
+
+            if level is not None:
+                if block_start is not None:
+                    blocks.append((block_start, block_end))
+                    block_start = None
+                if blocks:
+                    yield path, blocks
+                blocks = []
+                path = path[:level] + [stripped]
+
+            if block_start is None:
+                block_start = line_start
+            block_end = line_start + len(line.rstrip("\r\n"))
+
+        if block_start is not None:
+            blocks.append((block_start, block_end))
+        if blocks:
+            yield path, blocks
+
+    def _pack(self, text: str, blocks: List[Tuple[int, int]],
+              chunk_size: int = None, chunk_overlap: int = None) -> List[Tuple[int, int, int]]:
+        """
+        Greedily pack consecutive paragraphs of one section into chunk spans,
+        carrying trailing paragraphs up to chunk_overlap into the next chunk.
+        Returns (start, end, size) per chunk. Sizes default to the splitter's.
+
+        Paragraphs and the gaps between them are measured in one batch and
+        summed; both tokenizers in use split on whitespace, so sizes add up.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        chunk_overlap = self.chunk_overlap if chunk_overlap is None else chunk_overlap
+
+        pieces = self._fit(text, blocks, chunk_size)
+        texts = [text[start:end] for start, end in pieces]
+        texts += [text[pieces[i][1]:pieces[i + 1][0]] for i in range(len(pieces) - 1)]
+        sizes = self.sizer.measure(texts)
+        piece_sizes, gap_sizes = sizes[:len(pieces)], sizes[len(pieces):]
+
+        spans = []
+        current: List[int] = []
+        current_size = 0
+
+        for index, size in enumerate(piece_sizes):
+            if current and current_size + gap_sizes[index - 1] + size > chunk_size:
+                spans.append((pieces[current[0]][0], pieces[current[-1]][1], current_size))
+
+                carried, carried_size = [], 0
+                for previous in reversed(current):
+                    extra = piece_sizes[previous] + (gap_sizes[previous] if carried else 0)
+                    if carried_size + extra > chunk_overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_size += extra
+                # Drop the carry if it leaves no room for the new paragraph
+                if carried and carried_size + gap_sizes[index - 1] + size > chunk_size:
+                    carried, carried_size = [], 0
+                current, current_size = carried, carried_size
+
+            current_size += (gap_sizes[index - 1] if current else 0) + size
+            current.append(index)
+
+        if current:
+            spans.append((pieces[current[0]][0], pieces[current[-1]][1], current_size))
+        return spans
+
+    def _fit(self, text: str, blocks: List[Tuple[int, int]], chunk_size: int) -> List[Tuple[int, int]]:
+        """
+        Paragraph spans, with any paragraph longer than chunk_size broken
+        at line, sentence or word boundaries
+        """
+        sizes = self.sizer.measure([text[start:end] for start, end in blocks])
+        pieces = []
+        for (start, end), size in zip(blocks, sizes):
+            if size <= chunk_size:
+                pieces.append((start, end))
+                continue
+
+            piece_start = start
+            while piece_start < end:
+                piece_end = self._break_point(text, piece_start, end, chunk_size)
+                pieces.append((piece_start, piece_end))
+                piece_start = piece_end
+                while piece_start < end and text[piece_start].isspace():
+                    piece_start += 1
+        return pieces
+
+    def _break_point(self, text: str, start: int, end: int, chunk_size: int) -> int:
+        """
+        Furthest boundary after start that keeps the piece within chunk_size
+        """
+        limit = self.sizer.window_end(text, start, chunk_size)
+        if limit >= end:
+            return end
+        limit = max(limit, start + 1)
+
+        for separator in ("\n", ". ", " "):
+            boundary = text.rfind(separator, start, limit)
+            if boundary > start:
+                # Keep the full stop with its sentence
+                return boundary + 1 if separator == ". " else boundary
+        return limit
+
+
+def _benchmark(documents: List[Document], splitter, repeat: int) -> dict:
+    corpus = documents * repeat
+    size = sum(len(doc.page_content.encode('utf-8')) for doc in corpus)
+    start = time.perf_counter()
+    chunks = splitter.split_documents(corpus)
+    elapsed = time.perf_counter() - start
+    return {
+        "documents": len(corpus),
+        "megabytes": round(size / 1e6, 2),
+        "chunks": len(chunks),
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(size / 1e6 / elapsed, 2) if elapsed else None,
+        "chunks_per_second": round(len(chunks) / elapsed) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the policy splitter on docs/")
+    parser.add_argument("--repeat", type=int, default=100, help="Copies of docs/ in the benchmark corpus")
+    parser.add_argument("--folder", default=config.DOCS_FOLDER)
+    args = parser.parse_args()
+
+    from rag.loader import load_documents
+    documents = load_documents(args.folder)
+    if not documents:
+        return
+
+    splitter = PolicySplitter()
+    print(f"\n📊 PolicySplitter ({splitter.chunk_size} {splitter.sizer.unit}): "
+          f"{_benchmark(documents, splitter, args.repeat)}")
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        return
+    baseline = RecursiveCharacterTextSplitter(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        separators=["\n====", "\n---", "\n\n", "\n", ". ", " ", ""],
+        keep_separator=True
+    )
+    print(f"📊 RecursiveCharacterTextSplitter: {_benchmark(documents, baseline, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Chunk sizing in embedding-model tokens.
+
+The embedding model truncates input at EMBEDDING_MAX_TOKENS, so chunk sizes
+are measured with the model's own tokenizer rather than in characters. Only
+the tokenizer is loaded (no model weights); counts are computed in batches
+and cached by text, since the splitter and re-indexing measure the same
+paragraphs repeatedly.
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+import config
+
+
+class CharSizer:
+    """
+    Measures text in characters
+    """
+    unit = "chars"
+
+    def measure(self, texts: List[str]) -> List[int]:
+        return [len(text) for text in texts]
+
+    def window_end(self, text: str, start: int, limit: int) -> int:
+        """
+        Character position where a piece starting at start reaches limit units
+        """
+        return min(start + limit, len(text))
+
+
+class TokenSizer:
+    """
+    Measures text in embedding-model tokens, with a bounded LRU cache of counts.
+    Shared by request threads and the docs watcher, so calls are serialized.
+    """
+    unit = "tokens"
+
+    def __init__(self, model_name: str = config.EMBEDDING_MODEL, cache_size: int = config.TOKEN_CACHE_SIZE):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._offsets_text = None
+        self._offsets = None
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "batches": 0}
+        self._lock = threading.Lock()
+
+    def measure(self, texts: List[str]) -> List[int]:
+        """
+        Token counts (without special tokens), tokenizing uncached texts in one batch
+        """
+        with self._lock:
+            return self._measure(texts)
+
+    def _measure(self, texts: List[str]) -> List[int]:
+        counts: List[Optional[int]] = []
+        missing = []
+        for text in texts:
+            count = self._cache.get(text)
+            if count is None:
+                missing.append(text)
+            else:
+                self._cache.move_to_end(text)
+            counts.append(count)
+
+        self.stats["cache_hits"] += len(texts) - len(missing)
+        if missing:
+            unique = list(dict.fromkeys(missing))
+            encoded = self.tokenizer(unique, add_special_tokens=False)["input_ids"]
+            self.stats["batches"] += 1
+            self.stats["cache_misses"] += len(unique)
+            measured = {text: len(ids) for text, ids in zip(unique, encoded)}
+            self._cache.update(measured)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+            # Read from the batch: a batch larger than the cache evicts its own counts
+            counts = [measured[text] if count is None else count for text, count in zip(texts, counts)]
+
+        return counts
+
+    def window_end(self, text: str, start: int, limit: int) -> int:
+        """
+        Character position where a piece starting at start reaches limit tokens
+        """
+        with self._lock:
+            if text is not self._offsets_text:
+                # Long paragraphs are cut several times in a row; tokenize them once
+                self._offsets_text = text
+                self._offsets = self.tokenizer(
+                    text, add_special_tokens=False, return_offsets_mapping=True
+                )["offset_mapping"]
+            offsets = self._offsets
+
+        first = bisect_left(offsets, (start, start))
+        last = min(first + limit, len(offsets))
+        if last >= len(offsets):
+            return len(text)
+        # End at the start of the first token that no longer fits
+        return offsets[last][0]
+
+
+@lru_cache(maxsize=1)
+def get_sizer(unit: str = config.CHUNK_SIZE_UNIT):
+    """
+    Shared sizer for the configured unit; falls back to characters if the
+    tokenizer cannot be loaded
+    """
+    if unit == "tokens":
+        try:
+            return TokenSizer()
+        except Exception as e:
+            print(f"⚠️  Could not load tokenizer for {config.EMBEDDING_MODEL}, sizing chunks in characters: {e}")
+    return CharSizer()
+
+
+def chunk_size_limits(sizer) -> tuple:
+    """
+    (chunk_size, chunk_overlap) in the sizer's unit
+    """
+    if sizer.unit == "tokens":
+        return config.CHUNK_SIZE_TOKENS, config.CHUNK_OVERLAP_TOKENS
+    return config.CHUNK_SIZE, config.CHUNK_OVERLAP
+
+
+def parent_size_limits(sizer) -> tuple:
+    """
+    (child_size, parent_size) for parent retrieval, in the sizer's unit
+    """
+    if sizer.unit == "tokens":
+        return config.CHILD_CHUNK_SIZE_TOKENS, config.PARENT_CHUNK_SIZE_TOKENS
+    return config.CHILD_CHUNK_SIZE, config.PARENT_CHUNK_SIZE
+
+
+def token_report(texts: List[str], sizer=None) -> dict:
+    """
+    How chunks fit the embedding model's input limit
+
+    Args:
+        texts: Chunk texts
+        sizer: TokenSizer (the shared one if None)
+
+    Returns:
+        Dictionary with token statistics, or an empty dict if no tokenizer is available
+    """
+    sizer = sizer or get_sizer()
+    if sizer.unit != "tokens" or not texts:
+        return {}
+
+    # [CLS] and [SEP] take two of the model's positions
+    limit = config.EMBEDDING_MAX_TOKENS - 2
+    counts = sizer.measure(texts)
+    over = [count for count in counts if count > limit]
+    return {
+        "chunks": len(counts),
+        "mean_tokens": round(sum(counts) / len(counts), 1),
+        "max_tokens": max(counts),
+        "limit": limit,
+        "over_limit": len(over),
+        "truncated_tokens": sum(count - limit for count in over),
+        "fill_ratio": round(sum(min(count, limit) for count in counts) / (limit * len(counts)), 3)
+    }
@@ -1,23 +1,52 @@
 """
 FAISS Vector Store Management
 """
+import gc
+import math
 import os
-from typing import List
+import shutil
+import threading
+import uuid
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 import config
+from rag.parents import ParentStore, build_parent_store, save_parent_store
 
 
 class VectorStoreManager:
     """
-    Manages FAISS vector store for document retrieval
+    Manages FAISS vector store for document retrieval.
+
+    The serving index can be replaced while queries are running: a new index
+    is built off to the side, swapped in under a lock, and the old one is
+    freed once the searches still using it have finished.
     """
 
     def __init__(self):
         self.embeddings = None
         self.vector_store = None
         self.retriever = None
+        self.sharded_store = None
+        self.parent_store = None
+
+        # Each swap starts a new generation; searches pin the generation they started on
+        self.generation = 0
+        self._in_flight = defaultdict(int)
+        self._serving = threading.Condition()
+        self._reload_lock = threading.Lock()
+        self._swap_listeners = []
+        self.reload_status = {
+            "state": "idle",
+            "generation": 0,
+            "last_reload_seconds": None,
+            "last_reload_at": None,
+            "last_error": None
+        }
 
     def initialize_embeddings(self):
         """Initialize HuggingFace embeddings"""
@@ -31,12 +60,13 @@ class VectorStoreManager:
 
         print("✓ Embeddings initialized")
 
-    def create_vector_store(self, documents: List[Document]):
+    def create_vector_store(self, documents: List[Document], parent_store: Optional[ParentStore] = None):
         """
         Create FAISS vector store from documents
 
         Args:
             documents: List of Document chunks
+            parent_store: Source texts for parent retrieval (None to return chunks as indexed)
         """
         if not documents:
             print("⚠️  No documents to index")
@@ -48,14 +78,14 @@ class VectorStoreManager:
         print(f"🔨 Creating FAISS vector store with {len(documents)} chunks...")
 
         try:
-            self.vector_store = FAISS.from_documents(
+            vector_store = FAISS.from_documents(
                 documents=documents,
                 embedding=self.embeddings
             )
 
             # Create retriever with optimized parameters for semantic search
             # Note: We'll override search_kwargs in retrieve method when needed
-            self.retriever = self.vector_store.as_retriever(
+            retriever = vector_store.as_retriever(
                 search_type="similarity",
                 search_kwargs={
                     "k": 5,  # Return top 5 most relevant chunks by default
@@ -64,18 +94,28 @@ class VectorStoreManager:
             )
 
             print("✓ Vector store created successfully")
+            self._swap(vector_store=vector_store, retriever=retriever, parent_store=parent_store)
 
         except Exception as e:
             print(f"❌ Error creating vector store: {e}")
             raise
 
     def save_vector_store(self, path: str = config.VECTOR_STORE_PATH):
-        """Save vector store to disk"""
-        if self.vector_store:
+        """
+        Save vector store to disk.
+        Written to a temporary directory and moved into place, so other
+        processes saving or loading the same path never see a partial index.
+        """
+        vector_store, parent_store = self.vector_store, self.parent_store
+        if vector_store:
+            staging = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
             try:
-                self.vector_store.save_local(path)
+                vector_store.save_local(staging)
+                save_parent_store(parent_store, staging)
+                _replace_directory(staging, path)
                 print(f"✓ Vector store saved to: {path}")
             except Exception as e:
+                shutil.rmtree(staging, ignore_errors=True)
                 print(f"⚠️  Could not save vector store: {e}")
 
     def load_vector_store(self, path: str = config.VECTOR_STORE_PATH):
@@ -89,47 +129,311 @@ class VectorStoreManager:
                 self.initialize_embeddings()
 
             print(f"📂 Loading vector store from: {path}")
-            self.vector_store = FAISS.load_local(
+            vector_store = FAISS.load_local(
                 path,
                 self.embeddings,
                 allow_dangerous_deserialization=True
             )
 
-            self.retriever = self.vector_store.as_retriever(
+            retriever = vector_store.as_retriever(
                 search_type="similarity",
                 search_kwargs={"k": 3}
             )
 
+            parent_store = ParentStore.load(path)
+
             print("✓ Vector store loaded successfully")
+            self._swap(vector_store=vector_store, retriever=retriever, parent_store=parent_store)
             return True
 
         except Exception as e:
             print(f"❌ Error loading vector store: {e}")
             return False
 
-    def retrieve(self, query: str, k: int = 5) -> List[Document]:
+    def create_sharded_store(self, documents: List[Document], num_shards: int = config.VECTOR_STORE_SHARDS,
+                             parent_store: Optional[ParentStore] = None):
         """
-        Retrieve relevant documents for a query using semantic similarity
+        Build per-shard indexes on disk and serve them from worker processes
 
         Args:
-            query: Search query
-            k: Number of documents to return (default: 5 for better semantic coverage)
+            documents: List of Document chunks
+            num_shards: Number of shards
+            parent_store: Source texts for parent retrieval
+        """
+        if not documents:
+            print("⚠️  No documents to index")
+            return
 
-        Returns:
-            List of relevant documents
+        if not self.embeddings:
+            self.initialize_embeddings()
+
+        shard_paths = self._save_shards(documents, parent_store, num_shards=num_shards)
+        self._start_shards(shard_paths, parent_store)
+
+    def load_sharded_store(self, path: str = config.SHARDED_STORE_PATH) -> bool:
+        """Serve previously built shards from worker processes"""
+        from rag.sharding import load_shard_paths
+
+        shard_paths = load_shard_paths(path)
+        if not shard_paths:
+            print(f"⚠️  Sharded vector store not found at: {path}")
+            return False
+
+        if not self.embeddings:
+            self.initialize_embeddings()
+
+        self._start_shards(shard_paths, ParentStore.load(path))
+        return True
+
+    def publish_embeddings(self, documents: List[Document], vectors: List[List[float]],
+                           parent_store: Optional[ParentStore] = None):
+        """
+        Build a new index from already-embedded chunks and swap it in
+
+        Args:
+            documents: List of Document chunks
+            vectors: Embedding for each chunk
+            parent_store: Source texts for parent retrieval
         """
-        if not self.vector_store:
-            print("⚠️  Vector store not initialized")
+        if not documents:
+            print("⚠️  No documents to index")
+            return
+
+        if config.VECTOR_STORE_SHARDS > 0:
+            shard_paths = self._save_shards(documents, parent_store, vectors=vectors)
+            self._start_shards(shard_paths, parent_store)
+            return
+
+        vector_store = FAISS.from_embeddings(
+            text_embeddings=[(doc.page_content, vector) for doc, vector in zip(documents, vectors)],
+            embedding=self.embeddings,
+            metadatas=[doc.metadata for doc in documents]
+        )
+        retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+        self._swap(vector_store=vector_store, retriever=retriever, parent_store=parent_store)
+        self.save_vector_store()
+
+    def export_embeddings(self) -> List[Tuple[Document, List[float]]]:
+        """
+        Chunks and their vectors from the in-process index (empty when sharded)
+        """
+        vector_store = self.vector_store
+        if vector_store is None:
             return []
 
+        return [
+            (vector_store.docstore.search(docstore_id), vector_store.index.reconstruct(position).tolist())
+            for position, docstore_id in vector_store.index_to_docstore_id.items()
+        ]
+
+    def _save_shards(self, documents: List[Document], parent_store: Optional[ParentStore],
+                     num_shards: int = config.VECTOR_STORE_SHARDS,
+                     vectors: Optional[List[List[float]]] = None,
+                     path: str = config.SHARDED_STORE_PATH) -> List[str]:
+        """
+        Write the shards, manifest and parent store to a temporary directory
+        and move it into place, like save_vector_store
+
+        Returns:
+            Paths of the non-empty shards
+        """
+        from rag.sharding import build_shards, load_shard_paths
+
+        staging = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            build_shards(documents, self.embeddings, staging, num_shards=num_shards, vectors=vectors)
+            save_parent_store(parent_store, staging)
+            _replace_directory(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return load_shard_paths(path)
+
+    def _start_shards(self, shard_paths: List[str], parent_store: Optional[ParentStore] = None):
+        from rag.sharding import ShardedVectorStore
+
+        self._swap(sharded_store=ShardedVectorStore(self.embeddings, shard_paths), parent_store=parent_store)
+
+    def add_swap_listener(self, callback):
+        """
+        Call callback(generation) after each new index is swapped in
+        """
+        self._swap_listeners.append(callback)
+
+    def _swap(self, vector_store=None, retriever=None, sharded_store=None, parent_store=None):
+        """
+        Atomically replace the serving index, then retire the old one
+        """
+        with self._serving:
+            old_generation = self.generation
+            old_vector_store, old_sharded_store = self.vector_store, self.sharded_store
+
+            self.vector_store = vector_store
+            self.retriever = retriever
+            self.sharded_store = sharded_store
+            self.parent_store = parent_store
+            self.generation += 1
+            generation = self.generation
+            self.reload_status["generation"] = generation
+
+        for listener in self._swap_listeners:
+            try:
+                listener(generation)
+            except Exception as e:
+                print(f"⚠️  Index swap listener failed: {e}")
+
+        if old_vector_store is not None or old_sharded_store is not None:
+            self._retire(old_generation, old_vector_store, old_sharded_store)
+
+    def _retire(self, generation: int, vector_store, sharded_store):
+        """
+        Wait for searches still running on a replaced index, then free it
+        """
+        with self._serving:
+            drained = self._serving.wait_for(
+                lambda: not self._in_flight.get(generation),
+                timeout=config.VECTOR_STORE_DRAIN_TIMEOUT_SECONDS
+            )
+
+        if not drained:
+            print(f"⚠️  Retiring index generation {generation} with searches still running")
+
+        if sharded_store is not None:
+            sharded_store.close()
+
+        del vector_store, sharded_store
+        gc.collect()
+        print(f"✓ Retired index generation {generation}")
+
+    @contextmanager
+    def _pinned(self):
+        """
+        Snapshot the serving index and keep it alive for one search
+        """
+        with self._serving:
+            generation = self.generation
+            vector_store, sharded_store, parent_store = self.vector_store, self.sharded_store, self.parent_store
+            self._in_flight[generation] += 1
+
         try:
-            # Use similarity_search directly to respect k parameter
-            docs = self.vector_store.similarity_search(query, k=k)
-            return docs
+            yield vector_store, sharded_store, parent_store
+        finally:
+            with self._serving:
+                self._in_flight[generation] -= 1
+                if not self._in_flight[generation]:
+                    del self._in_flight[generation]
+                    self._serving.notify_all()
+
+    @contextmanager
+    def exclusive_publish(self):
+        """
+        Hold off reloads while the caller builds and publishes an index.
+        Reloads requested meanwhile are refused as if one were running, so
+        two publishers can't overlap and swap in an older index last.
+        """
+        with self._reload_lock:
+            yield
 
+    def reload(self, force_rebuild: bool = True) -> Optional[threading.Thread]:
+        """
+        Build or load a new index in the background and swap it in.
+        The current index keeps serving until the swap.
+
+        Args:
+            force_rebuild: Re-read docs/ instead of loading the saved index
+
+        Returns:
+            The background thread, or None if a reload is already running
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            print("⚠️  Vector store reload already in progress")
+            return None
+
+        thread = threading.Thread(
+            target=self._reload,
+            args=(force_rebuild,),
+            name="vector-store-reload",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _reload(self, force_rebuild: bool):
+        start = time.perf_counter()
+        self.reload_status.update(state="building", last_error=None)
+        try:
+            _populate(self, force_rebuild)
+            self.reload_status["last_reload_seconds"] = round(time.perf_counter() - start, 2)
+            self.reload_status["last_reload_at"] = time.time()
+            print(f"✓ Vector store reloaded in {self.reload_status['last_reload_seconds']}s")
         except Exception as e:
-            print(f"❌ Error retrieving documents: {e}")
-            return []
+            self.reload_status["last_error"] = str(e)
+            print(f"❌ Vector store reload failed, still serving generation {self.generation}: {e}")
+        finally:
+            self.reload_status["state"] = "idle"
+            self._reload_lock.release()
+
+    def count(self) -> int:
+        """Number of indexed chunks"""
+        vector_store, sharded_store = self.vector_store, self.sharded_store
+        if sharded_store:
+            return sharded_store.count()
+        if vector_store:
+            return vector_store.index.ntotal
+        return 0
+
+    def is_ready(self) -> bool:
+        return bool(self.sharded_store or self.vector_store)
+
+    def retrieve(self, query: str, k: int = 5, adaptive: bool = None) -> List[Document]:
+        """
+        Retrieve relevant documents for a query using semantic similarity.
+        With a parent store, the best-matching child passages are replaced by
+        their deduplicated parent sections.
+
+        Args:
+            query: Search query
+            k: Number of documents to return (default: 5 for better semantic coverage);
+               an upper bound with adaptive top-k
+            adaptive: Cut results by score distribution (config.ADAPTIVE_TOP_K if None)
+
+        Returns:
+            List of relevant documents
+        """
+        return [doc for doc, _ in self.retrieve_with_scores(query, k, adaptive)]
+
+    def retrieve_with_scores(self, query: str, k: int = 5, adaptive: bool = None) -> List[Tuple[Document, float]]:
+        """
+        Like retrieve, with each document's cosine similarity to the query
+
+        Returns:
+            List of (document, similarity) pairs, best first
+        """
+        adaptive = config.ADAPTIVE_TOP_K if adaptive is None else adaptive
+
+        with self._pinned() as (vector_store, sharded_store, parent_store):
+            if not sharded_store and not vector_store:
+                print("⚠️  Vector store not initialized")
+                return []
+
+            # Several children often share a parent; search more to fill k parents
+            fetch_k = k * config.PARENT_CHILD_FANOUT if parent_store else k
+            try:
+                if sharded_store:
+                    pairs = sharded_store.search_with_scores(query, k=fetch_k)
+                else:
+                    pairs = vector_store.similarity_search_with_score(query, k=fetch_k)
+            except Exception as e:
+                print(f"❌ Error retrieving documents: {e}")
+                return []
+
+            # Embeddings are normalized, so squared L2 distance = 2 - 2 * cosine
+            results = [(doc, 1 - float(distance) / 2) for doc, distance in pairs]
+            results = parent_store.expand_with_scores(results, k) if parent_store else results[:k]
+
+        if adaptive:
+            results = results[:adaptive_k([score for _, score in results])]
+        return results
 
     def similarity_search(self, query: str, k: int = 3) -> List[Document]:
         """
@@ -142,40 +446,124 @@ class VectorStoreManager:
         Returns:
             List of similar documents
         """
-        if not self.vector_store:
-            return []
+        with self._pinned() as (vector_store, sharded_store, _):
+            if sharded_store:
+                return sharded_store.search(query, k=k)
 
-        return self.vector_store.similarity_search(query, k=k)
+            if not vector_store:
+                return []
 
+            return vector_store.similarity_search(query, k=k)
 
-def initialize_vector_store(force_rebuild: bool = False) -> VectorStoreManager:
+
+def adaptive_k(similarities: List[float],
+               strategy: str = config.ADAPTIVE_K_STRATEGY,
+               min_k: int = config.ADAPTIVE_K_MIN) -> int:
     """
-    Initialize or load vector store
+    How many of the ranked results to keep, from their score distribution
+
+    Strategies:
+        "gap": cut at the first drop of at least ADAPTIVE_K_GAP between neighbours
+        "relative": keep results scoring at least ADAPTIVE_K_RELATIVE of the best
+        "mass": keep results until ADAPTIVE_K_MASS of the softmax mass is covered
 
     Args:
-        force_rebuild: Force rebuild from documents
+        similarities: Cosine similarities, best first
+        strategy: Cut criterion
+        min_k: Results always kept
 
     Returns:
-        VectorStoreManager instance
+        Number of results to keep, between min_k and len(similarities)
     """
-    manager = VectorStoreManager()
+    max_k = len(similarities)
+    if max_k <= min_k:
+        return max_k
+
+    if strategy == "gap":
+        keep = next(
+            (i for i in range(min_k, max_k) if similarities[i - 1] - similarities[i] >= config.ADAPTIVE_K_GAP),
+            max_k
+        )
+    elif strategy == "relative":
+        floor = similarities[0] * config.ADAPTIVE_K_RELATIVE
+        keep = sum(1 for score in similarities if score >= floor)
+    elif strategy == "mass":
+        weights = [math.exp((score - similarities[0]) / config.ADAPTIVE_K_TEMPERATURE) for score in similarities]
+        total, covered, keep = sum(weights), 0.0, 0
+        while keep < max_k and covered < config.ADAPTIVE_K_MASS * total:
+            covered += weights[keep]
+            keep += 1
+    else:
+        raise ValueError(f"Unknown adaptive top-k strategy: {strategy}")
+
+    return max(min_k, min(keep, max_k))
+
+
+def _replace_directory(source: str, target: str):
+    """
+    Move directory source to target, replacing what is there
+
+    A rename can't replace a non-empty directory, so the old one is moved
+    aside first; a loader that runs in between finds no index and rebuilds.
+    Retries if another process puts its own copy in place meanwhile.
+    """
+    while True:
+        try:
+            os.rename(source, target)
+            return
+        except OSError:
+            if not os.path.isdir(source) or not os.path.exists(target):
+                raise
+
+        retired = f"{target}.old-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(target, retired)
+        except FileNotFoundError:
+            continue
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def _populate(manager: VectorStoreManager, force_rebuild: bool = False):
+    """
+    Load the saved index into manager, or build one from the documents
+    """
+    sharded = config.VECTOR_STORE_SHARDS > 0
 
     # Try to load existing vector store
-    if not force_rebuild and manager.load_vector_store():
-        return manager
+    if not force_rebuild:
+        if sharded and manager.load_sharded_store():
+            return
+        if not sharded and manager.load_vector_store():
+            return
 
     # Build new vector store
     print("🔄 Building new vector store from documents...")
+    from rag.dedup import deduplicate_chunks
     from rag.loader import load_documents, split_documents
 
     documents = load_documents()
-    chunks = split_documents(documents)
+    chunks, _ = deduplicate_chunks(split_documents(documents))
+    parent_store = build_parent_store(documents)
 
-    if chunks:
-        manager.create_vector_store(chunks)
+    if chunks and sharded:
+        manager.create_sharded_store(chunks, parent_store=parent_store)
+    elif chunks:
+        manager.create_vector_store(chunks, parent_store=parent_store)
         manager.save_vector_store()
     else:
         print("⚠️  No documents to index")
 
-    return manager
 
+def initialize_vector_store(force_rebuild: bool = False) -> VectorStoreManager:
+    """
+    Initialize or load vector store
+
+    Args:
+        force_rebuild: Force rebuild from documents
+
+    Returns:
+        VectorStoreManager instance
+    """
+    manager = VectorStoreManager()
+    _populate(manager, force_rebuild)
+    return manager
@@ -0,0 +1,344 @@
+"""
+Background watcher for the docs/ folder.
+
+Changes are detected with inotify on Linux (via libc, no extra dependency)
+and by periodic scanning elsewhere. Both only wake the indexer: it diffs file
+signatures against what is indexed, waits for the burst of changes to settle,
+then re-parses and re-embeds just the changed files and publishes a new index
+through VectorStoreManager's hot swap. Unchanged files reuse their cached
+vectors, so indexing cost tracks the change rate.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+import config
+from rag.dedup import PROVENANCE_KEYS, deduplicate_chunks
+from rag.loader import list_document_files, load_file, split_documents
+from rag.parents import ParentStore
+from rag.tokens import get_sizer
+from rag.vector_store import VectorStoreManager
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Cheap change signature: (mtime_ns, size), or None if the file is gone
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _open_inotify(folder: str) -> Optional[int]:
+    """
+    inotify file descriptor watching folder, or None where unsupported
+    """
+    library = ctypes.util.find_library("c")
+    if not library:
+        return None
+
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    if libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class IncrementalIndexer:
+    """
+    Per-file cache of chunks and vectors; re-embeds only files that changed
+    """
+
+    def __init__(self, manager: VectorStoreManager, folder: str = config.DOCS_FOLDER):
+        self.manager = manager
+        self.folder = folder
+        self.entries: Dict[str, dict] = {}
+        self.stats = {"syncs": 0, "files_reindexed": 0, "files_removed": 0, "chunks_embedded": 0}
+        self._seed()
+
+    def _seed(self):
+        """
+        Mark files unchanged since the index was saved as already indexed.
+
+        Vectors come from the in-process index when there is one; with a
+        sharded index they are filled in lazily on the first sync. Files with
+        chunks that were merged into another file's canonical copy are split
+        again (without embedding), and the canonical chunk's vector stands in
+        for each merged chunk. Files with nothing in the index produced no
+        chunks and are seeded empty. In parent retrieval mode, files missing
+        from the parent store are not seeded.
+        """
+        sharded = config.VECTOR_STORE_SHARDS > 0
+        if sharded:
+            from rag.sharding import MANIFEST_FILE
+            index_file = os.path.join(config.SHARDED_STORE_PATH, MANIFEST_FILE)
+        else:
+            index_file = os.path.join(config.VECTOR_STORE_PATH, "index.faiss")
+        index_mtime_ns = os.stat(index_file).st_mtime_ns if os.path.exists(index_file) else 0
+        parent_mode = config.RETRIEVAL_MODE == "parent"
+        parent_texts = self.manager.parent_store.texts if self.manager.parent_store else {}
+
+        grouped = defaultdict(list)
+        # Vector of the canonical copy for each merged chunk, by source and chunk ID
+        merged = defaultdict(dict)
+        for doc, vector in self.manager.export_embeddings():
+            for duplicate in doc.metadata.get("duplicates", []):
+                merged[duplicate["source"]][duplicate["chunk_id"]] = vector
+            # Provenance is recomputed on every publish
+            doc = Document(
+                page_content=doc.page_content,
+                metadata={k: v for k, v in doc.metadata.items() if k not in PROVENANCE_KEYS}
+            )
+            grouped[doc.metadata.get("source", "")].append((doc, vector))
+
+        for path in list_document_files(self.folder):
+            signature = file_signature(path)
+            if not signature or signature[0] > index_mtime_ns:
+                continue
+            if parent_mode and path in grouped and path not in parent_texts:
+                continue
+            if path in merged:
+                entry = self._seed_merged(path, grouped.get(path, []), merged[path])
+                if entry:
+                    self.entries[path] = {"signature": signature, **entry}
+            elif path in grouped:
+                self.entries[path] = {
+                    "signature": signature,
+                    "chunks": [doc for doc, _ in grouped[path]],
+                    "vectors": [vector for _, vector in grouped[path]],
+                    "texts": parent_texts.get(path)
+                }
+            elif sharded:
+                self.entries[path] = {"signature": signature, "chunks": None, "vectors": None, "texts": None}
+            elif self.manager.vector_store is not None:
+                # Otherwise every start would re-parse it and publish an identical index
+                self.entries[path] = {"signature": signature, "chunks": [], "vectors": [], "texts": None}
+
+        if self.entries:
+            print(f"✓ Docs watcher seeded from index: {len(self.entries)} file(s)")
+
+    def _seed_merged(self, path: str, indexed: List[tuple], merged: Dict[int, List[float]]) -> Optional[dict]:
+        """
+        Chunks and vectors of a file with merged duplicates, without embedding
+
+        Args:
+            path: Document file
+            indexed: (chunk, vector) pairs the index holds for the file
+            merged: Canonical vector for each of the file's merged chunk IDs
+
+        Returns:
+            Entry fields, or None if a chunk has no vector (the file is then re-embedded)
+        """
+        vectors = {doc.metadata.get("chunk_id"): vector for doc, vector in indexed}
+        vectors.update(merged)
+        try:
+            loaded = load_file(path)
+            chunks = split_documents(loaded)
+        except Exception as e:
+            print(f"⚠️  Could not seed {os.path.basename(path)}: {e}")
+            return None
+
+        chunk_vectors = [vectors.get(chunk.metadata.get("chunk_id")) for chunk in chunks]
+        if not chunks or any(vector is None for vector in chunk_vectors):
+            return None
+        return {"chunks": chunks, "vectors": chunk_vectors, "texts": ParentStore.texts_for(loaded).get(path)}
+
+    def pending_changes(self) -> Tuple[List[str], List[str]]:
+        """
+        Files added or modified, and files removed, since the last sync
+        """
+        current = {path: file_signature(path) for path in list_document_files(self.folder)}
+        changed = [
+            path for path, signature in current.items()
+            if signature and self.entries.get(path, {}).get("signature") != signature
+        ]
+        removed = [path for path in self.entries if path not in current]
+        return changed, removed
+
+    def sync(self) -> bool:
+        """
+        Re-index changed files and publish a new index
+
+        Publishes exclusively, so a manual reload and a watcher publish
+        can't overlap and swap in an older index last.
+
+        Returns:
+            True if a new index was published
+        """
+        with self.manager.exclusive_publish():
+            return self._sync()
+
+    def _sync(self) -> bool:
+        changed, removed = self.pending_changes()
+        if not changed and not removed:
+            return False
+
+        start = time.perf_counter()
+        print(f"🔄 Docs changed: {len(changed)} updated, {len(removed)} removed")
+
+        if not self.manager.embeddings:
+            self.manager.initialize_embeddings()
+
+        for path in removed:
+            del self.entries[path]
+
+        # Files seeded without vectors must be embedded before a full index can be assembled
+        cold = [path for path, entry in self.entries.items() if entry["vectors"] is None and path not in changed]
+
+        for path in changed + cold:
+            signature = file_signature(path)
+            try:
+                loaded = load_file(path)
+                chunks = split_documents(loaded)
+            except Exception as e:
+                # Keep serving the previous version of a file that fails to parse (e.g. half-written)
+                print(f"⚠️  Could not re-index {os.path.basename(path)}: {e}")
+                if self.entries.get(path, {}).get("vectors") is None:
+                    self.entries.pop(path, None)
+                continue
+
+            vectors = self.manager.embeddings.embed_documents([chunk.page_content for chunk in chunks])
+            self.entries[path] = {
+                "signature": signature,
+                "chunks": chunks,
+                "vectors": vectors,
+                "texts": ParentStore.texts_for(loaded).get(path)
+            }
+            self.stats["files_reindexed"] += 1
+            self.stats["chunks_embedded"] += len(chunks)
+
+        documents: List[Document] = []
+        vectors: List[List[float]] = []
+        for path in sorted(self.entries):
+            documents.extend(self.entries[path]["chunks"])
+            vectors.extend(self.entries[path]["vectors"])
+
+        parent_store = None
+        if config.RETRIEVAL_MODE == "parent":
+            parent_store = ParentStore(
+                {path: entry["texts"] for path, entry in self.entries.items() if entry["texts"]},
+                unit=get_sizer().unit
+            )
+
+        documents, vectors = deduplicate_chunks(documents, vectors)
+        self.manager.publish_embeddings(documents, vectors, parent_store)
+        self.stats["syncs"] += 1
+        self.stats["files_removed"] += len(removed)
+        print(f"✓ Incremental re-index done in {time.perf_counter() - start:.2f}s ({len(documents)} chunks)")
+        return True
+
+
+class DocsWatcher:
+    """
+    Background thread that debounces docs/ changes and runs IncrementalIndexer.sync
+    """
+
+    def __init__(self, manager: VectorStoreManager,
+                 folder: str = config.DOCS_FOLDER,
+                 debounce_seconds: float = config.DOCS_WATCH_DEBOUNCE_SECONDS,
+                 poll_seconds: float = config.DOCS_WATCH_POLL_SECONDS):
+        self.folder = folder
+        self.debounce_seconds = debounce_seconds
+        self.poll_seconds = poll_seconds
+        self.indexer = IncrementalIndexer(manager, folder)
+        self._fd = _open_inotify(folder) if os.path.isdir(folder) else None
+        self.backend = "inotify" if self._fd is not None else "polling"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="docs-watcher", daemon=True)
+
+    def start(self) -> "DocsWatcher":
+        self._thread.start()
+        print(f"👀 Watching {self.folder} for changes ({self.backend})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.poll_seconds + 1)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _snapshot(self) -> dict:
+        return {path: file_signature(path) for path in list_document_files(self.folder)}
+
+    def _wait_for_change(self, timeout: float) -> bool:
+        """
+        Block up to timeout; True if the folder changed
+        """
+        if self._fd is not None:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if not readable:
+                return False
+            try:
+                # Event details are not needed: the indexer diffs signatures itself
+                while os.read(self._fd, 64 * 1024):
+                    pass
+            except BlockingIOError:
+                pass
+            return True
+
+        if self._stop.wait(timeout):
+            return False
+        snapshot = self._snapshot()
+        changed = snapshot != self._last_snapshot
+        self._last_snapshot = snapshot
+        return changed
+
+    def _run(self):
+        self._last_snapshot = self._snapshot()
+        # Catch changes made while the process was down
+        changed, removed = self.indexer.pending_changes()
+        dirty = bool(changed or removed)
+        last_change = time.monotonic() - self.debounce_seconds if dirty else 0.0
+
+        while not self._stop.is_set():
+            timeout = self.debounce_seconds if dirty else self.poll_seconds
+            if self._wait_for_change(min(timeout, self.poll_seconds)):
+                dirty, last_change = True, time.monotonic()
+                continue
+
+            if dirty and time.monotonic() - last_change >= self.debounce_seconds:
+                dirty = False
+                try:
+                    self.indexer.sync()
+                except Exception as e:
+                    print(f"❌ Incremental re-index failed: {e}")
+
+    def get_stats(self) -> dict:
+        return {"backend": self.backend, **self.indexer.stats}
+
+
+def start_docs_watcher(manager: VectorStoreManager) -> Optional[DocsWatcher]:
+    """
+    Start the watcher if enabled in config
+    """
+    if not config.WATCH_DOCS:
+        return None
+    return DocsWatcher(manager).start()
@@ -24,10 +24,26 @@ fi
 
 echo "✓ Environment checks passed"
 echo ""
-echo "Starting Streamlit app..."
-echo "=============================================="
-echo ""
 
-# Run streamlit
-.venv/bin/streamlit run app.py
+# Usage: ./start.sh [ui|api]
+MODE=${1:-ui}
+
+if [ "$MODE" = "api" ]; then
+    echo "Starting API server on ${API_HOST:-0.0.0.0}:${API_PORT:-8000} (${API_WORKERS:-2} workers)..."
+    echo "=============================================="
+    echo ""
+
+    # Run the ASGI app; each worker loads its own vector store and graph
+    .venv/bin/uvicorn api.server:app \
+        --host "${API_HOST:-0.0.0.0}" \
+        --port "${API_PORT:-8000}" \
+        --workers "${API_WORKERS:-2}"
+else
+    echo "Starting Streamlit app..."
+    echo "=============================================="
+    echo ""
+
+    # Run streamlit
+    .venv/bin/streamlit run app.py
+fi
 
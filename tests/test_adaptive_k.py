@@ -0,0 +1,60 @@
+import pytest
+from langchain_core.documents import Document
+
+import config
+from rag.vector_store import VectorStoreManager, adaptive_k
+
+SCORES = [0.9, 0.88, 0.6, 0.5]
+
+
+class FixedIndex:
+    """
+    FAISS stand-in returning squared L2 distances for SCORES
+    """
+
+    def similarity_search_with_score(self, query, k=4):
+        return [(Document(page_content=f"chunk {n}"), 2 - 2 * score) for n, score in enumerate(SCORES)][:k]
+
+
+def test_gap_cuts_at_the_first_large_drop():
+    assert adaptive_k(SCORES, strategy="gap") == 2
+    assert adaptive_k([0.9, 0.86, 0.82, 0.78], strategy="gap") == 4
+
+
+def test_relative_keeps_scores_near_the_best():
+    assert adaptive_k(SCORES, strategy="relative") == 2
+    assert adaptive_k([0.9, 0.8, 0.7], strategy="relative") == 2
+
+
+def test_mass_keeps_most_of_the_softmax_weight():
+    assert adaptive_k(SCORES, strategy="mass") == 2
+    assert adaptive_k([0.9, 0.9, 0.9, 0.9], strategy="mass") == 4
+
+
+def test_min_k_is_always_kept():
+    assert adaptive_k([0.9, 0.2, 0.1], strategy="gap", min_k=2) == 2
+    assert adaptive_k([0.9], strategy="gap", min_k=3) == 1
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        adaptive_k(SCORES, strategy="median")
+
+
+@pytest.fixture
+def manager():
+    manager = VectorStoreManager()
+    manager.vector_store = FixedIndex()
+    return manager
+
+
+def test_retrieval_cuts_results_when_adaptive(manager, monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_TOP_K", False)
+
+    assert len(manager.retrieve("leave", k=4)) == 4
+    assert [score for _, score in manager.retrieve_with_scores("leave", k=4, adaptive=True)] == pytest.approx([0.9, 0.88])
+
+    # The server default applies when the caller does not choose
+    monkeypatch.setattr(config, "ADAPTIVE_TOP_K", True)
+    assert len(manager.retrieve("leave", k=4)) == 2
+    assert len(manager.retrieve("leave", k=4, adaptive=False)) == 4
@@ -0,0 +1,140 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+from api.server import app
+
+
+class StubVectorStore:
+    reload_status = {"state": "idle"}
+
+    def __init__(self):
+        self.reloads = []
+
+    def is_ready(self):
+        return True
+
+    def count(self):
+        return 3
+
+    def retrieve_with_scores(self, query, k=5, adaptive=None):
+        doc = Document(page_content="24 days of paid annual leave per year.",
+                       metadata={"section_title": "1. Annual Leave", "doc_name": "Leave Policy",
+                                 "chunk_id": 7, "source": "leave.txt"})
+        return [(doc, 0.812345)][:k]
+
+    def reload(self):
+        # A rebuild is already running
+        return None
+
+
+class StubAgent:
+    faq = None
+    checkpointer = None
+
+    def __init__(self):
+        self.calls = []
+
+    def _state(self, query, messages):
+        history = list(messages or []) + [HumanMessage(content=query), AIMessage(content=f"echo: {query}")]
+        return {"response": f"echo: {query}", "next_action": "general", "messages": history}
+
+    def invoke(self, query, messages=None, session_id=None, thread_id=None):
+        self.calls.append((query, messages, session_id, thread_id))
+        return self._state(query, messages)
+
+    def stream(self, query, messages=None, session_id=None, thread_id=None):
+        self.calls.append((query, messages, session_id, thread_id))
+        yield "router", {"next_action": "general"}
+        yield "final", self._state(query, messages)
+
+    def get_tool_stats(self):
+        return {"calls": 0}
+
+
+@pytest.fixture
+def client():
+    # The lifespan is not run: the stubs stand in for the index and the graph
+    app.state.vector_store = StubVectorStore()
+    app.state.agent = StubAgent()
+    app.state.slots = asyncio.Semaphore(config.API_MAX_CONCURRENCY)
+    app.state.executor = ThreadPoolExecutor(max_workers=2)
+    app.state.in_flight = 0
+    yield TestClient(app)
+    app.state.executor.shutdown(wait=True)
+
+
+def test_chat_returns_the_final_state(client):
+    response = client.post("/chat", json={"query": "hi", "history": [{"role": "user", "content": "earlier"}]},
+                           headers={"X-Request-ID": "req-1"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-1"
+    body = response.json()
+    assert body["response"] == "echo: hi"
+    assert body["route"] == "general"
+    assert [m["role"] for m in body["history"]] == ["user", "user", "assistant"]
+    assert app.state.in_flight == 0
+
+
+def test_session_history_is_used_unless_history_is_sent(client):
+    client.post("/chat", json={"query": "hi", "session_id": "s1"})
+    client.post("/chat", json={"query": "hi", "session_id": "s1", "history": [{"role": "user", "content": "x"}]})
+
+    (_, stored, session_id, _), (_, sent, _, _) = app.state.agent.calls
+    assert stored is None and session_id == "s1"
+    assert [m.content for m in sent] == ["x"]
+
+
+def test_stream_sends_node_events_then_the_response(client):
+    response = client.post("/chat/stream", json={"query": "hi"})
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event:")]
+    assert events == ["node", "response", "done"]
+    assert '"response": "echo: hi"' in response.text
+    assert app.state.in_flight == 0
+
+
+def test_busy_server_answers_503(client, monkeypatch):
+    monkeypatch.setattr(config, "API_QUEUE_TIMEOUT_SECONDS", 0.05)
+    app.state.slots = asyncio.Semaphore(0)
+
+    response = client.post("/chat", json={"query": "hi"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert app.state.agent.calls == []
+
+
+def test_retrieve_returns_scored_chunks(client):
+    response = client.post("/retrieve", json={"query": "annual leave", "k": 1})
+
+    assert response.json()["chunks"] == [{
+        "content": "24 days of paid annual leave per year.",
+        "section_title": "1. Annual Leave",
+        "doc_name": "Leave Policy",
+        "chunk_id": 7,
+        "sources": ["leave.txt"],
+        "score": 0.8123
+    }]
+
+
+def test_reload_reports_a_rebuild_already_running(client):
+    response = client.post("/index/reload")
+
+    assert response.status_code == 202
+    assert response.json() == {"started": False, "index": {"state": "idle"}}
+
+
+def test_health_reports_the_worker(client):
+    body = client.get("/health").json()
+
+    assert body["status"] == "ok"
+    assert body["chunks"] == 3
+    assert body["in_flight"] == 0
+    assert body["max_concurrency"] == config.API_MAX_CONCURRENCY
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+pytest.importorskip("streamlit")
+
+import config  # noqa: E402
+import app  # noqa: E402
+
+
+class SessionState(dict):
+    """
+    st.session_state outside a Streamlit run
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+class CountingAgent:
+    def __init__(self):
+        self.loads = 0
+        self.session = {"messages": [HumanMessage(content="hi"), AIMessage(content="hello")], "tool_calls": []}
+
+    def get_session(self, session_id):
+        self.loads += 1
+        return self.session
+
+
+@pytest.fixture(autouse=True)
+def session_state(monkeypatch):
+    state = SessionState()
+    monkeypatch.setattr(app.st, "session_state", state)
+    app.initialize_session_state()
+    return state
+
+
+def test_session_state_defaults_are_set_once(session_state):
+    session_id = session_state.session_id
+    session_state.history_turns = 30
+
+    app.initialize_session_state()
+
+    assert session_state.session_id == session_id
+    assert session_state.history_turns == 30
+    assert session_state.session_version == 0
+
+
+def test_session_is_loaded_again_only_after_it_changed():
+    agent = CountingAgent()
+
+    app.load_session(agent)
+    app.load_session(agent)
+    assert agent.loads == 1
+
+    app.session_changed()
+    app.load_session(agent)
+    assert agent.loads == 2
+
+
+def test_sidebar_stats_are_recomputed_when_the_session_or_index_changes():
+    vector_store = SimpleNamespace(
+        generation=1, reload_status={"state": "idle", "last_error": None},
+        is_ready=lambda: True, count=lambda: 42
+    )
+    session = {"messages": [HumanMessage(content="hi")], "tool_calls": [{"tool": "create_hr_ticket"}]}
+
+    stats = app.sidebar_stats(vector_store, session)
+    assert stats["chunks"] == 42 and stats["messages"] == 1 and stats["tool_call_count"] == 1
+
+    session["messages"].append(AIMessage(content="hello"))
+    assert app.sidebar_stats(vector_store, session) is stats
+
+    app.session_changed()
+    assert app.sidebar_stats(vector_store, session)["messages"] == 2
+
+    vector_store.reload_status = {"state": "building", "last_error": None}
+    assert app.sidebar_stats(vector_store, session)["rebuilding"]
+
+
+def test_thin_client_stats_have_no_index():
+    stats = app.sidebar_stats(None, {"messages": [], "tool_calls": []})
+
+    assert stats["chunks"] is None and not stats["rebuilding"]
+
+
+def test_markdown_keeps_amounts_line_breaks_and_code():
+    prepared = app.prepare_markdown("Hotel: $120\nMeals: $40\n\n```\ncost = $5\n```")
+
+    assert prepared == "Hotel: \\$120  \nMeals: \\$40\n\n```\ncost = $5\n```"
+    assert app.prepare_markdown.cache_info().maxsize == config.MARKDOWN_CACHE_SIZE
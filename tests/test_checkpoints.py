@@ -0,0 +1,88 @@
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+import agent.graph as graph_module
+from agent.checkpoints import SQLiteCheckpointer
+from agent.graph import PolicyAssistantGraph
+from agent.prompts import ROUTER_PROMPT
+from agent.resilience import LLMUnavailableError
+from agent.session_store import create_session_store
+
+
+class FlakyLLM:
+    """
+    Routes every query to retrieval; the first `failures` answers raise
+    """
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.answers = 0
+
+    def invoke(self, prompt: str, temperature: float = config.TEMPERATURE) -> str:
+        if prompt.startswith(ROUTER_PROMPT[:40]):
+            return "retrieve"
+        self.answers += 1
+        if self.failures:
+            self.failures -= 1
+            raise LLMUnavailableError("timed out")
+        return f"Answer {self.answers}"
+
+    def invoke_with_tools(self, prompt, tools, temperature: float = config.TEMPERATURE):
+        return []
+
+
+class CountingVectorStore:
+    embeddings = None
+
+    def __init__(self):
+        self.searches = 0
+
+    def retrieve_with_scores(self, query: str, k: int = 5, adaptive: bool = None):
+        self.searches += 1
+        doc = Document(page_content="24 days of paid annual leave per year.",
+                       metadata={"section_title": "1. Annual Leave", "chunk_id": 0})
+        return [(doc, 0.8)]
+
+    def add_swap_listener(self, callback):
+        pass
+
+
+def make_agent(tmp_path, monkeypatch, llm):
+    monkeypatch.setattr(config, "CHECKPOINTS", True)
+    monkeypatch.setattr(config, "SPECULATIVE_RETRIEVAL", False)
+    monkeypatch.setattr(graph_module, "create_checkpointer",
+                        lambda: SQLiteCheckpointer(path=str(tmp_path / "checkpoints.db")))
+    agent = PolicyAssistantGraph(CountingVectorStore(), create_session_store("memory"), faq_cache=False)
+    agent.llm = llm
+    return agent
+
+
+def test_retry_after_failure_resumes_the_interrupted_run(tmp_path, monkeypatch):
+    agent = make_agent(tmp_path, monkeypatch, FlakyLLM(failures=1))
+    query = "How many days of annual leave do I get?"
+
+    failed = agent.invoke(query, session_id="s1")
+    assert "try again" in failed["response"]
+    # The error reply is not stored, so the retry has the same history and run
+    assert agent.get_session("s1")["messages"] == []
+
+    retried = agent.invoke(query, session_id="s1")
+    assert retried["response"].startswith("Answer")
+    assert agent.vector_store.searches == 1
+    assert [message.content for message in agent.get_session("s1")["messages"]] == [query, retried["response"]]
+
+
+def test_repeated_question_in_a_full_session_runs_again(tmp_path, monkeypatch):
+    agent = make_agent(tmp_path, monkeypatch, FlakyLLM())
+    agent.session_store.max_turns = 1
+    query = "How many days of annual leave do I get?"
+    agent.session_store.save("s1", [HumanMessage(content="Hi"), AIMessage(content="Hello")], [])
+
+    first = agent.invoke(query, session_id="s1")
+    second = agent.invoke(query, session_id="s1")
+
+    # The trimmed history has the same length both times but not the same content
+    assert first["response"] != second["response"]
+    assert agent.vector_store.searches == 2
+    assert [message.content for message in agent.get_session("s1")["messages"]] == [query, second["response"]]
@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.documents import Document
+
+import config
+from rag.dedup import deduplicate_chunks, jaccard, near_duplicate_groups, shingles
+
+SICK_LEAVE = ("Employees are entitled to 12 days of paid sick leave per calendar year. "
+              "A medical certificate is required for absences longer than two consecutive days.")
+
+
+def chunk(text, source, chunk_id=0):
+    return Document(page_content=text, metadata={"source": source, "chunk_id": chunk_id, "section_title": "Sick Leave"})
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Paid sick leave, per year.") == shingles("paid SICK leave per year")
+    assert jaccard(shingles("a b c d"), shingles("a b c d")) == 1.0
+    assert shingles("") == set()
+
+
+def test_near_duplicates_are_grouped():
+    texts = [
+        SICK_LEAVE,
+        "Book flights through the travel desk at least two weeks ahead.",
+        SICK_LEAVE.replace("Employees", "employees") + " ",
+        SICK_LEAVE.replace("12 days", "10 days"),
+    ]
+
+    assert near_duplicate_groups(texts) == [[0, 2]]
+    # Below the threshold the edited copy is its own chunk; a lower one merges it
+    assert near_duplicate_groups(texts, threshold=0.7) == [[0, 2, 3]]
+
+
+def test_bands_must_divide_the_signature():
+    with pytest.raises(ValueError):
+        near_duplicate_groups(["a", "b"], num_perm=128, bands=10)
+
+
+def test_longest_copy_is_kept_with_provenance():
+    longer = SICK_LEAVE + " Certificates go to HR"
+    chunks = [
+        chunk(SICK_LEAVE, "sample_company_policies.txt", 4),
+        chunk("Book flights through the travel desk.", "travel_policy.txt"),
+        chunk(longer, "leave_policy.txt", 1),
+    ]
+
+    kept, vectors = deduplicate_chunks(chunks, vectors=[[0.0], [1.0], [2.0]])
+
+    assert [doc.page_content for doc in kept] == ["Book flights through the travel desk.", longer]
+    assert vectors == [[1.0], [2.0]]
+    assert kept[1].metadata["sources"] == ["sample_company_policies.txt", "leave_policy.txt"]
+    assert kept[1].metadata["duplicates"] == [{
+        "source": "sample_company_policies.txt", "chunk_id": 4, "section_title": "Sick Leave",
+        "start_byte": None, "end_byte": None
+    }]
+    # The input chunks are left as they were
+    assert "sources" not in chunks[2].metadata
+
+
+def test_earliest_copy_wins_a_tie():
+    chunks = [chunk(SICK_LEAVE, "a.txt"), chunk(SICK_LEAVE, "b.txt")]
+
+    kept, _ = deduplicate_chunks(chunks)
+
+    assert [doc.metadata["source"] for doc in kept] == ["a.txt"]
+    assert kept[0].metadata["sources"] == ["a.txt", "b.txt"]
+
+
+def test_dedup_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_CHUNKS", False)
+    chunks = [chunk(SICK_LEAVE, "a.txt"), chunk(SICK_LEAVE, "b.txt")]
+
+    assert deduplicate_chunks(chunks) == (chunks, None)
@@ -0,0 +1,108 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from agent.faq import FAQCache, load_questions
+
+QUESTIONS = ["How many days of annual leave do I get?", "What is the travel booking process?"]
+
+
+class FakeAgent:
+    """
+    Retrieval from a fixed corpus and one canned answer per question
+    """
+
+    def __init__(self, embeddings):
+        self.vector_store = SimpleNamespace(embeddings=embeddings, generation=1)
+        self.corpus = {
+            "leave": "Employees get 24 days of annual leave.",
+            "travel": "Book flights through the travel desk.",
+        }
+        self.answered = []
+        self.fail = False
+
+    def search_policy_documents(self, question):
+        key = "leave" if "leave" in question else "travel"
+        return [Document(page_content=self.corpus[key], metadata={"source": f"{key}.txt", "chunk_id": 0})]
+
+    def answer_policy_question(self, question, docs):
+        if self.fail:
+            raise RuntimeError("LLM down")
+        self.answered.append(question)
+        return f"Answer: {docs[0].page_content}", docs, [docs[0].metadata["source"]]
+
+
+@pytest.fixture
+def agent(embeddings):
+    return FakeAgent(embeddings)
+
+
+@pytest.fixture
+def cache(agent, tmp_path):
+    cache = FAQCache(agent, path=str(tmp_path / "faq_answers.json"))
+    cache.sync(QUESTIONS)
+    return cache
+
+
+def refresh(cache):
+    """
+    Run a refresh in this thread
+    """
+    cache._refresh_requested.set()
+    cache._refresh_lock.acquire()
+    cache._refresh()
+
+
+def test_questions_file_skips_comments_and_duplicates(tmp_path):
+    path = tmp_path / "questions.txt"
+    path.write_text("# Leave\nHow much leave?\n\nHow much leave?\nTravel?\n")
+
+    assert load_questions(str(path)) == ["How much leave?", "Travel?"]
+
+
+def test_answers_are_stored_with_their_chunks(cache, agent):
+    with open(cache.path) as f:
+        data = json.load(f)
+
+    assert [entry["question"] for entry in data["answers"]] == QUESTIONS
+    assert all(len(entry["chunks"]) == 1 and entry["chunks"][0]["sha1"] for entry in data["answers"])
+    assert "index_generation" not in data
+    assert agent.answered == QUESTIONS
+
+
+def test_nothing_is_served_until_answers_are_checked(cache):
+    assert cache.lookup(QUESTIONS[0]) is None
+
+    refresh(cache)
+
+    match = cache.lookup(QUESTIONS[0])
+    assert match["answer"] == "Answer: Employees get 24 days of annual leave."
+    assert match["similarity"] == pytest.approx(1.0)
+    assert cache.lookup("Who approves my expense report?") is None
+
+
+def test_answers_loaded_from_disk_are_checked_against_the_index(cache, agent):
+    agent.corpus["leave"] = "Employees get 26 days of annual leave."
+    reloaded = FAQCache(agent, path=cache.path)
+    assert len(reloaded.entries) == 2
+    assert reloaded.lookup(QUESTIONS[0]) is None
+
+    refresh(reloaded)
+
+    # Only the answer whose chunk changed was generated again
+    assert agent.answered == QUESTIONS + [QUESTIONS[0]]
+    assert reloaded.lookup(QUESTIONS[0])["answer"] == "Answer: Employees get 26 days of annual leave."
+
+
+def test_stale_answer_is_withheld_when_it_cannot_be_regenerated(cache, agent):
+    refresh(cache)
+    agent.corpus["travel"] = "Book trains through the travel desk."
+    agent.fail = True
+
+    refresh(cache)
+
+    assert cache.lookup(QUESTIONS[1]) is None
+    assert cache.lookup(QUESTIONS[0]) is not None
+    assert cache.stats["failed"] == 1
@@ -0,0 +1,49 @@
+import pytest
+
+from agent.fast_path import ToolFastPath
+
+
+@pytest.mark.parametrize("query, issue", [
+    ("Create a ticket for laptop issue", "laptop issue"),
+    ("Create a ticket for my broken laptop, please", "my broken laptop"),
+    ("Please raise a ticket about my broken laptop,", "my broken laptop"),
+    ("report broken chair;", "broken chair"),
+])
+def test_ticket_issue_has_no_trailing_punctuation(query, issue):
+    calls = ToolFastPath().extract(query)
+    assert calls == [{"tool": "create_hr_ticket", "params": {"issue": issue}}]
+
+
+@pytest.mark.parametrize("query", [
+    "Check my leave balance",
+    "What is my vacation balance?",
+    "How many sick days do I have left?",
+    "balance of annual leave for employee id EMP1234",
+])
+def test_leave_balance_requests(query):
+    calls = ToolFastPath().extract(query)
+    assert calls is not None and calls[0]["tool"] == "check_leave_balance"
+
+
+@pytest.mark.parametrize("query", [
+    "Check the balance of my expense reimbursement",
+    "What is my travel card balance?",
+    "Open a new ticket",
+    "Please report it",
+    "Create a ticket about this issue",
+])
+def test_requests_without_a_clear_tool_call_go_to_the_llm(query):
+    assert ToolFastPath().extract(query) is None
+
+
+def test_employee_id_is_extracted():
+    calls = ToolFastPath().extract("Check my leave balance for employee id EMP1234")
+    assert calls == [{"tool": "check_leave_balance", "params": {"employee_id": "EMP1234"}}]
+
+
+def test_compound_request_yields_one_call_per_clause():
+    calls = ToolFastPath().extract("Check my leave balance and what is the status of TKT-123456")
+    assert calls == [
+        {"tool": "check_leave_balance", "params": {"employee_id": "current_user"}},
+        {"tool": "check_ticket_status", "params": {"ticket_id": "TKT-123456"}},
+    ]
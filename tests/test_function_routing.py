@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from agent.graph import PolicyAssistantGraph
+from agent.llm import GroqLLM
+from agent.prompts import ROUTER_PROMPT
+from agent.session_store import create_session_store
+
+
+class FunctionCallingLLM:
+    """
+    Returns scripted function calls; counts plain router calls
+    """
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.router_prompts = 0
+
+    def invoke_with_tools(self, prompt, tools, temperature=config.TEMPERATURE):
+        return self.calls
+
+    def invoke(self, prompt, temperature=config.TEMPERATURE):
+        if prompt.startswith(ROUTER_PROMPT[:40]):
+            self.router_prompts += 1
+            return "general"
+        return "answer"
+
+
+@pytest.fixture
+def route(monkeypatch):
+    monkeypatch.setattr(config, "ROUTING_MODE", "function_calling")
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    agent = PolicyAssistantGraph(None, create_session_store("memory"), faq_cache=False)
+
+    def route(calls, query="query"):
+        agent.llm = FunctionCallingLLM(calls)
+        return agent._route(query), agent.llm
+
+    return route
+
+
+def test_tool_calls_are_planned_in_the_routing_call(route):
+    routed, llm = route([
+        ("create_hr_ticket", {"subject": "Laptop screen broken"}),
+        ("check_leave_balance", {"user_id": "EMP42"}),
+        ("create_hr_ticket", {"subject": "Laptop screen broken"}),
+    ])
+
+    assert routed == {
+        "next_action": "tool",
+        "planned_tool_calls": [
+            {"tool": "create_hr_ticket", "params": {"issue": "Laptop screen broken"}},
+            {"tool": "check_leave_balance", "params": {"employee_id": "EMP42"}},
+        ]
+    }
+    assert llm.router_prompts == 0
+
+
+def test_search_routes_to_retrieval(route):
+    routed, _ = route([("search_policies", {"query": "leave"})])
+
+    assert routed == {"next_action": "retrieve", "planned_tool_calls": []}
+
+
+def test_other_functions_route_to_general(route):
+    routed, _ = route([("general_chat", {})])
+
+    assert routed["next_action"] == "general"
+
+
+def test_no_usable_call_falls_back_to_the_router_prompt(route):
+    routed, llm = route([])
+
+    assert routed == {"next_action": "general"}
+    assert llm.router_prompts == 1
+
+
+def test_planned_calls_are_capped(route, monkeypatch):
+    monkeypatch.setattr(config, "MAX_PARALLEL_TOOLS", 2)
+    routed, _ = route([("check_ticket_status", {"ticket_id": f"TKT-{n}"}) for n in range(4)])
+
+    assert len(routed["planned_tool_calls"]) == 2
+
+
+def tool_call(name, arguments):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def test_function_call_arguments_are_parsed(monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGING", False)
+    llm = GroqLLM(api_key="test")
+    message = SimpleNamespace(content=None, tool_calls=[
+        tool_call("check_ticket_status", '{"ticket_id": "TKT-1"}'),
+        tool_call("general_chat", None),
+    ])
+    completion = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: completion
+    )))
+
+    assert llm.invoke_with_tools("prompt", []) == [("check_ticket_status", {"ticket_id": "TKT-1"}), ("general_chat", {})]
+
+    message.tool_calls = [tool_call("check_ticket_status", '{"ticket_id": ')]
+    assert llm.invoke_with_tools("prompt", []) == []
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from agent.llm import GroqLLM
+from agent.resilience import AdaptiveRateLimiter, HedgeBudget, LatencyTracker
+
+
+class FakeStream:
+    """
+    Streamed completion that sends nothing until released (or closed)
+    """
+
+    def __init__(self, text, release_after=None):
+        self.text = text
+        self.closed = threading.Event()
+        self.released = threading.Event()
+        if release_after is None:
+            self.released.set()
+        else:
+            threading.Timer(release_after, self.released.set).start()
+
+    def __iter__(self):
+        while not self.released.wait(0.01):
+            if self.closed.is_set():
+                raise ConnectionError("stream closed")
+        delta = SimpleNamespace(content=self.text)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], x_groq=None)
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        return self.stream
+
+
+def make_llm(primary, hedge, hedge_delay=0.05):
+    llm = GroqLLM(api_key="test")
+    llm.client = FakeClient(primary)
+    llm.hedge_client = FakeClient(hedge)
+    llm.latency = LatencyTracker(initial_delay=hedge_delay)
+    return llm
+
+
+def hedged_create(llm):
+    kwargs = {"messages": [{"role": "user", "content": "hi"}], "model": "m"}
+    completion = llm._hedged_create(kwargs, estimated=10, deadline=time.monotonic() + 5)
+    return completion.choices[0].message.content
+
+
+def test_slow_primary_is_hedged_and_closed_before_its_first_byte():
+    primary = FakeStream("primary", release_after=30)
+    llm = make_llm(primary, FakeStream("hedge"))
+
+    assert hedged_create(llm) == "hedge"
+    assert primary.closed.wait(1)
+    assert llm.hedges == 1 and llm.hedge_wins == 1
+
+
+def test_losing_primary_latency_is_recorded():
+    llm = make_llm(FakeStream("primary", release_after=30), FakeStream("hedge"))
+
+    hedged_create(llm)
+
+    # The hedged request is the slow sample the hedge delay must account for
+    assert len(llm.latency.samples) == 1
+    assert llm.latency.samples[0] >= 0.05
+
+
+def test_hedge_credit_is_kept_when_the_limiter_has_no_capacity():
+    llm = make_llm(FakeStream("primary", release_after=0.2), FakeStream("hedge"))
+    llm.limiter = AdaptiveRateLimiter(requests_per_minute=1, tokens_per_minute=1000)
+    llm.limiter.try_acquire(10)
+    llm.hedge_budget = HedgeBudget(max_rate=0.05)
+
+    assert hedged_create(llm) == "primary"
+    assert llm.hedges == 0
+    assert llm.hedge_budget.credits == 1.05
+
+
+def test_fast_primary_is_not_hedged():
+    llm = make_llm(FakeStream("primary"), FakeStream("hedge"))
+
+    assert hedged_create(llm) == "primary"
+    assert llm.hedges == 0
+    assert len(llm.latency.samples) == 1
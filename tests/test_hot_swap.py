@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+import config
+import rag.vector_store as vector_store_module
+from rag.vector_store import VectorStoreManager
+
+
+def corpus(days):
+    return [
+        Document(page_content=f"Employees get {days} days of annual leave.", metadata={"chunk_id": 0}),
+        Document(page_content="Book flights through the travel desk.", metadata={"chunk_id": 1}),
+    ]
+
+
+@pytest.fixture
+def manager(embeddings):
+    manager = VectorStoreManager()
+    manager.embeddings = embeddings
+    manager.create_vector_store(corpus(24))
+    return manager
+
+
+def top_result(manager):
+    return manager.retrieve("annual leave days", k=1, adaptive=False)[0].page_content
+
+
+def test_swap_serves_the_new_index_and_starts_a_generation(manager):
+    generations = []
+    manager.add_swap_listener(generations.append)
+    manager.add_swap_listener(lambda generation: 1 / 0)
+
+    manager.create_vector_store(corpus(26))
+
+    assert top_result(manager) == "Employees get 26 days of annual leave."
+    assert manager.generation == 2
+    assert manager.reload_status["generation"] == 2
+    # A failing listener does not undo the swap
+    assert generations == [2]
+
+
+def test_old_index_is_kept_until_its_searches_finish(manager):
+    with manager._pinned() as (old_store, _, _):
+        swap = threading.Thread(target=manager.create_vector_store, args=(corpus(26),))
+        swap.start()
+        swap.join(0.3)
+
+        # New searches see the new index while the old one waits to be retired
+        assert swap.is_alive()
+        assert top_result(manager) == "Employees get 26 days of annual leave."
+        assert old_store.similarity_search("annual leave", k=1)[0].page_content == "Employees get 24 days of annual leave."
+
+    swap.join(5)
+    assert not swap.is_alive()
+    assert not manager._in_flight
+
+
+def test_retiring_gives_up_after_the_drain_timeout(manager, monkeypatch):
+    monkeypatch.setattr(config, "VECTOR_STORE_DRAIN_TIMEOUT_SECONDS", 0.1)
+
+    with manager._pinned():
+        manager.create_vector_store(corpus(26))
+
+    assert manager.generation == 2
+
+
+def test_searches_never_come_back_empty_during_swaps(manager):
+    empty = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            if not manager.retrieve("annual leave", k=1, adaptive=False):
+                empty.append(1)
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for days in range(25, 30):
+        manager.create_vector_store(corpus(days))
+    stop.set()
+    for thread in searchers:
+        thread.join()
+
+    assert not empty
+    assert manager.generation == 6
+
+
+def test_reload_is_refused_while_one_is_running(manager, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(vector_store_module, "_populate", lambda manager, force_rebuild: release.wait(5))
+
+    thread = manager.reload()
+    assert manager.reload() is None
+    assert manager.reload_status["state"] == "building"
+
+    release.set()
+    thread.join(5)
+    assert manager.reload_status["state"] == "idle"
+    assert manager.reload_status["last_reload_seconds"] is not None
+    assert manager.reload() is not None
+
+
+def test_failed_reload_keeps_serving_the_current_index(manager, monkeypatch):
+    def fail(manager, force_rebuild):
+        raise RuntimeError("docs unreadable")
+
+    monkeypatch.setattr(vector_store_module, "_populate", fail)
+
+    manager.reload().join(5)
+
+    assert manager.reload_status["last_error"] == "docs unreadable"
+    assert manager.generation == 1
+    assert top_result(manager) == "Employees get 24 days of annual leave."
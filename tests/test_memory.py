@@ -0,0 +1,92 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+from agent.graph import PolicyAssistantGraph
+from agent.memory import MemoryMonitor, ObjectSizer, measure_components, project
+from agent.session_store import create_session_store
+from rag.vector_store import VectorStoreManager
+
+
+@pytest.fixture
+def agent(embeddings, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    manager = VectorStoreManager()
+    manager.embeddings = embeddings
+    manager.create_vector_store([
+        Document(page_content=f"Policy paragraph {n} about annual leave.", metadata={"chunk_id": n})
+        for n in range(20)
+    ])
+    return PolicyAssistantGraph(manager, create_session_store("memory"), faq_cache=False)
+
+
+def add_session(agent, session_id):
+    messages = [HumanMessage(content="How much leave?"), AIMessage(content="24 days.")]
+    agent.session_store.save(session_id, messages, [])
+
+
+def test_shared_objects_are_counted_once():
+    shared = ["x" * 1000]
+    sizer = ObjectSizer()
+
+    first = sizer.size({"a": shared})
+    second = sizer.size({"b": shared})
+
+    assert first["bytes"] > 1000 > second["bytes"]
+
+
+def test_excluded_objects_and_code_are_not_counted():
+    big = "y" * 10_000
+    sized = ObjectSizer(exclude=[big]).size({"data": big, "handler": test_shared_objects_are_counted_once})
+
+    assert sized["bytes"] < 1000
+
+
+def test_components_account_for_the_index_and_sessions(agent):
+    add_session(agent, "s1")
+    add_session(agent, "s2")
+
+    components = measure_components(agent)
+
+    assert components["faiss_index"]["vectors"] == 20
+    assert components["faiss_index"]["vectors_bytes"] == 20 * components["faiss_index"]["dimensions"] * 4
+    assert components["docstore"]["chunks"] == 20
+    assert components["docstore"]["text_bytes"] > 20 * len("Policy paragraph 0 about annual leave.")
+    assert components["sessions"]["sessions"] == 2
+    assert components["sessions"]["per_session_bytes"] == components["sessions"]["bytes"] / 2 > 0
+    # The test embeddings hold no model weights
+    assert "embedding_model" not in components
+
+
+def test_growth_is_tracked_between_reports(agent):
+    monitor = MemoryMonitor(agent, interval=0)
+    first = monitor.report()
+    assert first["growth"] is None
+    assert first["accounted_bytes"] == sum(component["bytes"] for component in first["components"].values())
+
+    add_session(agent, "s1")
+    growth = monitor.report()["growth"]
+
+    assert growth["samples"] == 2
+    assert growth["sessions"] == 1
+    assert growth["bytes"]["sessions"] > 0
+
+
+def test_projection_scales_chunks_and_sessions_from_measured_costs():
+    report = {
+        "rss_bytes": 1_000_000,
+        "chunks": 100,
+        "components": {
+            "faiss_index": {"bytes": 150_000},
+            "docstore": {"bytes": 50_000},
+            "sessions": {"bytes": 20_000, "sessions": 10, "per_session_bytes": 2_000},
+        }
+    }
+
+    projection = project(report, chunks=1_000, sessions=100)
+
+    assert projection["fixed_bytes"] == 780_000
+    assert projection["per_chunk_bytes"] == 2_000
+    assert projection["rss_bytes"] == 780_000 + 2_000_000 + 200_000
+    assert project(report)["rss_bytes"] == 1_000_000
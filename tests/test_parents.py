@@ -0,0 +1,121 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+import config
+from rag.parents import PARENT_STORE_FILE, ParentStore, save_parent_store
+from rag.splitter import PolicySplitter
+from rag.tokens import CharSizer
+from rag.vector_store import VectorStoreManager
+
+LEAVE = """Leave Policy
+
+1. Annual Leave
+
+Employees get 24 days of annual leave per year.
+
+Leave must be approved by your manager in advance.
+
+2. Sick Leave
+
+Sick leave requires a medical certificate after 2 days.
+
+Report sick leave to HR on the first day.
+"""
+
+
+@pytest.fixture
+def documents():
+    return [Document(page_content=LEAVE, metadata={"source": "leave_policy.txt"})]
+
+
+@pytest.fixture
+def children(documents):
+    return PolicySplitter(chunk_size=60, chunk_overlap=0, sizer=CharSizer(), parent_size=200).split_documents(documents)
+
+
+@pytest.fixture
+def store(documents):
+    return ParentStore(ParentStore.texts_for(documents), unit="chars")
+
+
+def ranked(children, *indices):
+    return [(children[index], 1.0 - 0.1 * rank) for rank, index in enumerate(indices)]
+
+
+def test_children_of_one_section_expand_to_one_parent(children, store):
+    annual = [i for i, child in enumerate(children) if child.metadata["section_title"] == "1. Annual Leave"]
+    sick = [i for i, child in enumerate(children) if child.metadata["section_title"] == "2. Sick Leave"]
+
+    parents = store.expand_with_scores(ranked(children, sick[0], annual[0], sick[1]), k=5)
+
+    assert [parent.metadata["section_title"] for parent, _ in parents] == ["2. Sick Leave", "1. Annual Leave"]
+    # Each parent carries its best child's score and the number of children that matched
+    assert [score for _, score in parents] == [1.0, 0.9]
+    assert parents[0][0].metadata["matched_children"] == 2
+    assert parents[0][0].page_content.startswith("2. Sick Leave")
+    assert "Report sick leave to HR" in parents[0][0].page_content
+    assert "chunk_id" not in parents[0][0].metadata
+
+
+def test_expansion_stops_at_k_and_the_budget(children, store):
+    # One child from each of the two parents
+    first_two = list({child.metadata["parent_start"]: child for child in children}.values())
+    sizes = [child.metadata["parent_size"] for child in first_two]
+    assert len(first_two) == 2
+
+    assert len(store.expand(first_two, k=1)) == 1
+    assert len(store.expand(first_two, k=5, budget=sum(sizes))) == 2
+    assert len(store.expand(first_two, k=5, budget=sizes[0])) == 1
+    # The best parent is returned even when it alone is over budget
+    assert len(store.expand(first_two, k=5, budget=1)) == 1
+
+
+def test_budget_follows_the_unit(monkeypatch):
+    monkeypatch.setattr(config, "PARENT_EXPANSION_BUDGET", 100)
+    monkeypatch.setattr(config, "PARENT_EXPANSION_BUDGET_TOKENS", 25)
+
+    assert ParentStore(unit="chars").budget == 100
+    assert ParentStore(unit="tokens").budget == 25
+
+
+def test_children_without_a_parent_pass_through(store):
+    orphan = Document(page_content="Indexed before parent mode.", metadata={"source": "old.txt", "chunk_id": 3})
+
+    assert store.expand([orphan], k=3)[0].page_content == "Indexed before parent mode."
+
+
+def test_pages_are_addressed_separately():
+    pages = [Document(page_content=f"Page {n} text.", metadata={"source": "handbook.pdf", "page": n}) for n in range(2)]
+    store = ParentStore(ParentStore.texts_for(pages), unit="chars")
+
+    child = {"source": "handbook.pdf", "page": 1, "parent_start": 0, "parent_end": 6}
+    assert store.parent_text(child) == "Page 1"
+
+
+def test_store_round_trips_and_stale_stores_are_removed(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RETRIEVAL_MODE", "parent")
+    path = str(tmp_path / "index")
+
+    store.save(path)
+    loaded = ParentStore.load(path)
+    assert loaded.texts == store.texts and loaded.unit == "chars"
+
+    monkeypatch.setattr(config, "RETRIEVAL_MODE", "chunk")
+    assert ParentStore.load(path) is None
+
+    save_parent_store(None, path)
+    assert not os.path.exists(os.path.join(path, PARENT_STORE_FILE))
+
+
+def test_retrieval_returns_parent_sections(children, store, embeddings):
+    manager = VectorStoreManager()
+    manager.embeddings = embeddings
+    manager.create_vector_store(children, parent_store=store)
+
+    results = manager.retrieve("medical certificate for sick leave", k=1, adaptive=False)
+
+    assert len(results) == 1
+    assert results[0].metadata["section_title"] == "2. Sick Leave"
+    assert "Report sick leave to HR" in results[0].page_content
@@ -0,0 +1,103 @@
+import pytest
+from langchain_core.documents import Document
+
+import config
+from rag import pdf_cache
+from rag.pdf_cache import PDFTextCache
+
+document_loaders = pytest.importorskip("langchain_community.document_loaders")
+
+
+class FakePDFLoader:
+    """
+    Treats each line of the file as a page and counts the files parsed
+    """
+    parsed = []
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        FakePDFLoader.parsed.append(self.path)
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        return [Document(page_content=line, metadata={"source": self.path, "page": n}) for n, line in enumerate(lines)]
+
+
+@pytest.fixture(autouse=True)
+def loader(monkeypatch):
+    FakePDFLoader.parsed = []
+    monkeypatch.setattr(document_loaders, "PyPDFLoader", FakePDFLoader)
+    return FakePDFLoader
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PDFTextCache(cache_dir=str(tmp_path / "cache"))
+
+
+def write(tmp_path, name, text):
+    path = str(tmp_path / name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def test_unchanged_file_is_parsed_once(cache, loader, tmp_path):
+    path = write(tmp_path, "handbook.pdf", "Page one\nPage two")
+
+    first = cache.load(path)
+    second = cache.load(path)
+
+    assert loader.parsed == [path]
+    assert [(doc.page_content, doc.metadata) for doc in second] == [(doc.page_content, doc.metadata) for doc in first]
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_renamed_copy_is_served_under_its_own_name(cache, loader, tmp_path):
+    cache.load(write(tmp_path, "handbook.pdf", "Page one"))
+    copy = write(tmp_path, "handbook_2026.pdf", "Page one")
+
+    documents = cache.load(copy)
+
+    assert len(loader.parsed) == 1
+    assert documents[0].metadata == {"source": copy, "page": 0}
+
+
+def test_changed_bytes_are_parsed_again(cache, loader, tmp_path):
+    path = write(tmp_path, "handbook.pdf", "Page one")
+    cache.load(path)
+    write(tmp_path, "handbook.pdf", "Page one, revised")
+
+    assert cache.load(path)[0].page_content == "Page one, revised"
+    assert len(loader.parsed) == 2
+
+
+def test_new_parser_version_invalidates_entries(cache, loader, tmp_path):
+    path = write(tmp_path, "handbook.pdf", "Page one")
+    cache.load(path)
+
+    cache.version = "PyPDFLoader/pypdf-99.0/v1"
+    cache.load(path)
+
+    assert len(loader.parsed) == 2
+
+
+def test_unreadable_entry_is_parsed_again(cache, loader, tmp_path):
+    path = write(tmp_path, "handbook.pdf", "Page one")
+    cache.load(path)
+    with open(cache._entry_path(pdf_cache.file_hash(path)), "wb") as f:
+        f.write(b"not zlib")
+
+    assert cache.load(path)[0].page_content == "Page one"
+    assert len(loader.parsed) == 2
+
+
+def test_cache_can_be_turned_off(loader, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PDF_CACHE", False)
+    path = write(tmp_path, "handbook.pdf", "Page one")
+
+    pdf_cache.load_pdf(path)
+    pdf_cache.load_pdf(path)
+
+    assert loader.parsed == [path, path]
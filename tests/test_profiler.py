@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import config
+import agent.profiler as profiler_module
+from agent.profiler import SamplingProfiler, profile_request, should_profile, write_profile
+
+
+def busy_work(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def wait_for_pool(seconds):
+    threading.Event().wait(seconds)
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    # PROFILE_DIR is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / config.PROFILE_DIR
+
+
+def test_header_needs_the_configured_token(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(config, "PROFILE_TOKEN", None)
+    assert not should_profile("anything")
+
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "s3cret")
+    assert should_profile("s3cret")
+    assert not should_profile("guess")
+
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 1.0)
+    assert should_profile(None)
+
+
+def test_profile_shows_computing_and_waiting_frames():
+    with profile_request("req-1") as result:
+        busy_work(0.1)
+        wait_for_pool(0.1)
+
+    with open(result["path"]) as f:
+        profile = json.load(f)
+
+    names = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert "busy_work" in names and "wait_for_pool" in names and "[blocked]" in names
+    # Stacks start at the profiled block, not the test runner above it
+    assert names[0] == "test_profile_shows_computing_and_waiting_frames"
+    samples = profile["profiles"][0]
+    assert len(samples["samples"]) == len(samples["weights"]) > 10
+    assert samples["endValue"] == pytest.approx(0.2, abs=0.05)
+
+
+def test_disabled_or_busy_profiler_runs_the_block_unprofiled(monkeypatch, profile_dir):
+    with profile_request("req-1", enabled=False) as result:
+        busy_work(0.01)
+    assert result["path"] is None
+
+    monkeypatch.setattr(profiler_module, "_active", threading.BoundedSemaphore(1))
+    profiler_module._active.acquire()
+    with profile_request("req-2") as result:
+        busy_work(0.01)
+    assert result["path"] is None
+    assert not profile_dir.exists()
+
+
+def test_collapsed_output_sums_identical_stacks(profile_dir):
+    profiler = SamplingProfiler(threading.get_ident())
+    stack = (("handle", "/srv/api.py", 10), ("search", "/srv/rag.py", 20))
+    profiler.samples = [stack, stack, stack[:1]]
+    profiler.weights = [0.010, 0.015, 0.004]
+
+    path = write_profile(profiler, "../etc/passwd", fmt="collapsed", directory=str(profile_dir))
+
+    assert os.path.basename(path) == "etcpasswd.collapsed.txt"
+    with open(path) as f:
+        assert f.read() == "handle (api.py:10);search (rag.py:20) 25\nhandle (api.py:10) 4\n"
+
+
+def test_oldest_profiles_are_pruned(monkeypatch, profile_dir):
+    monkeypatch.setattr(config, "PROFILE_MAX_FILES", 2)
+    profiler = SamplingProfiler(threading.get_ident())
+
+    for n in range(4):
+        path = write_profile(profiler, f"req-{n}", directory=str(profile_dir))
+        os.utime(path, (n, n))
+
+    assert sorted(os.listdir(profile_dir)) == ["req-2.speedscope.json", "req-3.speedscope.json"]
@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+import config
+from agent.graph import PolicyAssistantGraph
+from agent.prompts import ROUTER_PROMPT
+from agent.session_store import create_session_store
+from loadtest import replay
+from loadtest.replay import ReplayLLM, ReplayMiss, RetrievalProxy, Tape, ToolProxy, check_expectations
+
+SUITE = [
+    {"query": "How many days of annual leave do I get?", "expect": {"route": "retrieve", "sections": ["1. Annual Leave"]}},
+    {"query": "Hello!", "expect": {"route": "general"}},
+]
+
+
+class PolicyIndex:
+    embeddings = None
+
+    def retrieve_with_scores(self, query, k=5, adaptive=None):
+        doc = Document(page_content="24 days of paid annual leave per year.",
+                       metadata={"section_title": "1. Annual Leave", "chunk_id": 0})
+        return [(doc, 0.8)]
+
+    def add_swap_listener(self, callback):
+        pass
+
+
+class LiveLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, temperature=config.TEMPERATURE):
+        self.calls += 1
+        if prompt.startswith(ROUTER_PROMPT[:40]):
+            return "general" if "Hello" in prompt.rsplit("Query:", 1)[-1] else "retrieve"
+        return f"answer {self.calls}"
+
+
+class OfflineLLM:
+    def invoke(self, prompt, temperature=config.TEMPERATURE):
+        raise AssertionError("replay reached the LLM")
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    """
+    Agents built by record and replay, in order; the first talks to a live LLM
+    """
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    monkeypatch.setattr(config, "SPECULATIVE_RETRIEVAL", False)
+    monkeypatch.setattr(config, "ROUTING_MODE", "two_step")
+    built = []
+
+    def build():
+        agent = PolicyAssistantGraph(PolicyIndex(), create_session_store("memory"), faq_cache=False)
+        agent.llm = OfflineLLM() if built else LiveLLM()
+        built.append(agent)
+        return agent
+
+    monkeypatch.setattr(replay, "_build_agent", build)
+    return built
+
+
+def recording(*llm_calls, query="q"):
+    return {"queries": [{"query": query, "llm_calls": [
+        {"method": "invoke", "prompt": prompt, "temperature": 0.0, "tools": None, "response": response}
+        for prompt, response in llm_calls
+    ], "retrievals": [], "tool_calls": []}]}
+
+
+def test_llm_responses_match_the_prompt_then_the_position():
+    llm = ReplayLLM(None, recording(("route q", "retrieve"), ("answer q", "24 days")))
+    llm.start("q")
+
+    assert llm.invoke("route q", temperature=0.0) == "retrieve"
+    # A RAG prompt changed by new chunks falls back to the call at the same position
+    assert llm.invoke("answer q with other context", temperature=0.0) == "24 days"
+    with pytest.raises(ReplayMiss):
+        llm.invoke("a third call", temperature=0.0)
+    assert llm.stats == {"exact": 1, "fallback": 1, "missing": 1}
+
+
+def test_retrievals_are_recorded_and_served():
+    tape = Tape()
+    tape.start("q")
+    RetrievalProxy(PolicyIndex(), tape).retrieve("annual leave", k=3)
+
+    served = RetrievalProxy(None, Tape(), {"queries": [{"retrievals": tape.retrievals}]})
+
+    (doc, score), = served.retrieve_with_scores("annual leave", k=3)
+    assert (doc.metadata["section_title"], score) == ("1. Annual Leave", 0.8)
+    with pytest.raises(ReplayMiss):
+        served.retrieve("annual leave", k=5)
+
+
+def test_recorded_tool_outputs_are_used_once():
+    tool = SimpleNamespace(name="check_ticket_status", invoke=lambda input: f"live {input}")
+    tape = Tape()
+    tape.start("q")
+    recorded = {"q": [{"tool": "check_ticket_status", "input": "TKT-1", "output": "recorded"}]}
+    proxy = ToolProxy(tool, tape, recorded)
+
+    assert proxy.invoke("TKT-1") == "recorded"
+    # Calls the recording has no unused output for run the local tool
+    assert proxy.invoke("TKT-1") == "live TKT-1"
+
+
+def test_expectations_default_to_the_recorded_route():
+    case = {"query": "q", "expect": {"sections": ["1. Annual Leave"]}}
+    state = {"next_action": "general", "retrieved_sections": [], "response": "I encountered an error, sorry."}
+
+    failures = check_expectations(case, {"route": "retrieve"}, state)
+
+    assert len(failures) == 3
+    assert failures[0] == "route 'general', expected 'retrieve'"
+
+
+def test_recording_replays_offline(agents, tmp_path):
+    suite = tmp_path / "suite.json"
+    suite.write_text(json.dumps(SUITE))
+    output = str(tmp_path / "recording.json")
+
+    recorded = replay.record(SimpleNamespace(suite=str(suite), output=output, verbose=False))
+    assert [entry["route"] for entry in recorded["queries"]] == ["retrieve", "general"]
+
+    report = replay.replay(SimpleNamespace(suite=str(suite), recording=output, repeat=2,
+                                           replay_retrieval=True, verbose=False))
+
+    assert report["passed"] == 2 and report["failed"] == []
+    assert report["llm"]["missing"] == 0
+    assert report["latency"]["count"] == 4
+    assert "router" in report["nodes"]
@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import agent.llm as llm_module
+import agent.resilience as resilience
+from agent.llm import GroqLLM
+from agent.resilience import AdaptiveRateLimiter, CircuitBreaker, LLMUnavailableError, backoff_delay
+
+
+class APIError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class ScriptedClient:
+    """
+    Raises the scripted errors in turn, then returns a completion
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=50))
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGING", False)
+    monkeypatch.setattr(llm_module, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+    return GroqLLM(api_key="test", breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=60))
+
+
+def test_limiter_hands_out_capacity_up_to_the_quota():
+    limiter = AdaptiveRateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+
+    assert limiter.try_acquire(100)
+    assert limiter.try_acquire(100)
+    assert not limiter.try_acquire(100)
+    with pytest.raises(LLMUnavailableError):
+        limiter.acquire(100, timeout=0.05)
+    assert limiter.get_stats()["throttled_requests"] == 1
+
+
+def test_unused_token_estimate_is_refunded():
+    limiter = AdaptiveRateLimiter(requests_per_minute=100, tokens_per_minute=1000)
+    limiter.acquire(600)
+    assert not limiter.try_acquire(600)
+
+    limiter.reconcile(600, 100)
+
+    assert limiter.try_acquire(600)
+
+
+def test_refill_rate_backs_off_multiplicatively_and_recovers_additively():
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=6000, min_rate_fraction=0.1)
+
+    limiter.on_throttled()
+    assert limiter.rate_fraction == 0.5
+    assert limiter.request_bucket.refill_per_second == pytest.approx(0.5)
+
+    limiter.on_success()
+    assert limiter.rate_fraction == pytest.approx(0.55)
+
+    for _ in range(10):
+        limiter.on_throttled()
+    assert limiter.rate_fraction == 0.1
+
+
+def test_circuit_opens_then_lets_one_trial_through_after_the_cooldown():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    breaker.opened_at -= 31
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # A failed trial opens the circuit again; a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == "open"
+    breaker.opened_at -= 31
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_backoff_never_undercuts_retry_after(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+
+    assert backoff_delay(0, base=0.5, cap=20) == 0.5
+    assert backoff_delay(3, base=0.5, cap=20) == 4.0
+    assert backoff_delay(10, base=0.5, cap=20) == 20
+    assert backoff_delay(0, retry_after=7, base=0.5, cap=20) == 7
+    assert backoff_delay(0, retry_after=60, base=0.5, cap=20) == 20
+
+
+def test_throttled_call_is_retried_and_slows_the_limiter(llm):
+    llm.client = ScriptedClient(APIError(429, retry_after="1"), APIError(503))
+
+    assert llm.invoke("hi") == "ok"
+
+    assert llm.client.calls == 3
+    metrics = llm.get_metrics()
+    assert metrics["retries"] == 2
+    assert metrics["rate_limited_responses"] == 1
+    assert llm.limiter.rate_fraction == pytest.approx(0.55)
+    assert llm.breaker.state == "closed"
+
+
+def test_bad_request_is_not_retried_and_does_not_open_the_circuit(llm):
+    llm.client = ScriptedClient(APIError(400), APIError(400))
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            llm.invoke("hi")
+
+    assert llm.client.calls == 2
+    assert llm.breaker.state == "closed"
+
+
+def test_open_circuit_fails_fast(llm, monkeypatch):
+    monkeypatch.setattr(config, "LLM_MAX_RETRIES", 0)
+    llm.client = ScriptedClient(APIError(503), APIError(503), APIError(503))
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            llm.invoke("hi")
+    with pytest.raises(LLMUnavailableError, match="circuit breaker is open"):
+        llm.invoke("hi")
+
+    assert llm.client.calls == 2
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.graph import PolicyAssistantGraph
+from agent.session_store import MemorySessionStore, SessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+
+
+def turn(question, answer):
+    return [HumanMessage(content=question), AIMessage(content=answer)]
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_round_trip(store):
+    store.save("s1", turn("Hi", "Hello"), [{"tool": "check_leave_balance"}])
+
+    session = store.load("s1")
+    assert [m.content for m in session["messages"]] == ["Hi", "Hello"]
+    assert isinstance(session["messages"][0], HumanMessage)
+    assert session["tool_calls"] == [{"tool": "check_leave_balance"}]
+    assert session["version"] == 1
+    assert store.load("missing") == {"messages": [], "tool_calls": [], "version": 0}
+
+
+def test_oldest_turns_are_trimmed(store):
+    store.max_turns = 2
+    store.save("s1", turn("1", "a") + turn("2", "b") + turn("3", "c"), [])
+
+    assert [m.content for m in store.load("s1")["messages"]] == ["2", "b", "3", "c"]
+
+
+def test_save_fails_if_the_session_changed_since_it_was_loaded(store):
+    loaded = store.load("s1")
+    assert store.save("s1", turn("A", "a"), [], expected_version=loaded["version"])
+
+    # Saved by someone else since "loaded" was read
+    assert not store.save("s1", turn("B", "b"), [], expected_version=loaded["version"])
+    assert [m.content for m in store.load("s1")["messages"]] == ["A", "a"]
+
+
+def test_expired_sessions_are_empty_and_collected(store):
+    store._last_gc = time.monotonic()
+    store.ttl_seconds = -1
+    store.save("s1", turn("Hi", "Hello"), [])
+    store.ttl_seconds = 60
+    store.save("s2", turn("Hi", "Hello"), [])
+
+    assert store.load("s1")["messages"] == []
+    assert store.gc() == 1
+    assert store.get_stats()["sessions"] == 1
+
+
+def test_expired_session_can_be_restarted(store):
+    store.ttl_seconds = -1
+    store.save("s1", turn("Old", "old"), [])
+    store.ttl_seconds = 60
+
+    assert store.save("s1", turn("New", "new"), [], expected_version=store.load("s1")["version"])
+    assert [m.content for m in store.load("s1")["messages"]] == ["New", "new"]
+
+
+def test_concurrent_turns_of_a_session_are_both_kept(store):
+    store.save("s1", turn("Hi", "Hello"), [])
+    agent = SimpleNamespace(session_store=store, get_session=store.load)
+
+    # Two turns start from the same stored history
+    first = store.load("s1")
+    second = store.load("s1")
+    for session, question in ((first, "Q1"), (second, "Q2")):
+        final_state = {"messages": session["messages"] + turn(question, question.lower()), "tool_calls": []}
+        PolicyAssistantGraph._save_session(agent, "s1", session, session["messages"], final_state)
+
+    contents = [m.content for m in store.load("s1")["messages"]]
+    assert contents == ["Hi", "Hello", "Q1", "q1", "Q2", "q2"]
+
+
+def test_sqlite_store_upgrades_files_without_versions(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE sessions (session_id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+    )
+    connection.commit()
+    connection.close()
+
+    store = SQLiteSessionStore(path=path)
+    store.save("s1", turn("Hi", "Hello"), [])
+    session = store.load("s1")
+    assert session["version"] == 1
+    assert store.save("s1", turn("Hi", "Hello") + turn("More", "more"), [], expected_version=1)
+
+
+def test_gc_runs_at_most_once_per_interval():
+    store = MemorySessionStore(gc_interval_seconds=3600)
+    calls = []
+    store.gc = lambda: calls.append(time.monotonic()) or 0
+
+    store.save("s1", turn("Hi", "Hello"), [])
+    store.save("s2", turn("Hi", "Hello"), [])
+    assert len(calls) == 1
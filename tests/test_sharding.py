@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+
+import pytest
+from langchain_core.documents import Document
+
+from rag import sharding
+from rag.sharding import MANIFEST_FILE, ShardedVectorStore, build_shards, load_shard_paths
+from rag.vector_store import VectorStoreManager
+
+TOPICS = ["leave", "travel", "expenses", "security", "remote", "benefits", "payroll", "training"]
+
+
+def make_documents():
+    return [
+        Document(
+            page_content=f"{topic} policy section {n}",
+            metadata={"doc_name": f"{topic}.md", "source": f"docs/{topic}.md", "chunk_id": n}
+        )
+        for topic in TOPICS
+        for n in range(3)
+    ]
+
+
+@pytest.fixture
+def manager(embeddings):
+    manager = VectorStoreManager()
+    manager.embeddings = embeddings
+    return manager
+
+
+def test_build_writes_a_relocatable_manifest(tmp_path, embeddings):
+    staging = str(tmp_path / "staging")
+    build_shards(make_documents(), embeddings, staging, num_shards=2)
+    moved = str(tmp_path / "served")
+    os.rename(staging, moved)
+
+    with open(os.path.join(moved, MANIFEST_FILE)) as f:
+        assert json.load(f)["shards"] == ["shard_0", "shard_1"]
+    assert load_shard_paths(moved) == [os.path.join(moved, "shard_0"), os.path.join(moved, "shard_1")]
+
+
+def test_rebuild_replaces_the_directory_as_a_whole(tmp_path, manager):
+    path = str(tmp_path / "shards")
+    manager._save_shards(make_documents(), None, num_shards=2, path=path)
+    assert sorted(os.listdir(path)) == [MANIFEST_FILE, "shard_0", "shard_1"]
+
+    shard_paths = manager._save_shards(make_documents(), None, num_shards=1, path=path)
+
+    # Nothing of the two-shard build is left next to the new one
+    assert sorted(os.listdir(path)) == [MANIFEST_FILE, "shard_0"]
+    assert shard_paths == [os.path.join(path, "shard_0")]
+    assert os.listdir(tmp_path) == ["shards"]
+
+
+def test_failed_build_leaves_the_served_shards_untouched(tmp_path, manager, monkeypatch):
+    path = str(tmp_path / "shards")
+    manager._save_shards(make_documents(), None, num_shards=2, path=path)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(sharding.json, "dump", fail)
+
+    with pytest.raises(OSError):
+        manager._save_shards(make_documents(), None, num_shards=1, path=path)
+
+    assert load_shard_paths(path) == [os.path.join(path, "shard_0"), os.path.join(path, "shard_1")]
+    assert os.listdir(tmp_path) == ["shards"]
+
+
+def test_missing_shard_gives_partial_results(tmp_path, embeddings):
+    path = str(tmp_path / "shards")
+    shard_paths = build_shards(make_documents(), embeddings, path, num_shards=2)
+    shutil.rmtree(shard_paths[1])
+
+    store = ShardedVectorStore(embeddings, shard_paths, startup_timeout=60)
+    try:
+        results = store.search_with_scores("leave policy", k=3)
+        stats = store.get_stats()
+    finally:
+        store.close()
+
+    assert len(results) == 3
+    assert stats["partial_results"] == 1
+    assert stats["ready_shards"] == 1
+
+
+def test_all_shards_are_merged_best_first(tmp_path, embeddings):
+    path = str(tmp_path / "shards")
+    shard_paths = build_shards(make_documents(), embeddings, path, num_shards=2)
+
+    store = ShardedVectorStore(embeddings, shard_paths, startup_timeout=60)
+    try:
+        results = store.search_with_scores("travel policy section 1", k=4)
+        stats = store.get_stats()
+    finally:
+        store.close()
+
+    assert results[0][0].page_content == "travel policy section 1"
+    scores = [score for _, score in results]
+    assert scores == sorted(scores)
+    assert stats["partial_results"] == 0
+    assert store.count() == len(make_documents())
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+import config
+from agent.graph import PolicyAssistantGraph
+from agent.prompts import ROUTER_PROMPT
+from agent.resilience import LLMUnavailableError
+from agent.session_store import create_session_store
+
+
+class SlowVectorStore:
+    embeddings = None
+
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.searches = 0
+
+    def retrieve_with_scores(self, query, k=5, adaptive=None):
+        self.searches += 1
+        time.sleep(self.seconds)
+        doc = Document(page_content="24 days of paid annual leave per year.",
+                       metadata={"section_title": "1. Annual Leave", "chunk_id": 0})
+        return [(doc, 0.8)]
+
+    def add_swap_listener(self, callback):
+        pass
+
+
+class RouterLLM:
+    def __init__(self, decision, seconds=0.0):
+        self.decision = decision
+        self.seconds = seconds
+
+    def invoke(self, prompt, temperature=config.TEMPERATURE):
+        if prompt.startswith(ROUTER_PROMPT[:40]):
+            time.sleep(self.seconds)
+            if isinstance(self.decision, Exception):
+                raise self.decision
+            return self.decision
+        return "answer"
+
+
+def make_agent(monkeypatch, decision, router_seconds=0.0, retrieval_seconds=0.0):
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    monkeypatch.setattr(config, "SPECULATIVE_RETRIEVAL", True)
+    monkeypatch.setattr(config, "ROUTING_MODE", "two_step")
+    agent = PolicyAssistantGraph(SlowVectorStore(retrieval_seconds), create_session_store("memory"), faq_cache=False)
+    agent.llm = RouterLLM(decision, router_seconds)
+    return agent
+
+
+def wait_for_speculations(agent):
+    agent.speculation_pool.shutdown(wait=True)
+
+
+def test_retrieval_overlaps_the_router_call(monkeypatch):
+    agent = make_agent(monkeypatch, "retrieve", router_seconds=0.3, retrieval_seconds=0.3)
+
+    start = time.perf_counter()
+    result = agent.invoke("How many days of annual leave do I get?")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.55
+    assert agent.vector_store.searches == 1
+    assert result["retrieved_sections"] == ["1. Annual Leave"]
+    assert agent.get_speculation_stats()["hits"] == 1
+
+
+def test_speculation_is_discarded_for_other_routes(monkeypatch):
+    agent = make_agent(monkeypatch, "general", retrieval_seconds=0.1)
+
+    result = agent.invoke("Hello!")
+    wait_for_speculations(agent)
+
+    assert result["context"] == ""
+    stats = agent.get_speculation_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 0
+
+
+def test_failed_router_call_releases_the_speculation(monkeypatch):
+    agent = make_agent(monkeypatch, LLMUnavailableError("down"))
+
+    result = agent.invoke("How many days of annual leave do I get?")
+    wait_for_speculations(agent)
+
+    assert "try again" in result["response"]
+    assert agent._speculations_in_flight == 0
+    assert agent.get_speculation_stats()["misses"] == 1
+
+
+def test_speculation_is_skipped_when_workers_are_busy(monkeypatch):
+    agent = make_agent(monkeypatch, "retrieve")
+    agent._speculations_in_flight = config.SPECULATION_WORKERS
+
+    result = agent.invoke("How many days of annual leave do I get?")
+
+    # Retrieval still runs, in the retrieve node
+    assert agent.vector_store.searches == 1
+    assert result["retrieved_sections"] == ["1. Annual Leave"]
+    assert agent.get_speculation_stats()["skipped"] == 1
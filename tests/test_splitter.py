@@ -0,0 +1,124 @@
+from langchain_core.documents import Document
+
+from rag.splitter import PolicySplitter
+from rag.tokens import CharSizer
+
+POLICY = """Leave Policy
+
+1. Annual Leave
+
+Employees get 24 days of annual leave.
+
+1.1 Carry Forward
+
+Up to 10 unused days carry forward.
+
+2. Sick Leave
+
+Sick leave requires a medical certificate after 2 days.
+
+To apply:
+
+1. Submit the form to HR.
+
+2. Inform your manager.
+"""
+
+BANNERS = """Travel Policy
+====================
+BOOKING
+====================
+Book flights through the travel desk.
+---
+Approvals
+Managers approve trips over ₹50000.
+"""
+
+
+def splitter(**kwargs):
+    return PolicySplitter(sizer=CharSizer(), **kwargs)
+
+
+def paths(chunks):
+    return [chunk.metadata["section_path"] for chunk in chunks]
+
+
+def test_numbered_headers_build_the_section_path():
+    chunks = splitter().split_text(POLICY, {"source": "docs/leave_policy.txt"})
+
+    assert paths(chunks) == [
+        ["Leave Policy", "1. Annual Leave"],
+        ["Leave Policy", "1. Annual Leave", "1.1 Carry Forward"],
+        ["Leave Policy", "2. Sick Leave"],
+    ]
+    assert chunks[2].metadata["section_title"] == "2. Sick Leave"
+    assert chunks[2].metadata["relevance_boost"] == 1.3
+    assert chunks[0].metadata["doc_name"] == "leave_policy.txt"
+    # Numbered sentences stay in their section as list items
+    assert "1. Submit the form to HR." in chunks[2].page_content
+
+
+def test_banner_lines_mark_sections_and_subsections():
+    chunks = splitter().split_text(BANNERS, {"source": "travel_policy.txt"})
+
+    assert paths(chunks) == [
+        ["Travel Policy", "BOOKING"],
+        ["Travel Policy", "BOOKING", "Approvals"],
+    ]
+
+
+def test_offsets_point_back_into_the_source():
+    for text in (POLICY, BANNERS):
+        raw = text.encode("utf-8")
+        for chunk in splitter(chunk_size=60).split_text(text):
+            start, end = chunk.metadata["start_byte"], chunk.metadata["end_byte"]
+            assert raw[start:end].decode("utf-8") == chunk.page_content
+
+
+def test_chunks_stay_within_their_section_and_size():
+    chunks = splitter(chunk_size=60, chunk_overlap=0).split_text(POLICY)
+
+    headers = ["1. Annual Leave", "1.1 Carry Forward", "2. Sick Leave"]
+    for chunk in chunks:
+        assert len(chunk.page_content) <= 60
+        assert [h for h in headers if h in chunk.page_content] in ([], [chunk.metadata["section_title"]])
+
+
+def test_long_paragraph_is_broken_at_sentence_boundaries():
+    text = "Policy\n\n1. Rules\n\n" + " ".join(f"Rule number {n} applies." for n in range(20))
+
+    chunks = splitter(chunk_size=80, chunk_overlap=0).split_text(text)
+
+    assert len(chunks) > 1
+    assert all(chunk.page_content.endswith(".") and len(chunk.page_content) <= 80 for chunk in chunks)
+
+
+def test_trailing_paragraphs_overlap_into_the_next_chunk():
+    text = "Policy\n\n1. Rules\n\n" + "\n\n".join(f"Paragraph {n} text." for n in range(6))
+
+    chunks = splitter(chunk_size=40, chunk_overlap=20).split_text(text)
+
+    # The section header is the first paragraph of its first chunk
+    assert chunks[0].page_content == "1. Rules\n\nParagraph 0 text."
+    assert chunks[1].page_content.startswith("Paragraph 0 text.\n\nParagraph 1 text.")
+
+
+def test_pages_of_one_file_get_distinct_ids():
+    pages = [Document(page_content=POLICY, metadata={"source": "handbook.pdf", "page": n}) for n in range(2)]
+
+    chunks = splitter().split_documents(pages)
+
+    assert [chunk.metadata["chunk_id"] for chunk in chunks] == list(range(6))
+
+
+def test_children_record_their_parent_span():
+    text = "Policy\n\n1. Rules\n\n" + "\n\n".join(f"Paragraph {n} of the rules." for n in range(8))
+
+    chunks = splitter(chunk_size=40, chunk_overlap=0, parent_size=120).split_text(text)
+
+    parents = {(chunk.metadata["parent_start"], chunk.metadata["parent_end"]) for chunk in chunks}
+    assert len(parents) > 1
+    for chunk in chunks:
+        parent = text[chunk.metadata["parent_start"]:chunk.metadata["parent_end"]]
+        assert len(parent) <= 120
+        assert chunk.page_content in parent
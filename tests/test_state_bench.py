@@ -0,0 +1,19 @@
+import contextlib
+import io
+
+import config
+from loadtest.state_bench import DeltaGraph, FullCopyGraph, Probe, run
+
+
+def test_state_bench_runs_both_contracts(monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        full, delta = FullCopyGraph(Probe()), DeltaGraph(Probe())
+
+    full_result = run(full, turns=2, requests=3)
+    delta_result = run(delta, turns=2, requests=3)
+
+    assert delta_result["messages_after"] == delta_result["messages_expected"] == 6
+    # The full-copy contract duplicates the history through the messages reducer
+    assert full_result["messages_after"] > full_result["messages_expected"]
+    assert delta_result["copied_kb"] < full_result["copied_kb"]
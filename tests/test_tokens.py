@@ -0,0 +1,98 @@
+import re
+
+import pytest
+
+import config
+from rag.splitter import PolicySplitter
+from rag.tokens import CharSizer, TokenSizer, chunk_size_limits, get_sizer, parent_size_limits, token_report
+
+transformers = pytest.importorskip("transformers")
+
+
+class WordTokenizer:
+    """
+    One token per whitespace-separated word
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, add_special_tokens=True, return_offsets_mapping=False):
+        if isinstance(texts, str):
+            spans = [match.span() for match in re.finditer(r"\S+", texts)]
+            return {"input_ids": list(range(len(spans))), "offset_mapping": spans}
+        self.batches.append(list(texts))
+        return {"input_ids": [text.split() for text in texts]}
+
+
+@pytest.fixture
+def sizer(monkeypatch):
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", lambda name: WordTokenizer())
+    return TokenSizer(cache_size=3)
+
+
+def test_counts_are_batched_and_cached(sizer):
+    assert sizer.measure(["one two", "three", "one two"]) == [2, 1, 2]
+    assert sizer.measure(["three", "four five six"]) == [1, 3]
+
+    # Each uncached text is tokenized once, in one batch per call
+    assert sizer.tokenizer.batches == [["one two", "three"], ["four five six"]]
+    assert sizer.stats == {"cache_hits": 1, "cache_misses": 3, "batches": 2}
+
+
+def test_cache_keeps_the_most_recently_used_counts(sizer):
+    sizer.measure(["a", "b", "c"])
+    sizer.measure(["a", "d"])
+
+    assert list(sizer._cache) == ["c", "a", "d"]
+
+
+def test_batch_larger_than_the_cache_is_measured(sizer):
+    assert sizer.measure(["a", "b c", "d", "e f g"]) == [1, 2, 1, 3]
+    assert len(sizer._cache) == 3
+
+
+def test_window_ends_at_the_first_token_that_does_not_fit(sizer):
+    text = "alpha beta gamma delta"
+
+    assert sizer.window_end(text, 0, 2) == text.index("gamma")
+    assert sizer.window_end(text, text.index("beta"), 2) == text.index("delta")
+    assert sizer.window_end(text, 0, 10) == len(text)
+
+
+def test_token_sized_chunks_fit_the_limit(sizer):
+    text = "Policy\n\n1. Rules\n\n" + " ".join(f"Rule number {n} applies." for n in range(30))
+
+    chunks = PolicySplitter(chunk_size=20, chunk_overlap=0, sizer=sizer).split_text(text)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.metadata["token_count"] == len(chunk.page_content.split()) <= 20
+
+
+def test_limits_follow_the_unit(sizer):
+    assert chunk_size_limits(sizer) == (config.CHUNK_SIZE_TOKENS, config.CHUNK_OVERLAP_TOKENS)
+    assert chunk_size_limits(CharSizer()) == (config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+    assert parent_size_limits(sizer) == (config.CHILD_CHUNK_SIZE_TOKENS, config.PARENT_CHUNK_SIZE_TOKENS)
+    assert parent_size_limits(CharSizer()) == (config.CHILD_CHUNK_SIZE, config.PARENT_CHUNK_SIZE)
+
+
+def test_report_counts_chunks_over_the_model_limit(sizer, monkeypatch):
+    monkeypatch.setattr(config, "EMBEDDING_MAX_TOKENS", 6)
+
+    report = token_report(["a b", "a b c d e f"], sizer)
+
+    assert report["limit"] == 4
+    assert report["over_limit"] == 1
+    assert report["truncated_tokens"] == 2
+    assert report["fill_ratio"] == 0.75
+    assert token_report(["a b"], CharSizer()) == {}
+
+
+def test_sizing_falls_back_to_characters_without_a_tokenizer(monkeypatch):
+    def unavailable(name):
+        raise OSError("offline")
+
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", unavailable)
+
+    assert isinstance(get_sizer.__wrapped__("tokens"), CharSizer)
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import config
+import agent.graph as graph_module
+from agent.graph import PolicyAssistantGraph
+from agent.prompts import ROUTER_PROMPT, TOOL_SELECTION_PROMPT
+from agent.session_store import create_session_store
+
+
+class SlowTool:
+    def __init__(self, name, seconds=0.0):
+        self.name = name
+        self.seconds = seconds
+        self.calls = []
+
+    def invoke(self, input):
+        self.calls.append(input)
+        time.sleep(self.seconds)
+        return f"{self.name} result for {input}"
+
+
+class PlannerLLM:
+    """
+    Routes everything to tools and returns the scripted plans in order
+    """
+
+    def __init__(self, plans):
+        self.plans = list(plans)
+        self.prompts = []
+
+    def invoke(self, prompt, temperature=config.TEMPERATURE):
+        if prompt.startswith(ROUTER_PROMPT[:40]):
+            return "tool"
+        if prompt.startswith(TOOL_SELECTION_PROMPT[:40]):
+            self.prompts.append(prompt)
+            return json.dumps(self.plans.pop(0))
+        return "general answer"
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    tools = {name: SlowTool(name) for name in ("tool_a", "tool_b")}
+    monkeypatch.setattr(graph_module, "TOOL_MAP", tools)
+    return tools
+
+
+def make_agent(monkeypatch, plans):
+    monkeypatch.setattr(config, "CHECKPOINTS", False)
+    monkeypatch.setattr(config, "SPECULATIVE_RETRIEVAL", False)
+    monkeypatch.setattr(config, "TOOL_FAST_PATH", False)
+    agent = PolicyAssistantGraph(None, create_session_store("memory"), faq_cache=False)
+    agent.llm = PlannerLLM(plans)
+    return agent
+
+
+def call(tool, n):
+    return {"tool": tool, "parameters": {"n": n}}
+
+
+def test_independent_calls_run_concurrently(monkeypatch, tools):
+    tools["tool_a"].seconds = tools["tool_b"].seconds = 0.4
+    agent = make_agent(monkeypatch, [{"tool_calls": [call("tool_a", 1), call("tool_b", 2)], "done": True}])
+
+    start = time.perf_counter()
+    result = agent.invoke("do a and b")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.75
+    # Results keep the order of the calls
+    assert result["tool_results"] == ["tool_a result for {'n': 1}", "tool_b result for {'n': 2}"]
+
+
+def test_loop_feeds_results_to_the_next_step(monkeypatch, tools):
+    agent = make_agent(monkeypatch, [
+        {"tool_calls": [call("tool_a", 1)], "done": False},
+        {"tool_calls": [call("tool_b", 2)], "done": True},
+    ])
+
+    result = agent.invoke("do a, then b")
+
+    assert result["iteration"] == 2
+    assert [c["tool"] for c in result["tool_calls"]] == ["tool_a", "tool_b"]
+    assert "tool_a result" in agent.llm.prompts[1]
+
+
+def test_loop_stops_at_max_iterations(monkeypatch, tools):
+    monkeypatch.setattr(config, "MAX_ITERATIONS", 2)
+    agent = make_agent(monkeypatch, [{"tool_calls": [call("tool_a", n)], "done": False} for n in range(5)])
+
+    result = agent.invoke("keep going")
+
+    assert result["iteration"] == 2
+    assert len(tools["tool_a"].calls) == 2
+
+
+def test_calls_that_already_ran_are_not_repeated(monkeypatch, tools):
+    agent = make_agent(monkeypatch, [
+        {"tool_calls": [call("tool_a", 1)], "done": False},
+        {"tool_calls": [call("tool_a", 1)], "done": False},
+    ])
+
+    result = agent.invoke("do a twice")
+
+    assert len(tools["tool_a"].calls) == 1
+    assert result["iteration"] == 2
+
+
+def test_timeout_starts_when_the_tool_starts(monkeypatch, tools):
+    monkeypatch.setattr(config, "TOOL_TIMEOUT_SECONDS", 0.3)
+    tools["tool_a"].seconds = 0.2
+    tools["tool_b"].seconds = 0.2
+    agent = make_agent(monkeypatch, [])
+    # One thread: tool_b waits for tool_a, but only its own run time counts
+    agent.tool_pool = ThreadPoolExecutor(max_workers=1)
+
+    results = agent._execute_tool_calls([{"tool": "tool_a", "params": {}}, {"tool": "tool_b", "params": {}}])
+
+    assert results == ["tool_a result for {}", "tool_b result for {}"]
+    assert agent.get_tool_stats()["timeouts"] == 0
+
+
+def test_overrunning_tool_is_reported_until_it_returns(monkeypatch, tools):
+    monkeypatch.setattr(config, "TOOL_TIMEOUT_SECONDS", 0.1)
+    release = threading.Event()
+    tools["tool_a"].invoke = lambda input: release.wait(5) and "late"
+    agent = make_agent(monkeypatch, [])
+
+    results = agent._execute_tool_calls([{"tool": "tool_a", "params": {}}])
+
+    assert results == ["⚠️ tool_a timed out after 0.1s"]
+    assert agent.get_tool_stats()["overrunning"] == 1
+    release.set()
+    agent.tool_pool.shutdown(wait=True)
+    assert agent.get_tool_stats() == {"calls": 1, "timeouts": 1, "queue_timeouts": 0, "overrunning": 0}
+
+
+def test_call_that_cannot_start_is_given_up(monkeypatch, tools):
+    monkeypatch.setattr(config, "TOOL_QUEUE_TIMEOUT_SECONDS", 0.1)
+    monkeypatch.setattr(config, "TOOL_TIMEOUT_SECONDS", 0.2)
+    tools["tool_a"].seconds = 1.0
+    agent = make_agent(monkeypatch, [])
+    # tool_a holds the only thread past tool_b's queue timeout
+    agent.tool_pool = ThreadPoolExecutor(max_workers=1)
+
+    results = agent._execute_tool_calls([{"tool": "tool_a", "params": {}}, {"tool": "tool_b", "params": {}}])
+
+    assert results[0] == "⚠️ tool_a timed out after 0.2s"
+    assert results[1] == "⚠️ tool_b could not start, too many tool calls in progress"
+    assert tools["tool_b"].calls == []
+    assert agent.get_tool_stats()["queue_timeouts"] == 1
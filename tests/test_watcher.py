@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+import config
+from rag.dedup import deduplicate_chunks
+from rag.loader import list_document_files, load_file, split_documents
+from rag.vector_store import VectorStoreManager
+from rag.watcher import IncrementalIndexer
+
+POLICIES = {
+    "leave_policy.txt": "Leave Policy\n\n1. Annual Leave\n\nEmployees get 24 days of annual leave.\n",
+    "travel_policy.txt": "Travel Policy\n\n1. Booking\n\nBook flights through the travel desk.\n",
+    "empty.txt": "",
+}
+
+
+class CountingEmbeddings:
+    """
+    Wraps the test embeddings and counts the texts embedded
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+def write(folder, name, text):
+    path = os.path.join(folder, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def indexed_texts(manager):
+    return sorted(doc.page_content for doc, _ in manager.export_embeddings())
+
+
+@pytest.fixture
+def docs(tmp_path):
+    folder = str(tmp_path / "docs")
+    os.makedirs(folder)
+    for name, text in POLICIES.items():
+        write(folder, name, text)
+    return folder
+
+
+@pytest.fixture
+def manager(tmp_path, docs, embeddings, monkeypatch):
+    """
+    Manager serving an index of docs/ that was saved after the files were written
+    """
+    monkeypatch.setattr(config, "VECTOR_STORE_PATH", str(tmp_path / "index"))
+    manager = VectorStoreManager()
+    manager.embeddings = CountingEmbeddings(embeddings)
+    monkeypatch.setattr(manager, "save_vector_store",
+                        lambda: VectorStoreManager.save_vector_store(manager, config.VECTOR_STORE_PATH))
+
+    chunks = split_documents([doc for path in list_document_files(docs) for doc in load_file(path)])
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+    manager.publish_embeddings(*deduplicate_chunks(chunks, vectors))
+    return manager
+
+
+def test_seed_covers_every_indexed_file(manager, docs):
+    indexer = IncrementalIndexer(manager, docs)
+
+    assert sorted(os.path.basename(path) for path in indexer.entries) == sorted(POLICIES)
+    # A file without chunks is seeded too, so startup finds nothing to re-index
+    assert indexer.entries[os.path.join(docs, "empty.txt")]["chunks"] == []
+    assert indexer.pending_changes() == ([], [])
+    assert not indexer.sync()
+
+
+def test_sync_re_embeds_only_changed_files(manager, docs):
+    indexer = IncrementalIndexer(manager, docs)
+    generation = manager.generation
+
+    path = write(docs, "travel_policy.txt", "Travel Policy\n\n1. Booking\n\nBook trains through the travel desk.\n")
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+
+    assert indexer.sync()
+    assert manager.generation == generation + 1
+    assert all("trains" in text or "Travel" in text for text in manager.embeddings.embedded)
+    assert indexer.stats["files_reindexed"] == 1
+    assert any("trains" in text for text in indexed_texts(manager))
+    assert not any("flights" in text for text in indexed_texts(manager))
+
+
+def test_sync_drops_removed_files(manager, docs):
+    indexer = IncrementalIndexer(manager, docs)
+
+    os.remove(os.path.join(docs, "leave_policy.txt"))
+
+    assert indexer.sync()
+    assert manager.embeddings.embedded == []
+    assert not any("annual leave" in text for text in indexed_texts(manager))
+    assert indexer.stats["files_removed"] == 1
+
+
+def test_reload_is_refused_while_publishing(manager):
+    with manager.exclusive_publish():
+        assert manager.reload() is None